@@ -10,6 +10,9 @@ db = SQLAlchemy()
 migrate = Migrate()
 def create_app(config_class=Config):
     app = Flask(__name__)   #Flask实例
+    #上传文件边接收边写盘、边算哈希（见 app/utils/storage.py）
+    from app.utils.storage import UploadRequest
+    app.request_class = UploadRequest
     CORS(app, origins=["http://localhost:5173"], supports_credentials=True)
 
     #加载config
@@ -17,7 +20,27 @@ def create_app(config_class=Config):
     CORS(app, supports_credentials=True, origins=["http://localhost:5173"]) #允许跨域请求
     #初始化数据库
     db.init_app(app)
-    migrate.init_app(app,db)
+    #全文索引表不在模型里，生成迁移时跳过（见 app/utils/search.py）
+    from app.utils.search import include_object
+    migrate.init_app(app,db, include_object=include_object)
+    #SQLite 连接参数（WAL 等 PRAGMA）
+    from app.utils import db_engine
+    db_engine.init_app(app, db)
+    #请求耗时 / SQL 统计、慢日志和 /metrics
+    from app.utils import metrics
+    metrics.init_app(app, db)
+    #JSON 编码（可选 orjson）
+    from app.utils import serializers
+    serializers.init_app(app)
+    #初始化公开接口的响应缓存
+    from app.utils.cache import response_cache
+    response_cache.init_app(app)
+    #初始化图片后台处理线程池
+    from app.utils import images
+    images.init_app(app)
+    #初始化订单号生成器（分配 worker id）
+    from app.utils import idgen
+    idgen.init_app(app)
 
     #导入User模型
     from app.models.user import User
@@ -25,6 +48,16 @@ def create_app(config_class=Config):
     from app.models.book import Book
     #导入Order模型
     from app.models.order import Order
+    #导入上传文件模型
+    from app.models.upload import UploadFile
+    #导入分面计数模型
+    from app.models.facet import BookFacetCount
+    #导入课程一起购买计数模型
+    from app.models.recommend import CoursePurchasePair
+    #导入成交价分桶计数模型
+    from app.models.price_stats import PriceSketchBucket
+    #导入数据版本计数模型
+    from app.models.cache_version import CacheVersion
 
     #注册路由蓝图
     from app.routes.user_routes import user_bp
@@ -33,6 +66,63 @@ def create_app(config_class=Config):
     app.register_blueprint(user_bp) 
     app.register_blueprint(book_bp)
     app.register_blueprint(order_bp)
+
+    #数据库升级：create_app 不访问数据库，部署时执行 flask schema-upgrade 补齐表/列/索引并初始化派生表（见 app/utils/schema.py）
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+
+    @app.cli.command('schema-upgrade')
+    def schema_upgrade():
+        created = upgrade_schema()
+        for kind, label in (('tables', '新建表'), ('columns', '新建列'), ('indexes', '新建索引'), ('widened', '放宽类型的列')):
+            print(f"{label}：{', '.join(created[kind]) or '无'}")
+        bootstrap_derived()
+        print('已初始化全文索引和计数表')
+
+    #书籍全文检索索引：flask schema-upgrade 时创建，并提供 flask search-reindex 命令手动重建
+    from app.utils.search import rebuild_search_index
+
+    @app.cli.command('search-reindex')
+    def search_reindex():
+        count = rebuild_search_index()
+        print(f'已重建搜索索引，共 {count} 本在售书籍')
+
+    #列表分面计数：flask schema-upgrade 时计数表为空则先统计一遍，并提供 flask facets-rebuild 命令修复计数
+    from app.utils.facets import rebuild_facets
+
+    @app.cli.command('facets-rebuild')
+    def facets_rebuild():
+        count = rebuild_facets()
+        print(f'已重新统计分面计数，共 {count} 本在售书籍')
+
+    #详情页推荐：flask schema-upgrade 时课程一起购买计数表为空则先按订单统计一遍，并提供 flask recommend-rebuild 命令修复计数
+    from app.utils.recommend import rebuild_co_purchases
+
+    @app.cli.command('recommend-rebuild')
+    def recommend_rebuild():
+        count = rebuild_co_purchases()
+        print(f'已重新统计课程一起购买人数，共 {count} 个课程组合')
+
+    #定价参考：flask schema-upgrade 时成交价分桶表为空则先按订单统计一遍，并提供 flask price-stats-rebuild 命令修复计数
+    from app.utils.price_stats import rebuild_price_stats
+
+    @app.cli.command('price-stats-rebuild')
+    def price_stats_rebuild():
+        count = rebuild_price_stats()
+        print(f'已重新统计成交价分布，共 {count} 个订单')
+
+    #订单定时任务：超时未支付自动取消、已收货自动完成；
+    #默认在 Web 进程的后台线程里定时执行，也可以用 flask orders-tick（执行一次）/ flask orders-worker（常驻）单独执行
+    from app.utils import order_jobs
+    order_jobs.init_app(app)
+
+    @app.cli.command('orders-tick')
+    def orders_tick():
+        result = order_jobs.run_tick(app)
+        print(f"自动完成 {result['completed']} 个订单，超时取消 {result['expired']} 个订单")
+
+    @app.cli.command('orders-worker')
+    def orders_worker():
+        order_jobs.run_forever(app, app.config['ORDER_JOBS_INTERVAL'] or 60)
    
     #设置路由
     @app.route('/')
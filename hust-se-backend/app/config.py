@@ -2,6 +2,19 @@ import os
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def engine_options(database_uri):
+    #连接池参数：SQLite 文件库不需要（每个连接都是本地文件句柄），Postgres/MySQL 按环境变量配置
+    if database_uri.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),     #取不到连接时最多等待的秒数
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),   #定期重建连接，避免被数据库/中间件断开
+        'pool_pre_ping': True   #取连接前先 ping 一下，断开的连接自动重连
+    }
+
 class Config:
     # 1. 【新增】你必须设置一个秘钥！
     #    Flask session 依赖这个秘钥来加密 cookie。
@@ -13,3 +26,87 @@ class Config:
         'sqlite:///' + os.path.join(basedir, 'app.db')
     
     UPLOAD_FOLDER = os.path.join(basedir, 'static/uploads')
+    #上传限制：整个请求最大 32MB（超过直接 413，不读请求体），单张图片最大 8MB，每本书最多 6 张图
+    MAX_CONTENT_LENGTH = 32 * 1024 * 1024
+    MAX_IMAGE_SIZE = 8 * 1024 * 1024
+    MAX_IMAGES_PER_BOOK = 6
+    #批量导入书籍（/book/import）：整个请求（CSV/NDJSON 文件 + 图片压缩包）最大 256MB，每 500 行一个事务
+    MAX_IMPORT_SIZE = 256 * 1024 * 1024
+    IMPORT_BATCH_SIZE = 500
+
+    #列表接口每页条数上限，防止 per_page 被传成很大的值一次拉全表
+    MAX_PER_PAGE = 50
+    #列表分面计数（facets=1）带搜索词时最多统计的匹配书籍数，超过时不返回分面计数
+    FACETS_SEARCH_MAX_MATCHES = 2000
+    #详情页推荐（/book/<id>/recommendations）每组最多返回的书籍数
+    MAX_RECOMMENDATIONS = 20
+    #定价参考（/book/price-guide）：统计最近几个月的成交价，成交少于几笔时不给参考
+    PRICE_GUIDE_MONTHS = 12
+    PRICE_GUIDE_MIN_SAMPLES = 3
+    #批量下单（/order/checkout）一次最多包含的书籍数
+    MAX_CHECKOUT_BOOKS = 30
+
+    #订单定时任务（见 app/utils/order_jobs.py）：待支付超时自动取消并让书籍重新上架，已收货一段时间后自动完成
+    ORDER_PAYMENT_TIMEOUT_MINUTES = 30
+    ORDER_AUTO_COMPLETE_DAYS = 7
+    #进程内定时执行的间隔（秒）；设为 0 时不在 Web 进程里执行，改用 flask orders-worker / cron 执行 flask orders-tick
+    ORDER_JOBS_INTERVAL = int(os.environ.get('ORDER_JOBS_INTERVAL', 60))
+    ORDER_JOBS_BATCH_SIZE = 500     #每批（一个事务）最多处理的订单数
+    ORDER_JOBS_MAX_BATCHES = 20     #每次执行最多处理的批数，积压的留到下一次
+
+    #公开书籍接口的响应缓存：默认进程内 LRU+TTL；多 worker 部署时建议配置 Redis，保证失效对所有进程生效
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_TTL = 30     #秒
+    RESPONSE_CACHE_MAX_ENTRIES = 1024
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+    #JSON 响应编码：安装了 orjson（pip install orjson，可选依赖）时用它代替标准库 json，FAST_JSON=0 可关闭
+    FAST_JSON = os.environ.get('FAST_JSON', '1') == '1'
+
+    #login_required 的用户缓存有效期（秒），0 表示每个请求都查数据库
+    USER_CACHE_TTL = 10
+
+    #密码哈希参数（Werkzeug 写法），修改后老用户下次登录时自动按新参数重新哈希（见 app/utils/passwords.py）
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    #同时计算密码哈希的请求数上限，排队超过 PASSWORD_HASH_WAIT 秒返回 503
+    PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', os.cpu_count() or 2))
+    PASSWORD_HASH_WAIT = 3
+
+    #登录/注册限流（进程内令牌桶）：(桶容量, 每秒补充令牌数)
+    RATELIMIT_ENABLED = True
+    RATELIMIT_LOGIN_IP = (20, 0.5)         #同一 IP：连续 20 次，之后每分钟 30 次
+    RATELIMIT_LOGIN_PHONE = (5, 1 / 12)    #同一手机号：连续 5 次，之后每分钟 5 次
+    RATELIMIT_REGISTER_IP = (10, 1 / 30)   #同一 IP 注册：连续 10 次，之后每分钟 2 次
+    RATELIMIT_MAX_KEYS = 100000
+
+    #SQLite 连接建立时执行的 PRAGMA，空字典表示使用 SQLite 默认设置（回滚日志，写时阻塞所有读）
+    SQLITE_PRAGMAS = {}
+
+    #请求埋点（见 app/utils/metrics.py）：/metrics 指标、慢请求/慢 SQL 日志、慢请求采样分析
+    METRICS_ENABLED = True
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 100))
+    PROFILE_SLOW_REQUESTS = os.environ.get('PROFILE_SLOW_REQUESTS') == '1'   #有采样开销，排查问题时再打开
+    PROFILE_THRESHOLD_MS = int(os.environ.get('PROFILE_THRESHOLD_MS', 1000))
+    PROFILE_INTERVAL_MS = 5
+    PROFILE_DIR = os.path.join(os.path.dirname(basedir), 'profiles')
+
+
+class ProductionConfig(Config):
+    #生产环境数据库配置
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(Config.SQLALCHEMY_DATABASE_URI)
+
+    #gunicorn 多 worker 部署：进程内的响应缓存只能让本进程的缓存失效，别的 worker 会继续返回旧的推荐/定价参考，
+    #所以只有配置了 Redis（CACHE_REDIS_URL）才开启响应缓存
+    RESPONSE_CACHE_ENABLED = bool(Config.RESPONSE_CACHE_REDIS_URL)
+
+    #WAL：读写互不阻塞（/book/list 不会被下单、发布书籍卡住）；WAL 下 synchronous=NORMAL 已足够安全；
+    #busy_timeout：写锁冲突时等待而不是立刻报 database is locked；mmap/cache 提高读性能
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,           #毫秒
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,       #负数表示 KB，即 64MB
+        'temp_store': 'MEMORY'
+    }
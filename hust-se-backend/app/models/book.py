@@ -1,10 +1,31 @@
 #app/models/book.py
 from datetime import datetime
 from app import db
+from app.utils.images import rendition_urls
+from app.utils.storage import split_images
+from app.utils.serializers import Serializer, format_time
 
 class Book(db.Model):
     #表名：books
     __tablename__ = 'books'
+    #索引按实际查询设计：列表接口总是带 status=1，再按课程/年级/价格筛选，按发布时间或价格排序。
+    #SQLite/Postgres 上建成只包含在售书籍的部分索引（WHERE status = 1），其他数据库为普通复合索引
+    __table_args__ = (
+        db.Index('ix_books_onsale_create_time', 'status', 'create_time', 'id',
+                 sqlite_where=db.text('status = 1'), postgresql_where=db.text('status = 1')),
+        db.Index('ix_books_onsale_price', 'status', 'price', 'id',
+                 sqlite_where=db.text('status = 1'), postgresql_where=db.text('status = 1')),
+        db.Index('ix_books_onsale_course_create_time', 'status', 'course_tag', 'create_time', 'id',
+                 sqlite_where=db.text('status = 1'), postgresql_where=db.text('status = 1')),
+        db.Index('ix_books_onsale_course_price', 'status', 'course_tag', 'price', 'id',
+                 sqlite_where=db.text('status = 1'), postgresql_where=db.text('status = 1')),
+        db.Index('ix_books_onsale_grade_create_time', 'status', 'grade_tag', 'create_time', 'id',
+                 sqlite_where=db.text('status = 1'), postgresql_where=db.text('status = 1')),
+        #推荐接口：同课程同年级的在售书籍，按发布时间取最新的几本
+        db.Index('ix_books_onsale_course_grade_create_time', 'status', 'course_tag', 'grade_tag', 'create_time', 'id',
+                 sqlite_where=db.text('status = 1'), postgresql_where=db.text('status = 1')),
+        db.Index('ix_books_seller_id', 'seller_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)    #主键 id
     title = db.Column(db.String(100), nullable=False)   #书名
@@ -14,30 +35,41 @@ class Book(db.Model):
     condition = db.Column(db.String(50), nullable=False)    #新旧程度 1-5
     price = db.Column(db.Float, nullable=False)   #价格,不能为空
     description = db.Column(db.Text)    #描述,可为空
-    images = db.Column(db.String(500))    #图片URL,多个图片用逗号分隔即可
+    images = db.Column(db.Text)    #图片URL,多个图片用逗号分隔即可（最多 MAX_IMAGES_PER_BOOK 张，长度超过 500，用 Text）
     seller_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)    #卖家id
     create_time = db.Column(db.DateTime, default=datetime.utcnow)    #发布时间
     status = db.Column(db.SmallInteger, default=1)   #是否售出，1：在售 0：已售出
+    #最后修改时间，用于 ETag / Last-Modified；ORM 修改时自动更新，直接写 UPDATE 语句时要手动带上
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
      #关联卖家（反向引用：User.books -> 该用户发布的所有书籍）
     seller = db.relationship('User', backref=db.backref('books', lazy=True))\
     
-    def to_dict(self):
-        # 状态文本映射（将数字状态转换为中文描述，前端更易读）
-        status_map = {1: '在售', 0: '已售'}
-        return {
-            'id': self.id,
-            'title': self.title,
-            'author': self.author,
-            'course_tag': self.course_tag,
-            'condition': self.condition,
-            'price': self.price,
-            'seller_id': self.seller_id,
-            'description': self.description,
-            'images': self.images, #将图片URL字符串转换为列表, 新增
-            'status': self.status,
-            'status_text': status_map.get(self.status, '未知'),  # 显示中文状态
-            'create_time': self.create_time.strftime('%Y-%m-%d %H:%M:%S'),  # 格式化时间
-            'seller_name': self.seller.username if self.seller else '未知卖家',
-            'seller_credit': self.seller.credit if self.seller else 'N/A'
-        }
\ No newline at end of file
+    def to_dict(self, fields=None):
+        #字段表和取值规则见文件末尾的 book_serializer，fields 为 None 时返回全部字段
+        return book_serializer.dump(self, fields)
+
+
+def _cover(book):
+    image_list = split_images(book.images)
+    #封面（第一张图）的缩略图/中图，后台还没生成好时为原图地址
+    renditions = rendition_urls(image_list[0] if image_list else '')
+    return image_list, renditions['thumb'], renditions['medium']
+
+
+def _seller(book):
+    return (book.seller.username, book.seller.credit) if book.seller else ('未知卖家', 'N/A')
+
+
+#书籍状态 -> 中文描述（前端更易读）
+BOOK_STATUS_TEXT = {1: '在售', 0: '已售'}
+
+book_serializer = Serializer([
+    'id', 'title', 'author', 'course_tag', 'condition', 'price', 'seller_id', 'description',
+    'images',   #原始图片URL字符串，多个用逗号分隔
+    (('image_list', 'thumbnail_url', 'medium_url'), _cover),   #所有图片 URL、列表卡片用的缩略图、详情页用的中图
+    'status',
+    ('status_text', lambda book: BOOK_STATUS_TEXT.get(book.status, '未知')),
+    ('create_time', lambda book: format_time(book.create_time)),
+    (('seller_name', 'seller_credit'), _seller),
+], relations={'seller_name': 'seller', 'seller_credit': 'seller'})
\ No newline at end of file
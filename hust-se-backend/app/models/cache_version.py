@@ -0,0 +1,11 @@
+#app/models/cache_version.py：数据版本计数表
+#每行是一类数据的版本号（目前只有 books：书籍列表），书籍的发布、修改、售出、重新上架都在同一事务里 +1（见 app/utils/http_cache.py），
+#列表接口的 ETag 由这个版本号算出。版本号随提交单调递增，不依赖各个事务里取到的时间戳先后
+from app import db
+
+class CacheVersion(db.Model):
+    #表名：cache_versions
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)  #数据类别，如 books
+    version = db.Column(db.Integer, nullable=False, default=0)  #版本号，每次改动 +1
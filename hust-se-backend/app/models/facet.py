@@ -0,0 +1,13 @@
+#app/models/facet.py：在售书籍的分面计数表
+#按 (课程, 年级, 价格区间) 的组合计数，发布/售出书籍时在同一事务里 +1/-1（见 app/utils/facets.py），
+#列表页的分面统计直接汇总这张小表，不对 books 做 GROUP BY
+from app import db
+
+class BookFacetCount(db.Model):
+    #表名：book_facet_counts
+    __tablename__ = 'book_facet_counts'
+
+    course_tag = db.Column(db.String(50), primary_key=True)    #课程标签
+    grade_tag = db.Column(db.String(20), primary_key=True)    #年级标签，没有年级时为 ''
+    price_bucket = db.Column(db.SmallInteger, primary_key=True)    #价格区间下标，见 facets.PRICE_BUCKETS
+    count = db.Column(db.Integer, nullable=False, default=0)    #在售书籍数量
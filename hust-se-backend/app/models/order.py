@@ -1,17 +1,26 @@
 from datetime import datetime
-import random   #生成随机订单号
 from app import db
+from app.utils.serializers import Serializer, format_time
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    #订单列表按买家/卖家查询并按创建时间倒序分页，书籍售出状态按 book_id 反查
+    __table_args__ = (
+        db.Index('ix_orders_buyer_create_time', 'buyer_id', 'create_time', 'id'),
+        db.Index('ix_orders_seller_create_time', 'seller_id', 'create_time', 'id'),
+        db.Index('ix_orders_book_id', 'book_id'),
+        #订单定时任务按状态 + 状态变更时间找到期的订单（见 app/utils/order_jobs.py）
+        db.Index('ix_orders_status_updated_at', 'status', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)  #订单id 主键
     order_no = db.Column(db.String(32), unique=True, nullable=False)    #唯一订单号，用于查询
     buyer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)    #买家id 关联用户表
     seller_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)    #卖家id 关联用户表,用户可以是买家也可以是卖家
     book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False)    #书籍id 关联书籍表
     price = db.Column(db.Float, nullable=False)    #交易价格
-    status = db.Column(db.SmallInteger, nullable=False,default=1)     #订单状态：1-待支付，2-已支付，3-已发货，4-已收货，5-已完成
+    status = db.Column(db.SmallInteger, nullable=False,default=1)     #订单状态：1-待支付，2-已支付，3-已发货，4-已收货，5-已完成，6-已取消
     create_time = db.Column(db.DateTime, default=datetime.now)  #订单创建时间
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)  #最近一次状态变更时间
 
     #关联关系，方便查询
     #买家：通过buyer_id 关联User模型，反向引用为buyer_orders (用户作为买家的所有订单)
@@ -21,33 +30,32 @@ class Order(db.Model):
     #shu籍：通过book_id 关联Book模型，反向引用为orders (书籍的所有订单)
     book = db.relationship('Book', backref=db.backref('orders', lazy=True))
 
-    def to_dict(self):
-        #将模型对象转换为字典，用于接口返回
-        return{
-            'id': self.id,
-            'order_no': self.order_no,
-            'buyer_id': self.buyer_id,
-            'buyer_name': self.buyer.username,      #关联查询买家用户名
-            'seller_id': self.seller_id,
-            'seller_name': self.seller.username,    #关联查询买家用户名
-            'book_id': self.book_id,
-            'book_title': self.book.title,         #关联查询书籍标题
-            'price': self.price,
-            'status': self.status,
-            #'status': 1,
-            #设置默认值1，只有订单开始的时候才会有这个默认值，因此直接设为1就好了。
-            #状态文本
-            'status_text': self.get_status_text(),
-            'create_time': self.create_time.strftime('%Y-%m-%d %H:%M')
-        }
+    def to_dict(self, fields=None):
+        #将模型对象转换为字典，用于接口返回；字段表见文件末尾的 order_serializer
+        return order_serializer.dump(self, fields)
     
     def get_status_text(self):
         #将状态码转换为文本描述
-        status_map = {
-            1: '待支付',
-            2: '已支付',
-            3: '已发货',
-            4: '已收货',
-            5: '已完成'
-        }
-        return status_map.get(self.status, '未知状态')
\ No newline at end of file
+        return STATUS_TEXT.get(self.status, '未知状态')
+
+
+#订单状态码 -> 文本描述（导出等不经过 ORM 对象的地方也用这张表）
+STATUS_TEXT = {
+    1: '待支付',
+    2: '已支付',
+    3: '已发货',
+    4: '已收货',
+    5: '已完成',
+    6: '已取消'     #超时未支付，由订单定时任务取消
+}
+
+
+order_serializer = Serializer([
+    'id', 'order_no',
+    'buyer_id', ('buyer_name', lambda order: order.buyer.username),    #关联查询买家用户名
+    'seller_id', ('seller_name', lambda order: order.seller.username),    #关联查询卖家用户名
+    'book_id', ('book_title', lambda order: order.book.title),    #关联查询书籍标题
+    'price', 'status',
+    ('status_text', lambda order: STATUS_TEXT.get(order.status, '未知状态')),
+    ('create_time', lambda order: format_time(order.create_time, 'minutes')),
+], relations={'buyer_name': 'buyer', 'seller_name': 'seller', 'book_title': 'book'})
@@ -0,0 +1,14 @@
+#app/models/price_stats.py：成交价分布的分桶计数表（卖家定价参考用）
+#每个 (维度, 键, 月份) 是一个对数分桶的分位数草图：价格按相对精度映射到桶下标，每个桶一行记成交笔数。
+#下单 / 订单取消时在同一事务里 +1/-1（见 app/utils/price_stats.py），查询时只读这个键最近几个月的桶，不扫订单表
+from app import db
+
+class PriceSketchBucket(db.Model):
+    #表名：price_sketch_buckets
+    __tablename__ = 'price_sketch_buckets'
+
+    scope = db.Column(db.String(10), primary_key=True)    #维度：title（书名+作者）/ course（课程）
+    sketch_key = db.Column(db.String(255), primary_key=True)    #规范化后的书名|作者，或课程标签
+    period = db.Column(db.Integer, primary_key=True)    #成交月份，如 202405
+    bucket = db.Column(db.Integer, primary_key=True)    #价格分桶下标，见 price_stats.bucket_of
+    count = db.Column(db.Integer, nullable=False, default=0)    #成交笔数
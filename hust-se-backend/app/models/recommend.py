@@ -0,0 +1,12 @@
+#app/models/recommend.py：课程之间的“一起购买”计数表
+#(课程 A, 课程 B, 人数)：买过 A 课程书籍的买家里，有多少人也买过 B 课程的书籍（A、B 两个方向各存一行）。
+#下单 / 订单取消时在同一事务里增量调整（见 app/utils/recommend.py），推荐接口按课程直接取人数最多的几行
+from app import db
+
+class CoursePurchasePair(db.Model):
+    #表名：course_co_purchases
+    __tablename__ = 'course_co_purchases'
+
+    course_tag = db.Column(db.String(50), primary_key=True)    #课程标签
+    other_course_tag = db.Column(db.String(50), primary_key=True)    #一起购买的另一门课程
+    buyers = db.Column(db.Integer, nullable=False, default=0)    #两门课程的书都买过的买家人数
@@ -0,0 +1,13 @@
+#app/models/upload.py：上传文件表，按内容哈希去重，记录被多少本书引用
+from datetime import datetime
+from app import db
+
+class UploadFile(db.Model):
+    #表名：upload_files
+    __tablename__ = 'upload_files'
+
+    sha256 = db.Column(db.String(64), primary_key=True)    #文件内容的 sha256，主键
+    path = db.Column(db.String(200), unique=True, nullable=False)    #相对 UPLOAD_FOLDER 的路径 ab/cd/<sha256>.<ext>
+    size = db.Column(db.Integer, nullable=False)    #文件大小（字节）
+    ref_count = db.Column(db.Integer, nullable=False, default=0)    #引用次数，归零后删除文件
+    create_time = db.Column(db.DateTime, default=datetime.utcnow)    #首次上传时间
@@ -1,6 +1,6 @@
 #app/modles/user.py：用户表模型,数据库的users表
 from datetime import datetime #时间库
-from werkzeug.security import generate_password_hash, check_password_hash #密码加密
+from app.utils.passwords import hash_password, verify_password #密码加密（哈希参数见 PASSWORD_HASH_METHOD）
 from app import db #引入数据库实例
 
 class User(db.Model):
@@ -23,13 +23,13 @@ class User(db.Model):
     #now() 加了 () 会导致默认值固定为服务器启动的时间。
     #密码加密
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-        #generate_password_hash():把明文密码加密成哈希值
+        self.password_hash = hash_password(password)
+        #hash_password():按配置的参数把明文密码加密成哈希值
 
     #密码验证
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-        #check_password_hash():检查密码是否正确
+        return verify_password(self, password)
+        #verify_password():检查密码是否正确，哈希参数过期时顺便重新哈希（需要调用方 commit）
 
     def to_dict(self):
         #返回用户信息字典
@@ -1,17 +1,22 @@
-from flask import Blueprint, request, jsonify, current_app
-from app.models.book import Book
+import zipfile
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from app.models.book import Book, book_serializer
 from app.utils.auth import login_required
+from app.utils import search as book_search
+from app.utils.pagination import keyset_page, get_per_page, InvalidCursor
+from app.utils.cache import response_cache
+from app.utils import images
+from app.utils import facets
+from app.utils.recommend import recommend
+from app.utils.price_stats import price_guide
+from app.utils.http_cache import conditional, list_version, bump_list_version, book_version
+from app.utils.storage import save_upload, discard_uploads
+from app.utils.book_import import allowed_file, parse_book_fields, detect_format, read_rows, import_rows
 from app import db
-from werkzeug.utils import secure_filename # 导入安全文件名工具
-import os
-from datetime import datetime
+from sqlalchemy.orm import joinedload
+from werkzeug.exceptions import RequestEntityTooLarge
 #书籍相关蓝图
 book_bp = Blueprint('book', __name__, url_prefix='/book')
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 #1. 发布书籍（支持图片上传）
 @book_bp.route('/create', methods=['POST'])
@@ -19,64 +24,40 @@ def allowed_file(filename):
 def create_book(current_user): 
     
     # --- 【修改】我们将所有逻辑放入一个 try/except 块中 ---
+    created = []   #这次新写入的图片文件，失败回滚后删掉
     try:
-        # 1. 获取文本数据
-        title = request.form.get('title')
-        course_tag = request.form.get('course_tag')
-        condition = request.form.get('condition')
-        price = request.form.get('price')
-
-        if not all([title, course_tag, condition, price]):
-            return jsonify({'code': 400, 'msg': '缺少必要的文本参数(title, course_tag, condition, price)'}), 400
-
-        # 2. 获取文件数据
-        image_file = request.files.get('image')
-        image_url = '' # 默认值
-
-        # 3. 处理文件（如果用户上传了）
-        if image_file and allowed_file(image_file.filename):
-            
-            # 3.1 获取扩展名
-            original_filename = secure_filename(image_file.filename)
-            _, extension = os.path.splitext(original_filename)
-            
-            # 3.2 (保留) 使用时间戳生成唯一文件名
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S%f')
-            unique_filename = f"{timestamp}{extension}"
-
-            # 3.3 获取保存目录
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-            
-            # 3.4 【新增】确保目录存在 (关键修复!)
-            #     os.makedirs 会创建所有不存在的中间目录
-            #     exist_ok=True 使得如果目录已存在，也不会报错
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            # 3.5 创建完整保存路径
-            save_path = os.path.join(upload_folder, unique_filename)
-            
-            # 3.6 保存文件
-            image_file.save(save_path)
-            
-            # 3.7 设置数据库URL
-            image_url = f"/static/uploads/{unique_filename}"
+        # 1. 获取并校验文本数据（规则和批量导入共用）
+        values, error = parse_book_fields(request.form)
+        if error:
+            return jsonify({'code': 400, 'msg': error}), 400
+
+        # 2. 获取文件数据（支持多张图片：字段 images 可以传多个文件，兼容旧的单个 image 字段）
+        image_files = [f for f in request.files.getlist('images') + request.files.getlist('image') if f and f.filename]
+        if len(image_files) > current_app.config['MAX_IMAGES_PER_BOOK']:
+            return jsonify({'code': 400, 'msg': f"最多上传{current_app.config['MAX_IMAGES_PER_BOOK']}张图片"}), 400
+
+        # 3. 保存文件：按内容哈希存储，同一张图片重复上传只存一份
+        image_urls = [save_upload(f, created) for f in image_files if allowed_file(f.filename)]
+        image_url = ','.join(image_urls) # 多个 URL 用逗号分隔，没有图片时为 ''
 
         # 4. 创建书籍对象
         new_book = Book(
-            title=title,
-            author=request.form.get('author', ''), 
-            course_tag=course_tag,
-            condition=condition,
-            price=price,
-            description=request.form.get('description', ''),
+            **values,   # title/author/course_tag/grade_tag/condition/price/description
             images=image_url,  # 存入 '' 或 唯一URL
             seller_id=current_user.id,
             status=1 # 【重要】确保新书的状态是 1 (在售)
         )
         
-        # 5. 提交数据库
+        # 5. 提交数据库（先 flush 拿到 id，再写入全文索引，二者同一事务提交）
         db.session.add(new_book)
+        db.session.flush()
+        book_search.index_book(new_book)
+        facets.add_books([new_book])  #分面计数 +1
+        bump_list_version()  #列表版本号 +1（ETag 跟着变）
         db.session.commit()
+        response_cache.invalidate_books([new_book.id])  #提交成功后让列表缓存失效
+        for url in image_urls:
+            images.submit(new_book.id, url)  #缩略图/中图交给后台线程生成
         
         return jsonify({
             'code': 200,
@@ -84,14 +65,52 @@ def create_book(current_user):
             'data': new_book.to_dict()
         }), 200
         
+    except RequestEntityTooLarge as e:
+        db.session.rollback()
+        discard_uploads(created)
+        return jsonify({'code': 413, 'msg': e.description}), 413
     except Exception as e:
-        # 6. 如果上述任何步骤失败（包括文件保存），回滚数据库
+        # 6. 如果上述任何步骤失败（包括文件保存），回滚数据库，并删掉已经写入的图片文件
         db.session.rollback()
+        discard_uploads(created)
         # 记录错误，方便调试
         current_app.logger.error(f'发布书籍失败: {str(e)}') 
         return jsonify({'code': 500, 'msg': f'发布失败:{str(e)}'}), 500
+#1.1 批量导入书籍（CSV / NDJSON，可附带图片 zip 包），结果按行流式返回
+@book_bp.route('/import', methods=['POST'])
+@login_required
+def import_books(current_user):
+    #导入文件可能很大：放宽本接口的上传上限（必须在读取 request.files / request.stream 之前设置）
+    request.file_size_limit = request.content_length_limit = current_app.config['MAX_IMPORT_SIZE']
+    try:
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if not upload or not upload.filename:
+                return jsonify({'code': 400, 'msg': '请上传导入文件(file)'}), 400
+            fmt = detect_format(upload.filename, upload.mimetype, request.args.get('format'))
+            stream = upload.stream
+            stream.seek(0)
+            images_zip = request.files.get('images_zip')
+            archive = zipfile.ZipFile(images_zip.stream) if images_zip and images_zip.filename else None
+        else:
+            #也可以直接把 CSV/NDJSON 作为请求体上传（Content-Type: text/csv 或 application/x-ndjson）
+            fmt = detect_format(None, request.mimetype, request.args.get('format'))
+            stream = request.stream
+            archive = None
+    except RequestEntityTooLarge as e:
+        return jsonify({'code': 413, 'msg': e.description}), 413
+    except zipfile.BadZipFile:
+        return jsonify({'code': 400, 'msg': '图片压缩包(images_zip)不是合法的 zip 文件'}), 400
+    if fmt is None:
+        return jsonify({'code': 400, 'msg': '无法识别导入格式，请上传 .csv / .ndjson 文件或指定 format 参数'}), 400
+
+    results = import_rows(read_rows(stream, fmt), archive, current_user.id)
+    return Response(stream_with_context(results), mimetype='application/x-ndjson')
+
 #2. 多条件检索书籍 （公开的接口）
 @book_bp.route('/list', methods=['GET'])
+@conditional(lambda: list_version())
+@response_cache.cached('list')
 def get_books():
 
     search = request.args.get('search')#为了搜索栏，获取搜索词
@@ -103,12 +122,26 @@ def get_books():
     max_price = request.args.get('max_price', type=float)
     sort_by = request.args.get('sort_by','create_at') #默认按发布时间排序
     order = request.args.get('order', 'desc')   #升序/降序
+    want_facets = request.args.get('facets') == '1'   #是否返回各筛选项的在售数量
+    #只返回需要的字段（如 fields=id,title,price,thumbnail_url），不传时返回全部字段
+    try:
+        fields = book_serializer.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'code': 400, 'msg': str(e)}), 400
     
     #构建查询条件
-    query = Book.query.filter_by(status=1)  #只查询在售书籍，卖出的就不包含
+    #请求了卖家字段时，卖家信息随书籍一起 JOIN 查出，序列化时不再逐本懒加载 seller（避免 N+1 查询）
+    query = Book.query.options(*[joinedload(getattr(Book, name)) for name in book_serializer.relations(fields)])
+    query = query.filter_by(status=1)  #只查询在售书籍，卖出的就不包含
+    search_rank = None
     if search:
-        #使用 .like() 和 % 通配符来实现模糊查询
-        query = query.filter(Book.title.like(f"%{search}%"))
+        #走全文索引（书名/作者/课程/描述），数据库不支持时退回 LIKE 模糊查询
+        matched = book_search.search_subquery(search)
+        if matched is not None:
+            query = query.join(matched, Book.id == matched.c.book_id)
+            search_rank = matched.c.rank
+        else:
+            query = query.filter(book_search.like_filter(search))
     
     #条件筛选
 
@@ -123,39 +156,68 @@ def get_books():
     if max_price is not None:
         query = query.filter(Book.price <= max_price)   #限制价格区间
     
-    #排序
-    if sort_by == 'price':
-        if order == 'asc':
-            query = query.order_by(Book.price.asd())
-        else:
-            query = query.order_by(Book.price.desc())
+    #排序字段：有搜索词且没有指定排序方式时，按相关度排序；id 作为次级排序保证顺序稳定
+    if search_rank is not None and 'sort_by' not in request.args:
+        sort_name, sort_column, descending = 'rank', search_rank, False
+    elif sort_by == 'price':
+        sort_name, sort_column, descending = 'price', Book.price, order != 'asc'
     else:
         #默认按发布时间排序
-        if order == 'asc':
-            query = query.order_by(Book.create_time.asc())
-        else:
-            query = query.order_by(Book.create_time.desc())
-    
-    #分页（默认每页10条）
+        sort_name, sort_column, descending = 'create_time', Book.create_time, order != 'asc'
+    sort_name = f"{sort_name}:{'desc' if descending else 'asc'}"
+
+    per_page = get_per_page()
+
+    #游标分页：传了 cursor 参数（第一页传空字符串）就按 (排序字段, id) 翻页，
+    #不做 OFFSET 和 COUNT(*)，只有 with_total=1 时才统计总数
+    if 'cursor' in request.args:
+        total = query.order_by(None).count() if request.args.get('with_total') == '1' else None
+        try:
+            items, next_cursor = keyset_page(
+                query, sort_name, sort_column, Book.id, descending,
+                request.args.get('cursor'), per_page
+            )
+        except InvalidCursor as e:
+            return jsonify({'code': 400, 'msg': str(e)}), 400
+        data = {
+            'books': book_serializer.dump_many(items, fields),
+            'per_page': per_page,
+            'next_cursor': next_cursor  #为 None 表示没有下一页
+        }
+        if total is not None:
+            data['total'] = total
+        if want_facets:
+            data['facets'] = facets.facet_counts(course_tag, grade_tag, min_price, max_price, search)
+        return jsonify({'code': 200, 'data': data}), 200
+
+    #页码分页（兼容旧接口，默认每页10条）
+    if descending:
+        query = query.order_by(sort_column.desc(), Book.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Book.id.asc())
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
     pagination = query.paginate(page=page, per_page=per_page)
 
     #构建返回的数据
-    books = [book.to_dict() for book in pagination.items]
+    books = book_serializer.dump_many(pagination.items, fields)
+    data = {
+        'books': books,
+        'total': pagination.total,  # 总条数
+        'page': page,
+        'per_page': per_page,
+        'pages': pagination.pages  # 总页数
+    }
+    if want_facets:
+        data['facets'] = facets.facet_counts(course_tag, grade_tag, min_price, max_price, search)
     return jsonify({
         'code': 200,
-        'data': {
-            'books': books,
-            'total': pagination.total,  # 总条数
-            'page': page,
-            'per_page': per_page,
-            'pages': pagination.pages  # 总页数
-        }
+        'data': data
     }), 200
 
 #3. 查询书籍详情（公开接口）
 @book_bp.route('/<int:book_id>', methods=['GET'])
+@conditional(book_version)
+@response_cache.cached(lambda book_id: f'book:{book_id}')
 def get_book_detail(book_id):
     book = Book.query.get(book_id)
     if not book or book.status != 1:
@@ -164,3 +226,56 @@ def get_book_detail(book_id):
         'code':200,
         'data':book.to_dict()
     }), 200
+
+#3.1 详情页推荐：同课程的在售书籍 + 买过这门课的同学还买了哪些课的书（公开接口）
+#推荐结果随任何书籍上架/售出变化，和列表共用 list 版本号做缓存（缓存 key 里带 book_id）；
+#书籍是否存在在查缓存之前判断，不存在的书直接 404
+@book_bp.route('/<int:book_id>/recommendations', methods=['GET'])
+def get_book_recommendations(book_id):
+    book = db.session.get(Book, book_id)
+    if not book:
+        return jsonify({'code': 404, 'msg': '书籍不存在'}), 404
+    return _book_recommendations(book)
+
+
+@response_cache.cached('list')
+def _book_recommendations(book):
+    limit = min(max(request.args.get('limit', 6, type=int), 1), current_app.config['MAX_RECOMMENDATIONS'])
+    result = recommend(book, limit)
+    return jsonify({
+        'code': 200,
+        'data': {
+            'same_course': [item.to_dict() for item in result['same_course']],
+            'also_bought': [
+                {'course_tag': group['course_tag'], 'buyers': group['buyers'],
+                 'books': [item.to_dict() for item in group['books']]}
+                for group in result['also_bought']
+            ]
+        }
+    }), 200
+
+#3.2 定价参考：同书名/作者、同课程最近成交价的 p25 / 中位数 / p75（公开接口，发布书籍页面填价格时调用）
+#只读分桶计数表，不扫订单；定价参考晚几十秒更新没有影响，用单独的版本号（不随书籍上架/售出失效），
+#同一组查询条件在 RESPONSE_CACHE_TTL 内直接返回缓存
+@book_bp.route('/price-guide', methods=['GET'])
+@response_cache.cached('price_guide')
+def get_price_guide():
+    title = request.args.get('title', '').strip()
+    author = request.args.get('author', '').strip()
+    course_tag = request.args.get('course_tag', '').strip()
+    if not title and not course_tag:
+        return jsonify({'code': 400, 'msg': '缺少必要参数：title 或 course_tag'}), 400
+    months = current_app.config['PRICE_GUIDE_MONTHS']
+    guide = price_guide(title, author, course_tag, months, current_app.config['PRICE_GUIDE_MIN_SAMPLES'])
+    return jsonify({
+        'code': 200,
+        'data': dict(guide, months=months)
+    }), 200
+
+#4. 响应缓存命中统计（公开接口）
+@book_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({
+        'code': 200,
+        'data': response_cache.stats()
+    }), 200
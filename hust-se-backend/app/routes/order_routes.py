@@ -1,11 +1,20 @@
-from flask import Blueprint, request, jsonify
-from app.models.order import Order
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from app.models.order import Order, order_serializer
 from app.models.book import Book  # 导入书籍模型，用于校验书籍状态
 from app.models.user import User  # 导入用户模型，用于校验用户状态
-from app.utils.auth import login_required  # 导入登录验证装饰器
+from app.utils.auth import login_required, invalidate_user  # 导入登录验证装饰器
+from app.utils import search as book_search  # 全文索引，书籍售出后需要移除
+from app.utils.pagination import keyset_page, get_per_page, InvalidCursor
+from app.utils.cache import response_cache
+from app.utils.http_cache import touch_seller_books, bump_list_version
+from app.utils import facets
+from app.utils import recommend
+from app.utils import price_stats
+from sqlalchemy.orm import joinedload
+from app.utils.idgen import next_order_no
+from app.utils.order_export import export_query, iter_csv, iter_ndjson
 from app import db
-import random
-from datetime import datetime
+from datetime import datetime, timedelta
 
 #创建订单路由蓝图（前缀为/order）
 order_bp = Blueprint('order', __name__, url_prefix='/order')
@@ -21,7 +30,7 @@ def create_order(current_user):
         return jsonify({'code': 400, 'msg': '缺少必要参数：book_id'}), 400 #返回400错误，400表示请求参数错误
     
     book_id = data['book_id']
-    #1. 查询书籍是否存在且在售
+    #1. 查询书籍是否存在且在售（这里只是普通读取，真正的“抢占”在第5步原子完成）
     book = Book.query.filter_by(id=book_id, status=1).first()  # status=1表示在售
     if not book:
         return jsonify({'code': 404, 'msg': '书籍不存在或已售出'}), 404     #返回404错误，404表示资源不存在
@@ -30,27 +39,41 @@ def create_order(current_user):
     if book.seller_id == current_user.id:
         return jsonify({'code': 400, 'msg': '想买自己的书？驳回！'}), 400
     
-    #3. 生成唯一订单号（时间戳+买家ID+4位随机数，确保不重复）
-    timestamp = int(datetime.now().timestamp())  #时间戳
-    random_num = random.randint(1000, 9999)  #4位随机数
-    order_no = f"{timestamp}{current_user.id}{random_num}"
+    #3. 生成唯一订单号（Snowflake 风格：时间戳+worker id+序号，多进程也不会重复，且按时间有序）
+    order_no = next_order_no()
     
-    #4. 创建订单记录
+    #4. 创建订单记录（下单时间显式给出，成交价分布记的是同一个时间，取消订单时按 create_time 扣回同一个桶）
+    create_time = datetime.now()
     new_order = Order(
         order_no=order_no,
         buyer_id=current_user.id,  #买家ID为当前登录用户
         seller_id=book.seller_id,  #卖家ID为书籍的发布者
         book_id=book_id,
-        price=book.price  #交易价格为书籍当前售价
+        price=book.price,  #交易价格为书籍当前售价
+        create_time=create_time
     )
     
-    #5. 订单创建后，将书籍状态改为“已售出”（避免重复下单）
-    book.status = 0  #0表示已售出
+    #5. 抢占书籍：一条带条件的 UPDATE（只有 status 仍为 1 时才改成 0），
+    #   并发下单时只有一个请求的 rowcount 为 1，其余请求直接返回已售出，不会重复卖出
+    claimed = db.session.execute(
+        db.update(Book)
+        .where(Book.id == book.id, Book.status == 1)
+        .values(status=0, updated_at=datetime.utcnow())  #0表示已售出
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return jsonify({'code': 404, 'msg': '书籍不存在或已售出'}), 404
+    book_search.remove_book(book.id)  #同步从搜索索引中移除
+    facets.remove_books([book])  #分面计数 -1
+    recommend.add_purchases(current_user.id, [book.course_tag])  #课程一起购买计数（要在订单写入之前）
+    price_stats.add_sales([(book, book.price, create_time)])  #成交价分布（定价参考）
+    bump_list_version()  #列表版本号 +1（ETag 跟着变）
     
     #6. 提交数据库事务
     db.session.add(new_order)
     try:
         db.session.commit()
+        response_cache.invalidate_books([book.id])  #书籍已售出，列表和详情缓存都要失效
         return jsonify({
             'code': 200,
             'msg': '订单创建成功',
@@ -61,30 +84,183 @@ def create_order(current_user):
         return jsonify({'code': 500, 'msg': f'创建订单失败：{str(e)}'}), 500
 
 
+#1.1 批量下单（一次买下多本书，同一个事务）
+@order_bp.route('/checkout', methods=['POST'])
+@login_required
+def checkout(current_user):
+    data = request.get_json(silent=True) or {}
+    book_ids = data.get('book_ids')
+    if not isinstance(book_ids, list) or not book_ids:
+        return jsonify({'code': 400, 'msg': '缺少必要参数：book_ids'}), 400
+    if not all(isinstance(book_id, int) and not isinstance(book_id, bool) for book_id in book_ids):
+        return jsonify({'code': 400, 'msg': 'book_ids 必须是书籍ID列表'}), 400
+    book_ids = list(dict.fromkeys(book_ids))  #去重，保持顺序
+    if len(book_ids) > current_app.config['MAX_CHECKOUT_BOOKS']:
+        return jsonify({'code': 400, 'msg': f"一次最多购买{current_app.config['MAX_CHECKOUT_BOOKS']}本书"}), 400
+    #all_or_nothing=true 时任何一本买不到就整单取消；默认能买到的先买。
+    #只接受 JSON 布尔值："false" 这样的字符串用 bool() 会被当成 true，直接拒绝
+    all_or_nothing = data.get('all_or_nothing', False)
+    if not isinstance(all_or_nothing, bool):
+        return jsonify({'code': 400, 'msg': 'all_or_nothing 必须是布尔值(true/false)'}), 400
+
+    #1. 一次查出所有在售的书，先排除不存在/已售出/自己发布的
+    books = {book.id: book for book in Book.query.filter(Book.id.in_(book_ids), Book.status == 1)}
+    errors = {}
+    for book_id in book_ids:
+        if book_id not in books:
+            errors[book_id] = '书籍不存在或已售出'
+        elif books[book_id].seller_id == current_user.id:
+            errors[book_id] = '想买自己的书？驳回！'
+    candidates = [book_id for book_id in book_ids if book_id not in errors]
+
+    #2. 一条带条件的 UPDATE 抢占所有书：只有 status 仍为 1 的行会被改成 0，
+    #   RETURNING 拿回真正抢到的 id（并发时可能有几本刚被别人买走）
+    claimed = set()
+    if candidates and not (all_or_nothing and errors):
+        now = datetime.utcnow()
+        claim = db.update(Book).where(Book.id.in_(candidates), Book.status == 1).values(status=0, updated_at=now)
+        if db.engine.dialect.update_returning:
+            claimed = set(db.session.execute(claim.returning(Book.id)).scalars())
+        elif db.session.execute(claim).rowcount == len(candidates):
+            claimed = set(candidates)
+        else:
+            #不支持 RETURNING 且只抢到一部分：回滚后逐本抢占（仍在同一个事务里）
+            db.session.rollback()
+            for book_id in candidates:
+                if db.session.execute(
+                    db.update(Book).where(Book.id == book_id, Book.status == 1).values(status=0, updated_at=now)
+                ).rowcount:
+                    claimed.add(book_id)
+        for book_id in candidates:
+            if book_id not in claimed:
+                errors[book_id] = '书籍不存在或已售出'
+
+    if not claimed or (all_or_nothing and errors):
+        db.session.rollback()
+        results = [{'book_id': book_id, 'success': False, 'msg': errors.get(book_id, '整单取消：其他书籍无法购买')}
+                   for book_id in book_ids]
+        return jsonify({'code': 409, 'msg': '部分书籍无法购买，整单已取消' if all_or_nothing else '没有可以购买的书籍',
+                        'data': {'results': results}}), 409
+
+    #3. 所有订单用一条 executemany 批量插入（不逐条 RETURNING），再按订单号一次查回 id；
+    #   同步更新一起购买计数、移除搜索索引、更新分面计数和成交价分布，一次提交；
+    #   下单时间显式写入，成交价分布用同一个时间（取消订单时按 create_time 扣回）
+    create_time = datetime.now()
+    orders = {
+        book_id: {'order_no': next_order_no(), 'buyer_id': current_user.id, 'seller_id': books[book_id].seller_id,
+                  'book_id': book_id, 'price': books[book_id].price, 'status': 1, 'create_time': create_time}
+        for book_id in book_ids if book_id in claimed
+    }
+    try:
+        recommend.add_purchases(current_user.id, {books[book_id].course_tag for book_id in orders})
+        db.session.execute(db.insert(Order), list(orders.values()))
+        order_ids = dict(db.session.execute(
+            db.select(Order.order_no, Order.id).where(Order.order_no.in_([o['order_no'] for o in orders.values()]))
+        ).all())
+        book_search.remove_books(list(orders))
+        facets.remove_books([books[book_id] for book_id in orders])
+        price_stats.add_sales([(books[book_id], order['price'], order['create_time'])
+                               for book_id, order in orders.items()])
+        bump_list_version()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'code': 500, 'msg': f'创建订单失败：{str(e)}'}), 500
+    results = []
+    for book_id in book_ids:
+        order = orders.get(book_id)
+        if order:
+            results.append({'book_id': book_id, 'success': True, 'order_id': order_ids[order['order_no']],
+                            'order_no': order['order_no'], 'price': order['price']})
+        else:
+            results.append({'book_id': book_id, 'success': False, 'msg': errors[book_id]})
+    response_cache.invalidate_books(list(orders))
+    return jsonify({
+        'code': 200,
+        'msg': f'成功购买{len(orders)}本书' + (f'，{len(errors)}本无法购买' if errors else ''),
+        'data': {
+            'results': results,
+            'total_price': sum(order['price'] for order in orders.values())
+        }
+    }), 200
+
+
 #2. 查询个人订单列表（区分买家/卖家视角，需登录）
 @order_bp.route('/list', methods=['GET'])
 @login_required
 def get_order_list(current_user):
     #通过query参数区分视角：role=buyer（买家）或role=seller（卖家），默认买家
     role = request.args.get('role', 'buyer')
+    #只返回需要的字段（如 fields=id,order_no,status_text），不传时返回全部字段
+    try:
+        fields = order_serializer.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'code': 400, 'msg': str(e)}), 400
     
     #根据角色查询对应的订单
     if role == 'buyer':
-        #买家视角：查询当前用户作为买家的所有订单
-        orders = Order.query.filter_by(buyer_id=current_user.id).order_by(Order.create_time.desc()).all()
+        #买家视角：查询当前用户作为买家的订单
+        query = Order.query.filter_by(buyer_id=current_user.id)
     else:
-        #卖家视角：查询当前用户作为卖家的所有订单
-        orders = Order.query.filter_by(seller_id=current_user.id).order_by(Order.create_time.desc()).all()
-    
+        #卖家视角：查询当前用户作为卖家的订单
+        query = Order.query.filter_by(seller_id=current_user.id)
+
+    #按订单状态筛选（可选）
+    status = request.args.get('status', type=int)
+    if status is not None:
+        query = query.filter(Order.status == status)
+
+    total = query.count()  #订单总数
+
+    #请求的字段用到的买家、卖家、书籍在同一条 SQL 里 JOIN 查出，避免序列化时逐条懒加载（3N+1 查询）
+    query = query.options(*[joinedload(getattr(Order, name)) for name in order_serializer.relations(fields)])
+
+    #按 (create_time, id) 倒序做游标分页，第一页不传 cursor
+    try:
+        orders, next_cursor = keyset_page(
+            query, 'create_time:desc', Order.create_time, Order.id, True,
+            request.args.get('cursor'), get_per_page(20)
+        )
+    except InvalidCursor as e:
+        return jsonify({'code': 400, 'msg': str(e)}), 400
+
     #转换为字典列表返回
     return jsonify({
         'code': 200,
         'data': {
-            'orders': [order.to_dict() for order in orders],
-            'total': len(orders)  #订单总数
+            'orders': order_serializer.dump_many(orders, fields),
+            'total': total,  #订单总数
+            'next_cursor': next_cursor  #为 None 表示没有更多订单
         }
     }), 200
 
+#2.1 导出个人订单（CSV / NDJSON，流式输出，用于对账）
+@order_bp.route('/export', methods=['GET'])
+@login_required
+def export_orders(current_user):
+    role = request.args.get('role', 'buyer')
+    fmt = request.args.get('format', 'csv')
+    if role not in ('buyer', 'seller'):
+        return jsonify({'code': 400, 'msg': 'role 只能是 buyer 或 seller'}), 400
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'code': 400, 'msg': 'format 只能是 csv 或 ndjson'}), 400
+
+    #日期范围：start/end 格式为 YYYY-MM-DD，两端都包含
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d') if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d') + timedelta(days=1) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'code': 400, 'msg': '日期格式应为 YYYY-MM-DD'}), 400
+
+    stmt = export_query(current_user.id, role, request.args.get('status', type=int), start, end)
+    if fmt == 'csv':
+        body, mimetype = iter_csv(stmt), 'text/csv'
+    else:
+        body, mimetype = iter_ndjson(stmt), 'application/x-ndjson'
+    filename = f"orders-{role}-{datetime.now().strftime('%Y%m%d%H%M%S')}.{fmt}"
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 #4. 查询订单详情（需登录，且只能查看自己的订单）
 @order_bp.route('/<int:order_id>', methods=['GET'])     #GET /order/1 会查询ID为1的订单
 @login_required         #登陆验证装饰器，先检查session中有没有userid
@@ -150,31 +326,48 @@ def update_order_status(current_user, order_id):
         2: [3],         #已支付→只能到已发货
         3: [4],         #已发货→只能到已收货
         4: [5],         #已收货→只能到已完成
-        5: []           #已完成→无后续状态
+        5: [],          #已完成→无后续状态
+        6: []           #已取消→无后续状态
     }
     if new_status not in valid_transitions[order.status]:
         return jsonify({'code': 400, 'msg': f'不支持从{order.get_status_text()}转为{Order(status=new_status).get_status_text()}'}), 400
     
     #4. 更新订单状态
     try:
-        #A. 更新订单状态
-        order.status = new_status
-        
-        #B. 新添加的信用分逻辑
-        #查询卖家
-        seller = User.query.get(order.seller_id)
+        #A. 更新订单状态：带上旧状态做条件更新，两个请求同时操作同一订单时只有一个能成功
+        old_status = order.status
+        updated = db.session.execute(
+            db.update(Order)
+            .where(Order.id == order.id, Order.status == old_status)
+            .values(status=new_status)
+        ).rowcount
+        if not updated:
+            db.session.rollback()
+            return jsonify({'code': 409, 'msg': '订单状态已变化，请刷新后重试'}), 409
         
-        if seller: #确保卖家存在
-            if new_status == 2:
-                #状态 2: 已支付 (等待发货) -> 扣减卖家30信用分
-                #状态 3: 已发货 (等待交付) -> 扣减卖家30信用分
-                seller.credit -= 30
-            elif new_status == 4:
-                #状态 4: 已收货 (订单完成) -> 返还卖家30信用分
-                seller.credit += 30
+        #B. 新添加的信用分逻辑：直接在 SQL 里加减，不读出来再写回，并发时不会丢失修改
+        credit_change = 0
+        if new_status == 2:
+            #状态 2: 已支付 (等待发货) -> 扣减卖家30信用分
+            #状态 3: 已发货 (等待交付) -> 扣减卖家30信用分
+            credit_change = -30
+        elif new_status == 4:
+            #状态 4: 已收货 (订单完成) -> 返还卖家30信用分
+            credit_change = 30
+        touched_books = []
+        if credit_change:
+            db.session.execute(
+                db.update(User)
+                .where(User.id == order.seller_id)
+                .values(credit=User.credit + credit_change)
+            )
+            touched_books = touch_seller_books(order.seller_id)  #书籍响应里带卖家信用分，ETag 要跟着变
         
         #C. 提交数据库
         db.session.commit() #commit会同时保存 order 和 seller 的改动
+        if credit_change:
+            invalidate_user(order.seller_id)  #信用分变了，登录缓存失效
+            response_cache.invalidate_books(touched_books)
         
         return jsonify({
             'code': 200,
@@ -183,4 +376,4 @@ def update_order_status(current_user, order_id):
         }), 200
     except Exception as e:
         db.session.rollback()
-        return jsonify({'code': 500, 'msg': f'更新失败：{str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'code': 500, 'msg': f'更新失败：{str(e)}'}), 500
@@ -3,13 +3,17 @@ from app.models.user import User
 from app import db
 #from app.utils.auth import generate_token #导入jwt生成工具
 from app.utils.auth import set_login_session
-from werkzeug.security import generate_password_hash, check_password_hash 
-from app.utils.auth import login_required
+from app.utils.auth import login_required, invalidate_user
+from app.utils.passwords import HashingBusy
+from app.utils.ratelimit import rate_limited
+from app.utils.http_cache import touch_seller_books
+from app.utils.cache import response_cache
 #创建用户路由的蓝图 /user
 user_bp = Blueprint('user', __name__, url_prefix='/user')
 
 #1. 用户注册接口
 @user_bp.route('/register', methods=['POST'])
+@rate_limited('RATELIMIT_REGISTER_IP')  #限流在哈希之前，被拒绝的请求不消耗 CPU
 def register():
     data = request.get_json()
     #校验必填参数
@@ -32,7 +36,10 @@ def register():
         major=data.get('major', ''),    #可为空
         grade=data.get('grade', ''),   #可为空
     )
-    new_user.set_password(data['password'])    #加密密码
+    try:
+        new_user.set_password(data['password'])    #加密密码
+    except HashingBusy:
+        return jsonify({'code': 503, 'msg': '服务繁忙，请稍后再试'}), 503
 
     db.session.add(new_user)
     try:
@@ -54,6 +61,7 @@ def register():
 #2. 用户登录接口 -- 生成jwt令牌 
 #登录路由
 @user_bp.route('/login', methods=['POST'])
+@rate_limited('RATELIMIT_LOGIN_IP', 'RATELIMIT_LOGIN_PHONE')  #按 IP 和手机号限流，在查库和哈希之前
 def login():
     data = request.get_json()
     phone = data.get('phone')
@@ -61,8 +69,15 @@ def login():
     
     # 查询用户
     user = User.query.filter_by(phone=phone).first()
-    if not user or not check_password_hash(user.password_hash, password):
-        return jsonify({'code': 400, 'msg': '手机号或密码错误'}), 400
+    try:
+        if not user or not user.check_password(password):
+            return jsonify({'code': 400, 'msg': '手机号或密码错误'}), 400
+    except HashingBusy:
+        return jsonify({'code': 503, 'msg': '服务繁忙，请稍后再试'}), 503
+    if db.session.is_modified(user):
+        #哈希参数已调整，check_password 按新参数重新生成了哈希，写回数据库
+        db.session.commit()
+        invalidate_user(user.id)
     
     # 登录成功：将用户ID存入session（替代JWT）
     set_login_session(user.id)
@@ -103,11 +118,13 @@ def update_user_info(current_user):
     
     #1. 检查用户名（如果要改用户名）
     new_username = data.get('username')
+    touched_books = []
     if new_username and new_username != current_user.username:
         # 检查用户名是否已存在
         if User.query.filter_by(username=new_username).first():
             return jsonify({'code': 400, 'msg': '用户名已存在'}), 400
         current_user.username = new_username
+        touched_books = touch_seller_books(current_user.id)  #书籍详情/列表里带卖家名，ETag 要跟着变
 
     #2. 更新其他可选字段（以防万一）
     if 'major' in data:
@@ -119,6 +136,9 @@ def update_user_info(current_user):
     #3. 提交数据库
     try:
         db.session.commit()
+        invalidate_user(current_user.id)  #让登录缓存里的旧信息失效
+        if touched_books:
+            response_cache.invalidate_books(touched_books)
         return jsonify({
             'code': 200,
             'msg': '用户信息更新成功',
@@ -54,9 +54,48 @@ def token_required(f):
         return f(current_user, *args, **kwargs)
     return decorated'''
 #app/utils/auth.py（全新内容）
-from flask import session, jsonify, request
+import threading
+import time
+from flask import session, jsonify, request, current_app
 from functools import wraps
+from sqlalchemy.orm import make_transient_to_detached
 from app.models.user import User
+from app import db
+
+#已登录用户的进程内缓存：user_id -> (过期时间, 字段值)
+#每个请求不再 SELECT users，而是用缓存的字段值 merge 出一个挂在当前 session 上的 User 对象，
+#接口里照常修改、commit 都没问题。用户信息/信用分变更后调用 invalidate_user() 立即失效；
+#多进程部署时其他进程最多在 USER_CACHE_TTL 秒后刷新。
+_user_cache = {}
+_user_cache_lock = threading.Lock()
+
+
+def _load_user(user_id):
+    ttl = current_app.config.get('USER_CACHE_TTL', 0)
+    if not ttl:
+        return User.query.get(user_id)
+
+    with _user_cache_lock:
+        item = _user_cache.get(user_id)
+    if item and item[0] > time.monotonic():
+        #按缓存的字段值构造一个“已持久化”的对象，merge(load=False) 挂到当前 session 上，不查数据库
+        user = User(**item[1])
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = User.query.get(user_id)
+    if user:
+        values = {c.key: getattr(user, c.key) for c in User.__table__.columns}
+        with _user_cache_lock:
+            _user_cache[user_id] = (time.monotonic() + ttl, values)
+    return user
+
+
+def invalidate_user(user_id):
+    #用户信息或信用分修改提交后调用
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
 
 #登录成功后，将用户ID存入session
 def set_login_session(user_id):
@@ -71,8 +110,8 @@ def login_required(f):
         if not user_id:
             return jsonify({'code': 401, 'msg': '请先登录'}), 401
         
-        #检查用户是否存在
-        current_user = User.query.get(user_id)
+        #检查用户是否存在（优先取进程内缓存）
+        current_user = _load_user(user_id)
         if not current_user:
             return jsonify({'code': 401, 'msg': '用户不存在'}), 401
         
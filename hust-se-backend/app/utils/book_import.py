@@ -0,0 +1,206 @@
+#app/utils/book_import.py：书籍字段校验 + 批量导入
+#批量导入（/book/import）面向期末集中卖书的场景，一次上传一个 CSV 或 NDJSON 文件（可附带图片 zip 包）：
+#1. 文件按行流式读取（multipart 上传的文件已经由 UploadRequest 落到磁盘临时文件，直接传请求体时读 request.stream），
+#   不会整份读进内存；
+#2. 每行用和 create_book 相同的规则校验（parse_book_fields），图片列写 zip 包里的文件名；
+#3. 每 IMPORT_BATCH_SIZE 行一个事务：批量 INSERT 书籍、批量写全文索引、提交，然后清空 session，
+#   内存占用和文件行数无关；
+#4. 结果以 NDJSON 流式返回，每行一条 {"row": 行号, "id": 书籍id} 或 {"row": 行号, "error": 原因}，最后一行是汇总。
+import csv
+import io
+import json
+import os
+import re
+import zipfile
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+from app import db
+from app.models.book import Book
+from app.utils import search as book_search
+from app.utils import images
+from app.utils import facets
+from app.utils.cache import response_cache
+from app.utils.http_cache import bump_list_version
+from app.utils.storage import save_upload, discard_uploads
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+#文本字段长度上限，与 Book 表的列定义一致
+FIELD_LIMITS = {'title': 100, 'author': 100, 'course_tag': 50, 'grade_tag': 20, 'condition': 50}
+IMPORT_FORMATS = {
+    '.csv': 'csv', 'text/csv': 'csv',
+    '.ndjson': 'ndjson', '.jsonl': 'ndjson', 'application/x-ndjson': 'ndjson', 'application/jsonl': 'ndjson'
+}
+
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def parse_book_fields(form):
+    '''校验发布书籍的文本字段（create_book 和批量导入共用），返回 (字段字典, 错误信息)'''
+    #只有 None（没填）才当作缺少；NDJSON 里的 0（如 "price": 0）是合法的值
+    values = {key: '' if form.get(key) is None else str(form.get(key)).strip()
+              for key in ('title', 'author', 'course_tag', 'grade_tag', 'condition', 'price', 'description')}
+    if not all([values['title'], values['course_tag'], values['condition'], values['price']]):
+        return None, '缺少必要的文本参数(title, course_tag, condition, price)'
+    for key, limit in FIELD_LIMITS.items():
+        if len(values[key]) > limit:
+            return None, f'{key} 不能超过{limit}个字符'
+    try:
+        values['price'] = float(values['price'])
+    except ValueError:
+        return None, '价格必须是数字'
+    if not 0 <= values['price'] < 1e6:
+        return None, '价格超出范围'
+    values['grade_tag'] = values['grade_tag'] or None
+    return values, None
+
+
+def detect_format(filename, mimetype, requested=None):
+    #优先用 ?format= 参数，其次看文件扩展名，最后看 Content-Type；识别不了返回 None
+    if requested in ('csv', 'ndjson'):
+        return requested
+    _, extension = os.path.splitext(filename or '')
+    return IMPORT_FORMATS.get(extension.lower()) or IMPORT_FORMATS.get(mimetype)
+
+
+def read_rows(stream, fmt):
+    '''逐行读取导入文件，产出 (行号, 字段字典 或 None, 错误信息)'''
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        #行号从 2 开始，对应表格软件里看到的行（第 1 行是表头）
+        for number, row in enumerate(csv.DictReader(text), start=2):
+            yield number, row, None
+        return
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, '不是合法的 JSON'
+            continue
+        if not isinstance(row, dict):
+            yield number, None, '每行必须是一个 JSON 对象'
+            continue
+        yield number, row, None
+
+
+def _image_names(value):
+    #CSV 里多个图片文件名用 ; 或 | 分隔，NDJSON 里也可以直接写数组
+    if isinstance(value, list):
+        return [str(name).strip() for name in value if str(name).strip()]
+    return [name.strip() for name in re.split(r'[;|]', str(value or '')) if name.strip()]
+
+
+def _save_row_images(names, archive, members, created):
+    '''把一行引用的图片从 zip 包里取出保存，返回 (URL 列表, 错误信息)；新写入的文件路径追加到 created'''
+    if not names:
+        return [], None
+    config = current_app.config
+    if archive is None:
+        return None, '填写了图片但没有上传图片压缩包(images_zip)'
+    if len(names) > config['MAX_IMAGES_PER_BOOK']:
+        return None, f"最多{config['MAX_IMAGES_PER_BOOK']}张图片"
+    infos = []
+    for name in names:
+        info = members.get(name) or members.get(os.path.basename(name))
+        if info is None:
+            return None, f'压缩包里没有图片 {name}'
+        if not allowed_file(info.filename):
+            return None, f'不支持的图片格式 {name}'
+        if info.file_size > config['MAX_IMAGE_SIZE']:
+            return None, f'图片 {name} 超过大小限制'
+        infos.append(info)
+    urls, row_created = [], []
+    try:
+        #一行的图片放在一个保存点里，中途失败时这一行已经加上的引用计数一起回滚，已经写入的文件也删掉
+        with db.session.begin_nested():
+            for info in infos:
+                with archive.open(info) as member:
+                    urls.append(save_upload(FileStorage(stream=member, filename=os.path.basename(info.filename)),
+                                            row_created))
+    except (zipfile.BadZipFile, OSError) as e:
+        discard_uploads(row_created)
+        return None, f'图片读取失败:{str(e)}'
+    created.extend(row_created)
+    return urls, None
+
+
+def _commit_batch(batch, created):
+    '''写入一批书籍（同一事务），返回每行的结果；失败时删掉这一批新写入的图片文件（created）'''
+    books = [book for _, book, _ in batch]
+    try:
+        db.session.add_all(books)
+        db.session.flush()   #批量 INSERT，拿到 id
+        book_ids = [book.id for book in books]
+        book_search.index_books(books)
+        facets.add_books(books)
+        bump_list_version()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        discard_uploads(created)
+        current_app.logger.error(f'批量导入写入失败: {str(e)}')
+        return [{'row': number, 'error': f'写入失败:{str(e)}'} for number, _, _ in batch]
+    finally:
+        db.session.expunge_all()   #不再持有这批对象，session 不随导入行数增长
+    response_cache.invalidate_books()   #新书没有详情缓存，只需要让列表失效
+    for book_id, (_, _, urls) in zip(book_ids, batch):
+        for url in urls:
+            images.submit(book_id, url)
+    return [{'row': number, 'id': book_id} for book_id, (number, _, _) in zip(book_ids, batch)]
+
+
+def import_rows(rows, archive, seller_id):
+    '''批量导入的主流程（生成器），每处理完一批产出这一批的 NDJSON 结果'''
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    members = {}
+    if archive is not None:
+        for info in archive.infolist():
+            if not info.is_dir():
+                members.setdefault(info.filename, info)
+                members.setdefault(os.path.basename(info.filename), info)
+    summary = {'rows': 0, 'created': 0, 'failed': 0}
+    batch, failed, created = [], [], []   #created：这一批新写入、还没提交的图片文件
+
+    def emit(results):
+        results.sort(key=lambda result: result['row'])
+        for result in results:
+            summary['created' if 'id' in result else 'failed'] += 1
+        return ''.join(json.dumps(result, ensure_ascii=False) + '\n' for result in results)
+
+    try:
+        for number, row, error in rows:
+            summary['rows'] += 1
+            values = None
+            if error is None:
+                values, error = parse_book_fields(row)
+            if error is None:
+                urls, error = _save_row_images(_image_names(row.get('images')), archive, members, created)
+            if error is not None:
+                failed.append({'row': number, 'error': error})
+            else:
+                book = Book(**values, images=','.join(urls), seller_id=seller_id, status=1)
+                batch.append((number, book, urls))
+            if len(batch) >= batch_size:
+                results = failed + _commit_batch(batch, created)
+                batch, failed, created = [], [], []
+                yield emit(results)
+            elif len(failed) >= batch_size:
+                yield emit(failed)
+                failed = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        #文件本身读不下去了（编码错误、CSV 格式损坏），已经读到的行照常提交
+        summary['rows'] += 1
+        failed.append({'row': summary['rows'], 'error': f'文件解析失败:{str(e)}'})
+    except BaseException:
+        #客户端中途断开（GeneratorExit）等：这一批不会再提交，回滚并删掉这一批新写入的图片
+        db.session.rollback()
+        discard_uploads(created)
+        raise
+    if batch:
+        failed += _commit_batch(batch, created)
+    yield emit(failed)
+    yield json.dumps({'summary': summary}, ensure_ascii=False) + '\n'
@@ -0,0 +1,175 @@
+#app/utils/cache.py：公开书籍接口（/book/list、/book/<id>）的响应缓存
+#默认使用进程内 LRU + TTL 缓存；配置 RESPONSE_CACHE_REDIS_URL 后改用 Redis（多个 worker 共享，失效也能同步）。
+#失效方式：缓存 key 里带“版本号”，列表接口用全局的 list 版本，详情接口用每本书自己的版本。
+#发布书籍 / 书籍售出等改动提交后调用 invalidate_books()，把相关版本号 +1，旧 key 自然不再命中。
+#版本号在查数据库之前读取，所以即使写操作恰好发生在查询过程中，旧数据也只会存到旧版本的 key 下。
+#和条件 GET 一起用时（@conditional 在外层），key 里还带上它从数据库读出的版本（g.resource_version），
+#缓存内容和 ETag 对应同一个版本；这样即使进程内缓存没收到别的 worker 的失效，也不会返回旧内容。
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, current_app, Response, g
+from app.utils.http_cache import version_key
+
+
+class MemoryBackend:
+    #进程内 LRU + TTL 缓存（多进程部署时每个进程各有一份）
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()   #key -> (过期时间, 内容)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)  #最近使用的挪到末尾
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)  #淘汰最久未使用的
+
+    def get_version(self, name):
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def bump_version(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._versions.clear()
+
+    def size(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    #Redis 后端（兼容本地 redis-server / KeyDB 等），LRU 淘汰交给 Redis 的 maxmemory-policy
+    def __init__(self, url, prefix='hustse:cache:'):
+        import redis  # 可选依赖，只有配置了 Redis 才需要安装
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self._redis.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self._redis.set(self.prefix + key, value, ex=ttl)
+
+    def get_version(self, name):
+        value = self._redis.get(self.prefix + 'version:' + name)
+        return int(value) if value else 0
+
+    def bump_version(self, name):
+        self._redis.incr(self.prefix + 'version:' + name)
+
+    def clear(self):
+        for key in self._redis.scan_iter(self.prefix + '*'):
+            self._redis.delete(key)
+
+    def size(self):
+        return sum(1 for _ in self._redis.scan_iter(self.prefix + 'resp:*'))
+
+
+class ResponseCache:
+    def __init__(self, app=None):
+        self.backend = None
+        self.enabled = False
+        self.ttl = 30
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_ENABLED', True)
+        app.config.setdefault('RESPONSE_CACHE_TTL', 30)
+        app.config.setdefault('RESPONSE_CACHE_MAX_ENTRIES', 1024)
+        app.config.setdefault('RESPONSE_CACHE_REDIS_URL', None)
+
+        self.enabled = app.config['RESPONSE_CACHE_ENABLED']
+        self.ttl = app.config['RESPONSE_CACHE_TTL']
+        if app.config['RESPONSE_CACHE_REDIS_URL']:
+            self.backend = RedisBackend(app.config['RESPONSE_CACHE_REDIS_URL'])
+        else:
+            self.backend = MemoryBackend(app.config['RESPONSE_CACHE_MAX_ENTRIES'])
+        app.extensions['response_cache'] = self
+
+    def _count(self, field):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _make_key(self, endpoint, version_name):
+        #规范化查询参数：去掉空值、按参数名排序，保证同样的查询命中同一个 key；
+        #路径参数（如 /book/<book_id>/recommendations 的 book_id）也要算进 key，否则不同的书会共用一份缓存
+        params = sorted((k, v) for k, v in request.args.items(multi=True) if v != '' or k == 'cursor')
+        path = ','.join(f'{k}={v}' for k, v in sorted((request.view_args or {}).items()))
+        version = self.backend.get_version(version_name)
+        resource_version = g.get('resource_version')
+        if resource_version is not None:
+            version = f'{version}.{version_key(resource_version)}'
+        return f'resp:{endpoint}:{path}:{version_name}@{version}?{urlencode(params)}'
+
+    def cached(self, version_name):
+        '''视图装饰器。version_name 为版本号名称，可以是字符串，也可以是根据路由参数返回名称的函数，
+        例如 lambda book_id: f'book:{book_id}'。只缓存 HTTP 200 的响应'''
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+                name = version_name(**kwargs) if callable(version_name) else version_name
+                key = self._make_key(request.endpoint, name)
+
+                body = self.backend.get(key)
+                if body is not None:
+                    self._count('hits')
+                    return Response(body, status=200, mimetype='application/json')
+
+                self._count('misses')
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code == 200:
+                    self.backend.set(key, response.get_data(), self.ttl)
+                return response
+            return decorated
+        return decorator
+
+    def invalidate_books(self, book_ids=()):
+        #书籍新增/状态变化后调用：列表整体失效，对应书籍的详情失效
+        if self.backend is None:
+            return
+        self.backend.bump_version('list')
+        for book_id in book_ids:
+            self.backend.bump_version(f'book:{book_id}')
+        self._count('invalidations')
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'entries': self.backend.size() if self.backend else 0
+        }
+
+
+#全局缓存对象，在 create_app 中 init_app
+response_cache = ResponseCache()
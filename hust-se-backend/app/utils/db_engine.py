@@ -0,0 +1,41 @@
+#app/utils/db_engine.py：数据库引擎初始化
+#SQLite 的 PRAGMA 是连接级别的设置，需要在每个新连接建立时执行一遍（配置见 Config.SQLITE_PRAGMAS）
+#pysqlite 只在 INSERT/UPDATE/DELETE 之前自动 BEGIN，SAVEPOINT 之前不会：事务里第一条写操作是
+#begin_nested() 的 SAVEPOINT 时，RELEASE 就直接提交了，外层事务回滚也撤销不了，所以这种情况下先补一条 BEGIN。
+#（不改成每个事务都显式 BEGIN：那样读操作也会开始事务，WAL 快照从请求里第一条 SELECT 就固定下来，
+# 之后别的请求先提交了写入，这个请求再写就会直接 SQLITE_BUSY）
+from sqlalchemy import event
+
+
+def init_app(app, db):
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'savepoint')
+    def begin_before_savepoint(conn, name):
+        if not conn.connection.dbapi_connection.in_transaction:
+            conn.exec_driver_sql('BEGIN')
+
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+
+def dispose_engine(app, db, close=True):
+    #丢弃连接池里的所有连接，下次使用时重新建立。
+    #prefork 部署（gunicorn preload_app）时 create_app 本身不访问数据库，父进程的连接池通常是空的，
+    #但只要预加载期间有代码连过数据库（wsgi.py 里的初始化、扩展的 init_app 等），连接就会留在池里，
+    #fork 出来的 worker 继承这些连接，多个进程共用同一个 socket / 文件句柄会互相串数据。
+    #池是空的时候丢弃几乎没有开销，所以 worker 启动后总是用 close=False 丢弃一遍
+    #（不能真的关闭，那会关掉父进程和其他 worker 还在用的连接）；worker 退出时用 close=True 正常关闭连接。
+    with app.app_context():
+        db.engine.dispose(close=close)
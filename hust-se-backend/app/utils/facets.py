@@ -0,0 +1,227 @@
+#app/utils/facets.py：书籍列表的分面计数（每个课程/年级/价格区间各有多少本在售书籍）
+#计数存在 book_facet_counts 表里，按 (课程, 年级, 价格区间) 组合各一行，增量维护：
+#  发布书籍、批量导入 -> add_books()；书籍售出 -> remove_books()，都和业务改动在同一事务里提交。
+#查询时把这张小表整个读出来在内存里汇总（行数 = 课程数 × 年级数 × 价格区间数，和书籍数量无关）。
+#每个分面的计数只应用“其他”筛选条件，例如已经选了课程“高等数学”，课程分面仍然列出其他课程各有多少本，方便切换。
+#价格筛选和分桶边界对不上时，整个落在区间里的桶用汇总表，只有边缘被切开的一两个桶用价格索引实时统计这一段价格。
+#有搜索词时汇总表回答不了：先取出匹配的在售书籍 id（最多 FACETS_SEARCH_MAX_MATCHES 本），再按这些 id 做 GROUP BY；
+#匹配的书超过上限时不统计（facets 为 null），避免宽泛的搜索词每次都对大量书籍做三次 GROUP BY。
+#计数出现偏差（例如直接改了数据库）时用 flask facets-rebuild 从 books 表重新统计。
+from collections import Counter
+from flask import current_app
+from sqlalchemy import bindparam, case, inspect
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+#价格区间的下边界（元），最后一个区间没有上限
+PRICE_BUCKETS = (0, 10, 20, 30, 50, 100)
+
+
+def price_bucket(price):
+    bucket = 0
+    for i, lower in enumerate(PRICE_BUCKETS):
+        if price is not None and price >= lower:
+            bucket = i
+    return bucket
+
+
+def _bucket_case(column):
+    return case(*[(column < upper, i) for i, upper in enumerate(PRICE_BUCKETS[1:])], else_=len(PRICE_BUCKETS) - 1)
+
+
+def _key(book):
+    return (book.course_tag, book.grade_tag or '', price_bucket(book.price))
+
+
+def _apply(key, delta):
+    from app.models.facet import BookFacetCount
+    course_tag, grade_tag, bucket = key
+    increment = db.update(BookFacetCount).where(
+        BookFacetCount.course_tag == course_tag,
+        BookFacetCount.grade_tag == grade_tag,
+        BookFacetCount.price_bucket == bucket
+    ).values(count=BookFacetCount.count + delta)
+    if db.session.execute(increment).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(BookFacetCount(course_tag=course_tag, grade_tag=grade_tag, price_bucket=bucket, count=delta))
+    except IntegrityError:
+        #另一个请求刚好先插入了这一行
+        db.session.execute(increment)
+
+
+def _adjust(books, sign):
+    from app.models.facet import BookFacetCount
+    deltas = Counter(_key(book) for book in books)
+    if not deltas:
+        return
+    #一批书涉及的组合可能有上百个：先查出已经有计数行的组合，用一条 executemany UPDATE 一起调整，
+    #其余（第一次出现的组合）再逐个插入。都按主键顺序更新，多个事务同时调整时加锁顺序一致，不会互相死锁
+    table = BookFacetCount.__table__
+    existing = set(map(tuple, db.session.execute(
+        db.select(table.c.course_tag, table.c.grade_tag, table.c.price_bucket)
+        .where(table.c.course_tag.in_({course_tag for course_tag, _, _ in deltas}))
+    )))
+    params = [
+        {'key_course_tag': course_tag, 'key_grade_tag': grade_tag, 'key_bucket': bucket,
+         'delta': sign * deltas[(course_tag, grade_tag, bucket)]}
+        for course_tag, grade_tag, bucket in sorted(deltas) if (course_tag, grade_tag, bucket) in existing
+    ]
+    if params:
+        db.session.execute(
+            table.update()
+            .where(table.c.course_tag == bindparam('key_course_tag'), table.c.grade_tag == bindparam('key_grade_tag'),
+                   table.c.price_bucket == bindparam('key_bucket'))
+            .values(count=table.c.count + bindparam('delta')),
+            params
+        )
+    for key in sorted(deltas):
+        if key not in existing:
+            _apply(key, sign * deltas[key])
+
+
+def add_books(books):
+    '''书籍上架（在售数量 +1），在当前事务里执行，调用方负责 commit'''
+    _adjust(books, 1)
+
+
+def remove_books(books):
+    '''书籍下架/售出（在售数量 -1），在当前事务里执行，调用方负责 commit'''
+    _adjust(books, -1)
+
+
+def rebuild_facets():
+    '''修复用：按 books 表重新统计全部计数，返回在售书籍数'''
+    from app.models.book import Book
+    from app.models.facet import BookFacetCount
+    bucket = _bucket_case(Book.price)
+    rows = db.session.query(
+        Book.course_tag, db.func.coalesce(Book.grade_tag, ''), bucket, db.func.count()
+    ).filter(Book.status == 1).group_by(Book.course_tag, db.func.coalesce(Book.grade_tag, ''), bucket).all()
+    db.session.execute(db.delete(BookFacetCount))
+    if rows:
+        db.session.execute(BookFacetCount.__table__.insert(), [
+            {'course_tag': course_tag, 'grade_tag': grade_tag, 'price_bucket': b, 'count': count}
+            for course_tag, grade_tag, b, count in rows
+        ])
+    db.session.commit()
+    return sum(row[3] for row in rows)
+
+
+def init_facets():
+    #计数表是空的但已经有在售书籍（刚上线这个功能）时，先统计一遍
+    from app.models.book import Book
+    from app.models.facet import BookFacetCount
+    inspector = inspect(db.engine)
+    if not inspector.has_table('book_facet_counts') or not inspector.has_table('books'):
+        return
+    if BookFacetCount.query.first() is None and Book.query.filter(Book.status == 1).first() is not None:
+        rebuild_facets()
+
+
+def _split_price_range(min_price, max_price):
+    #把价格筛选（min_price <= price <= max_price）拆成两部分：
+    #整个桶都在区间里的桶下标（直接用汇总表），以及被区间切开的桶里落在区间内的价格段 [(下限, 上限（不含）)]，
+    #后者最多两段（区间两端各一段），用价格索引实时统计
+    full, edges = set(), []
+    for i, lower in enumerate(PRICE_BUCKETS):
+        upper = PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None
+        low = lower if min_price is None else max(lower, min_price)
+        if (max_price is not None and max_price < low) or (upper is not None and low >= upper):
+            continue   #和筛选区间没有交集
+        if low == lower and (max_price is None or upper is not None and upper <= max_price):
+            full.add(i)   #桶内价格都 < upper <= max_price
+        else:
+            edges.append((low, upper))
+    return full, edges
+
+
+def _format(course_counts, grade_counts, price_counts):
+    def ranked(counter):
+        return [{'value': value, 'count': count}
+                for value, count in sorted(counter.items(), key=lambda item: (-item[1], item[0] or ''))
+                if count > 0 and value]
+    return {
+        'course_tag': ranked(course_counts),
+        'grade_tag': ranked(grade_counts),
+        'price': [
+            {'min': lower, 'max': PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None,
+             'count': max(price_counts.get(i, 0), 0)}
+            for i, lower in enumerate(PRICE_BUCKETS)
+        ]
+    }
+
+
+def facet_counts(course_tag=None, grade_tag=None, min_price=None, max_price=None, search=None):
+    '''当前筛选条件下各分面的在售书籍数量；有搜索词且匹配的书太多时返回 None'''
+    from app.models.book import Book
+    from app.models.facet import BookFacetCount
+    if search:
+        return _search_facet_counts(course_tag, grade_tag, min_price, max_price, search)
+
+    full, edges = _split_price_range(min_price, max_price)
+    course_counts, grade_counts, price_counts = Counter(), Counter(), Counter()
+    rows = db.session.query(
+        BookFacetCount.course_tag, BookFacetCount.grade_tag, BookFacetCount.price_bucket, BookFacetCount.count
+    ).filter(BookFacetCount.count > 0)
+    for row_course, row_grade, row_bucket, count in rows:
+        course_ok = not course_tag or row_course == course_tag
+        grade_ok = not grade_tag or row_grade == grade_tag
+        price_ok = row_bucket in full
+        if grade_ok and price_ok:
+            course_counts[row_course] += count
+        if course_ok and price_ok:
+            grade_counts[row_grade] += count
+        if course_ok and grade_ok:
+            price_counts[row_bucket] += count   #价格分面本身不应用价格筛选，始终是整桶
+    if edges:
+        #被切开的桶：按价格索引只扫这一两段价格的在售书籍
+        in_edges = db.or_(*[db.and_(Book.price >= low, Book.price < upper) if upper is not None else Book.price >= low
+                            for low, upper in edges])
+        if max_price is not None:
+            in_edges = db.and_(in_edges, Book.price <= max_price)
+        grade = db.func.coalesce(Book.grade_tag, '')
+        edge_rows = db.session.query(Book.course_tag, grade, db.func.count()) \
+            .filter(Book.status == 1, in_edges).group_by(Book.course_tag, grade)
+        for row_course, row_grade, count in edge_rows:
+            if not grade_tag or row_grade == grade_tag:
+                course_counts[row_course] += count
+            if not course_tag or row_course == course_tag:
+                grade_counts[row_grade] += count
+    return _format(course_counts, grade_counts, price_counts)
+
+
+def _search_facet_counts(course_tag, grade_tag, min_price, max_price, search):
+    #先取出匹配搜索词的在售书籍 id，超过上限就不统计；否则按 id 做三次 GROUP BY（每次去掉该分面自身的筛选条件）
+    from app.models.book import Book
+    from app.utils import search as book_search
+    limit = current_app.config['FACETS_SEARCH_MAX_MATCHES']
+    matched = book_search.search_subquery(search)
+    if matched is not None:
+        #索引里只有在售书籍，直接从索引取 id，不去逐本检查 books
+        stmt = db.select(matched.c.book_id)
+    else:
+        stmt = db.select(Book.id).where(Book.status == 1, book_search.like_filter(search))
+    book_ids = db.session.execute(stmt.limit(limit + 1)).scalars().all()
+    if len(book_ids) > limit:
+        return None
+
+    def base(skip):
+        query = db.session.query().select_from(Book).filter(Book.id.in_(book_ids), Book.status == 1)
+        if course_tag and skip != 'course_tag':
+            query = query.filter(Book.course_tag == course_tag)
+        if grade_tag and skip != 'grade_tag':
+            query = query.filter(Book.grade_tag == grade_tag)
+        if skip != 'price':
+            if min_price is not None:
+                query = query.filter(Book.price >= min_price)
+            if max_price is not None:
+                query = query.filter(Book.price <= max_price)
+        return query
+
+    bucket = _bucket_case(Book.price)
+    course_counts = Counter(dict(base('course_tag').add_columns(Book.course_tag, db.func.count()).group_by(Book.course_tag)))
+    grade_counts = Counter(dict(base('grade_tag').add_columns(Book.grade_tag, db.func.count()).group_by(Book.grade_tag)))
+    price_counts = Counter(dict(base('price').add_columns(bucket, db.func.count()).group_by(bucket)))
+    return _format(course_counts, grade_counts, price_counts)
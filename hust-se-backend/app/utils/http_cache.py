@@ -0,0 +1,110 @@
+#app/utils/http_cache.py：书籍接口的条件 GET（ETag / Last-Modified）
+#先用一条很轻的 SQL 算出版本（详情：这本书的 updated_at；列表：cache_versions 表里 books 这一行的版本号，按主键取），
+#客户端带来的 If-None-Match / If-Modified-Since 对得上就直接返回 304，不再执行查询和序列化。
+#版本来自数据库而不是进程内计数器，所以多个 worker 给出的 ETag 是一致的。
+#列表不用 max(updated_at)：时间戳在事务里取、提交顺序却可能相反（或各台机器时钟不一致），
+#后提交的改动可能带着更早的时间，max 不变，客户端就拿到 304 和旧列表。
+#所以每次书籍的发布、修改、售出、重新上架都在同一事务里调用 bump_list_version() 把版本号 +1，
+#这条 UPDATE 持有行锁，版本号按提交顺序递增。列表只有版本号没有时间，不返回 Last-Modified。
+#算出的版本放在 g.resource_version 里，响应缓存（app/utils/cache.py）把它拼进缓存 key，
+#保证返回的内容和 ETag 来自同一个版本，不会把旧内容配上新 ETag。
+#书籍响应里带卖家的用户名和信用分，这两项变化时用 touch_seller_books() 刷新卖家所有书籍的 updated_at。
+import hashlib
+from datetime import datetime
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, current_app, g
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+#cache_versions 表里书籍列表那一行的名字
+LIST_VERSION_NAME = 'books'
+
+
+def _http_time(value):
+    #数据库里的时间是 UTC，Last-Modified 只精确到秒
+    return value.replace(microsecond=0) if value else None
+
+
+def version_key(version):
+    '''版本转成字符串（ETag 和响应缓存 key 用）'''
+    return version.isoformat() if isinstance(version, datetime) else str(version)
+
+
+def book_version(book_id):
+    from app.models.book import Book
+    return db.session.query(Book.updated_at).filter(Book.id == book_id).scalar()
+
+
+def list_version():
+    from app.models.cache_version import CacheVersion
+    version = db.session.query(CacheVersion.version).filter(CacheVersion.name == LIST_VERSION_NAME).scalar()
+    return version or 0
+
+
+def bump_list_version():
+    '''书籍列表的版本号 +1（在当前事务里，调用方负责 commit）'''
+    from app.models.cache_version import CacheVersion
+    increment = db.update(CacheVersion).where(CacheVersion.name == LIST_VERSION_NAME).values(
+        version=CacheVersion.version + 1
+    )
+    if db.session.execute(increment).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(CacheVersion(name=LIST_VERSION_NAME, version=1))
+    except IntegrityError:
+        #另一个请求刚好先插入了这一行
+        db.session.execute(increment)
+
+
+def touch_seller_books(seller_id):
+    '''卖家用户名/信用分变化时调用（在当前事务里，调用方负责 commit），返回受影响的书籍 id，
+    提交后交给 response_cache.invalidate_books()'''
+    from app.models.book import Book
+    book_ids = db.session.execute(db.select(Book.id).where(Book.seller_id == seller_id)).scalars().all()
+    if book_ids:
+        db.session.execute(
+            db.update(Book).where(Book.seller_id == seller_id).values(updated_at=datetime.utcnow())
+        )
+        bump_list_version()
+    return book_ids
+
+
+def conditional(version_fn):
+    '''视图装饰器：version_fn 接收路由参数，返回资源的版本：最后修改时间或版本号（None 表示不做条件 GET）。
+    ETag 由 接口 + 规范化后的查询参数 + 版本 计算得到；只有版本是时间时才带 Last-Modified'''
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            version = version_fn(**kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+            g.resource_version = version
+            updated_at = version if isinstance(version, datetime) else None
+
+            params = sorted((k, v) for k, v in request.args.items(multi=True) if v != '' or k == 'cursor')
+            raw = f'{request.endpoint}|{urlencode(params)}|{kwargs}|{version_key(version)}'
+            etag = hashlib.sha1(raw.encode()).hexdigest()
+            last_modified = _http_time(updated_at)
+
+            #If-None-Match 优先；没有时再看 If-Modified-Since。
+            #If-Modified-Since 只精确到秒，和未截断的 updated_at 比较，同一秒内的修改宁可多返回一次 200
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = since is not None and updated_at is not None and since.replace(tzinfo=None) >= updated_at
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'  #浏览器可以缓存，但每次都要带 ETag 回来校验
+            return response
+        return decorated
+    return decorator
@@ -0,0 +1,124 @@
+#app/utils/idgen.py：订单号生成器（Snowflake 风格）
+#64 位整数 = 41 位毫秒时间戳（从 2025-01-01 起，可用约 69 年）+ 10 位 worker id + 12 位序号，
+#同一毫秒内每个进程最多生成 4096 个，超出就等到下一毫秒；时钟回拨时沿用上一次的时间戳继续递增。
+#订单号是固定 19 位的十进制字符串，字符串顺序 = 数值顺序 = 生成时间顺序，可以直接拿来排序/分页。
+#worker id 由 机器号 + 本机进程槽位 组成：
+#  - 进程槽位：在 ORDER_ID_LOCK_DIR 下抢占一个文件锁槽位（同一台机器上的多个 gunicorn worker 各占一个，
+#    进程退出后自动释放，不需要额外协调），槽位用完时退回到进程号取模；
+#  - 单机部署不用配置，10 位全部用作进程槽位（最多 1024 个进程）；
+#  - 多台机器部署时给每台机器配置不同的 ORDER_ID_MACHINE_ID（0-15），worker id 的高 4 位为机器号、
+#    低 6 位为进程槽位（每台机器最多 64 个进程），同一台机器上 fork 出来的 worker 也不会重复。
+import os
+import tempfile
+import threading
+import time
+
+EPOCH_MS = 1735689600000   #2025-01-01 00:00:00 UTC
+WORKER_BITS = 10
+MACHINE_BITS = 4   #配置了机器号时，worker id 高位留给机器号，其余为进程槽位
+SLOT_BITS = WORKER_BITS - MACHINE_BITS
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_MACHINE_ID = (1 << MACHINE_BITS) - 1
+MAX_SLOT = (1 << SLOT_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+ORDER_NO_DIGITS = 19   #2^63 以内的数最多 19 位
+
+
+def _lock_worker_slot(lock_dir, max_slot):
+    #依次尝试给槽位文件加排它锁，拿到的第一个就是本进程的槽位；不支持 fcntl 的系统返回 None
+    try:
+        import fcntl
+    except ImportError:
+        return None, None
+    os.makedirs(lock_dir, exist_ok=True)
+    for slot in range(max_slot + 1):
+        handle = open(os.path.join(lock_dir, f'worker-{slot}.lock'), 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            continue
+        return slot, handle   #文件句柄要一直持有，关闭就等于释放槽位
+    return None, None
+
+
+class IdGenerator:
+    def __init__(self, machine_id=None, lock_dir=None):
+        machine_id = None if machine_id in (None, '') else int(machine_id)
+        if machine_id is not None and not 0 <= machine_id <= MAX_MACHINE_ID:
+            raise ValueError(f'ORDER_ID_MACHINE_ID 必须在 0-{MAX_MACHINE_ID} 之间')
+        self._machine_id = machine_id
+        self._lock_dir = lock_dir or os.path.join(tempfile.gettempdir(), 'hustse-order-id')
+        self._lock = threading.Lock()
+        self._pid = None
+        self._lock_handle = None
+        self.worker_id = None
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _ensure_worker(self):
+        #fork 出来的子进程会继承父进程的状态（包括槽位文件锁的句柄），发现进程号变了就重新分配 worker id
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._last_ms, self._sequence = -1, 0
+        max_slot = MAX_WORKER_ID if self._machine_id is None else MAX_SLOT
+        slot, self._lock_handle = _lock_worker_slot(self._lock_dir, max_slot)
+        if slot is None:
+            slot = os.getpid() & max_slot
+        self.worker_id = slot if self._machine_id is None else (self._machine_id << SLOT_BITS) | slot
+
+    def next_id(self):
+        with self._lock:
+            self._ensure_worker()
+            now = int(time.time() * 1000) - EPOCH_MS
+            if now < self._last_ms:
+                now = self._last_ms   #时钟回拨：不回退，继续用上次的时间戳
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    #本毫秒序号用完，借用下一毫秒
+                    now = self._last_ms + 1
+                    while int(time.time() * 1000) - EPOCH_MS < now:
+                        time.sleep(0.0001)
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (now << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_order_no(self):
+        return str(self.next_id()).zfill(ORDER_NO_DIGITS)
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def init_app(app):
+    global _generator
+    app.config.setdefault('ORDER_ID_MACHINE_ID', os.environ.get('ORDER_ID_MACHINE_ID'))
+    app.config.setdefault('ORDER_ID_LOCK_DIR', None)
+    with _generator_lock:
+        if _generator is None:
+            _generator = IdGenerator(app.config['ORDER_ID_MACHINE_ID'], app.config['ORDER_ID_LOCK_DIR'])
+
+
+def next_order_no():
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = IdGenerator()
+    return _generator.next_order_no()
+
+
+def parse_id(value):
+    #把订单号拆回 (生成时间毫秒时间戳, worker id, 序号)，排查问题时用；
+    #配置了机器号时 worker id >> SLOT_BITS 为机器号
+    value = int(value)
+    return (
+        (value >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS,
+        (value >> SEQUENCE_BITS) & MAX_WORKER_ID,
+        value & MAX_SEQUENCE
+    )
@@ -0,0 +1,210 @@
+#app/utils/images.py：书籍图片后台处理
+#发布书籍时请求里只保存原图，缩略图（列表卡片用）和中图（详情页用）交给后台线程池生成：
+#按 EXIF 方向摆正 -> 缩放 -> 重新编码为 WebP（不带 EXIF，顺便去掉手机照片里的定位等信息）。
+#渲染图和原图放在同一目录，文件名为 <原图名>_thumb.webp / <原图名>_medium.webp，
+#生成前 to_dict 返回原图地址；生成完成后更新书籍 updated_at 并让缓存失效，前端下次刷新即可拿到小图。
+#Pillow 是可选依赖，没有安装时不做处理，始终返回原图。
+#原图本身也会公开访问（image_list），保存前用 strip_metadata() 去掉 EXIF（定位、设备等）：
+#直接改文件里的元数据段，不解码像素、不重新编码，JPEG 只保留方向（Orientation），不依赖 Pillow。
+import os
+import struct
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+#渲染规格：名称 -> 最长边像素
+RENDITIONS = {'thumb': 320, 'medium': 960}
+UPLOAD_URL_PREFIX = '/static/uploads/'
+
+_executor = None
+_slots = None
+_ready = set()   #已确认生成好的渲染图路径（生成后不会再消失，可以放心缓存）
+
+
+def init_app(app):
+    global _executor, _slots
+    app.config.setdefault('IMAGE_WORKERS', 2)
+    app.config.setdefault('IMAGE_QUEUE_SIZE', 32)
+    app.config.setdefault('IMAGE_WEBP_QUALITY', 80)
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=app.config['IMAGE_WORKERS'], thread_name_prefix='image')
+        #排队 + 处理中的任务总数上限，满了就不再提交（对应书籍继续使用原图）
+        _slots = threading.BoundedSemaphore(app.config['IMAGE_WORKERS'] + app.config['IMAGE_QUEUE_SIZE'])
+
+
+def _url_to_path(url, upload_folder):
+    return os.path.join(upload_folder, url[len(UPLOAD_URL_PREFIX):])
+
+
+def _rendition_url(url, name):
+    stem, _ = os.path.splitext(url)
+    return f'{stem}_{name}.webp'
+
+
+def rendition_urls(image_url, upload_folder=None):
+    '''返回 {'thumb': url, 'medium': url}，渲染图还没生成好时回退为原图地址'''
+    if not image_url or not image_url.startswith(UPLOAD_URL_PREFIX):
+        return {name: image_url for name in RENDITIONS}
+    if upload_folder is None:
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+    urls = {}
+    for name in RENDITIONS:
+        url = _rendition_url(image_url, name)
+        path = _url_to_path(url, upload_folder)
+        if path not in _ready and os.path.exists(path):
+            _ready.add(path)
+        urls[name] = url if path in _ready else image_url
+    return urls
+
+
+_JPEG_STANDALONE = {0x01, *range(0xD0, 0xD8)}   #没有长度字段的 JPEG 标记
+_JPEG_METADATA = {0xE1, 0xED}   #APP1（EXIF / XMP）、APP13（IPTC）
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_METADATA = {b'eXIf', b'tEXt', b'zTXt', b'iTXt'}
+
+
+def _exif_orientation(segment):
+    #从 APP1 EXIF 段里读出 IFD0 的 Orientation（0x0112），没有或解析失败返回 None
+    payload = segment[4:]
+    if not payload.startswith(b'Exif\x00\x00'):
+        return None
+    tiff = payload[6:]
+    try:
+        order = {b'II': '<', b'MM': '>'}[tiff[:2]]
+        offset = struct.unpack(order + 'I', tiff[4:8])[0]
+        count = struct.unpack(order + 'H', tiff[offset:offset + 2])[0]
+        for i in range(count):
+            entry = tiff[offset + 2 + i * 12:offset + 14 + i * 12]
+            tag, kind = struct.unpack(order + 'HH', entry[:4])
+            if tag == 0x0112 and kind == 3:
+                return struct.unpack(order + 'H', entry[8:10])[0]
+    except (KeyError, struct.error):
+        return None
+    return None
+
+
+def _orientation_segment(orientation):
+    #只含 Orientation 一个标签的 EXIF 段，保证去掉元数据后手机竖拍的照片方向不变
+    tiff = b'MM\x00\x2a' + struct.pack('>I', 8) + struct.pack('>H', 1) \
+        + struct.pack('>HHIHH', 0x0112, 3, 1, orientation, 0) + struct.pack('>I', 0)
+    payload = b'Exif\x00\x00' + tiff
+    return b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+
+
+def _strip_jpeg(data):
+    kept, orientation, stripped, i = [data[:2]], None, False, 2
+    while i + 4 <= len(data) and data[i] == 0xFF:
+        marker = data[i + 1]
+        if marker == 0xFF:   #段之间的填充字节
+            i += 1
+            continue
+        if marker == 0xDA:   #扫描数据开始，之后都是像素数据
+            break
+        length = 0 if marker in _JPEG_STANDALONE else struct.unpack('>H', data[i + 2:i + 4])[0]
+        segment = data[i:i + 2 + length]
+        if marker in _JPEG_METADATA:
+            orientation = orientation or _exif_orientation(segment)
+            stripped = True
+        else:
+            kept.append(segment)
+        i += 2 + length
+    if not stripped:
+        return None   #没有元数据段，不用改
+    if orientation and orientation != 1:
+        #放在 SOI 之后（有 JFIF 的 APP0 段时放在它后面）
+        kept.insert(2 if len(kept) > 1 and kept[1][1] == 0xE0 else 1, _orientation_segment(orientation))
+    return b''.join(kept) + data[i:]
+
+
+def _strip_png(data):
+    chunks, i, stripped = [data[:8]], 8, False
+    while i + 12 <= len(data):
+        length = struct.unpack('>I', data[i:i + 4])[0]
+        chunk = data[i:i + 12 + length]
+        if data[i + 4:i + 8] in _PNG_METADATA:
+            stripped = True
+        else:
+            chunks.append(chunk)
+        i += 12 + length
+    return b''.join(chunks) + data[i:] if stripped else None
+
+
+def strip_metadata(path):
+    '''去掉 JPEG / PNG 文件里的 EXIF、XMP、IPTC 和文本元数据（原地改写），其他格式不处理'''
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(b'\xff\xd8'):
+        result = _strip_jpeg(data)
+    elif data.startswith(_PNG_SIGNATURE):
+        result = _strip_png(data)
+    else:
+        result = None
+    if result is not None:
+        with open(path, 'wb') as f:
+            f.write(result)
+
+
+def _render(source_path, quality):
+    stem, _ = os.path.splitext(source_path)
+    if all(os.path.exists(f'{stem}_{name}.webp') for name in RENDITIONS):
+        return  #同一张图片之前已经处理过（上传文件按内容去重）
+    with Image.open(source_path) as img:
+        img = ImageOps.exif_transpose(img)  #按 EXIF 方向摆正，之后 EXIF 不再写回
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        for name, size in RENDITIONS.items():
+            copy = img.copy()
+            copy.thumbnail((size, size))
+            target = f'{stem}_{name}.webp'
+            #写到同目录下的唯一临时文件，写完再改名，避免读到半个文件；
+            #同一张图片（内容去重后是同一个文件）可能同时被几个任务处理，临时文件不能共用
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    copy.save(out, 'WEBP', quality=quality, method=4)
+                os.replace(tmp, target)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+
+
+def _process(app, book_id, source_path):
+    try:
+        _render(source_path, app.config['IMAGE_WEBP_QUALITY'])
+        #渲染图生成后刷新书籍的 updated_at，让 ETag 和响应缓存失效
+        from app import db
+        from app.models.book import Book
+        from app.utils.cache import response_cache
+        from app.utils.http_cache import bump_list_version
+        with app.app_context():
+            db.session.execute(
+                db.update(Book).where(Book.id == book_id).values(updated_at=datetime.utcnow())
+            )
+            bump_list_version()
+            db.session.commit()
+            response_cache.invalidate_books([book_id])
+    except Exception as e:
+        app.logger.error(f'图片处理失败({source_path}): {str(e)}')
+    finally:
+        _slots.release()
+
+
+def submit(book_id, image_url):
+    '''把一本书的图片交给后台线程处理；返回是否成功提交'''
+    if Image is None or _executor is None or not image_url or not image_url.startswith(UPLOAD_URL_PREFIX):
+        return False
+    if not _slots.acquire(blocking=False):
+        current_app.logger.warning(f'图片处理队列已满，书籍 {book_id} 暂时使用原图')
+        return False
+    app = current_app._get_current_object()
+    source_path = _url_to_path(image_url, app.config['UPLOAD_FOLDER'])
+    _executor.submit(_process, app, book_id, source_path)
+    return True
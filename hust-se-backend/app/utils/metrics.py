@@ -0,0 +1,256 @@
+#app/utils/metrics.py：请求级性能埋点
+#1. 每个请求记录：耗时（按接口分桶的直方图）、执行的 SQL 条数和 SQL 总耗时（SQLAlchemy 引擎事件）。
+#2. 慢请求 / 慢 SQL 日志：超过 SLOW_REQUEST_MS 的请求把本次最慢的几条 SQL 一起打出来；
+#   单条 SQL 超过 SLOW_QUERY_MS 时立即记录语句和参数。
+#3. GET /metrics 输出 Prometheus 文本格式，直接给 Prometheus 抓取。
+#   数据在进程内累计，多 worker 部署时 Prometheus 需要分别抓取每个 worker（或在前面加聚合）。
+#4. 可选的采样分析器：PROFILE_SLOW_REQUESTS 打开后，后台线程每 PROFILE_INTERVAL_MS 毫秒采样一次正在处理请求的线程栈，
+#   请求耗时超过 PROFILE_THRESHOLD_MS 时把采样结果按 folded 格式（flamegraph.pl / speedscope 可直接读取）写到 PROFILE_DIR。
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+#耗时直方图的桶（秒），与 Prometheus 客户端默认桶一致
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+#慢请求日志里最多列出的 SQL 条数
+SLOW_LOG_MAX_STATEMENTS = 5
+
+
+class Registry:
+    #按 (接口, 方法, 状态码) 累计的指标
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.requests = Counter()                                   #(endpoint, method, status) -> 次数
+        self.latency = defaultdict(lambda: [0] * len(self.buckets))  #endpoint -> 各桶计数（非累积）
+        self.latency_sum = Counter()
+        self.latency_count = Counter()
+        self.sql_count = Counter()                                  #endpoint -> SQL 条数
+        self.sql_seconds = Counter()                                #endpoint -> SQL 耗时
+        self.slow_requests = Counter()
+        self.slow_queries = 0
+        self.in_flight = 0
+        #后台任务（订单定时任务等）：job -> 累计执行次数 / 处理行数 / 持有写锁的时间，以及最近一次的处理行数和最长单批锁时间
+        self.job_runs = Counter()
+        self.job_rows = Counter()
+        self.job_lock_seconds = Counter()
+        self.job_last_rows = {}
+        self.job_last_lock_max = {}
+
+    def observe(self, endpoint, method, status, seconds, sql_count, sql_seconds, slow):
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.latency[endpoint][i] += 1
+                    break
+            self.latency_sum[endpoint] += seconds
+            self.latency_count[endpoint] += 1
+            self.sql_count[endpoint] += sql_count
+            self.sql_seconds[endpoint] += sql_seconds
+            if slow:
+                self.slow_requests[endpoint] += 1
+
+    def observe_job(self, job, rows, lock_seconds):
+        '''记录后台任务的一次执行：处理的行数，以及每批事务持有写锁的时间（列表）'''
+        with self._lock:
+            self.job_runs[job] += 1
+            self.job_rows[job] += rows
+            self.job_lock_seconds[job] += sum(lock_seconds)
+            self.job_last_rows[job] = rows
+            self.job_last_lock_max[job] = max(lock_seconds, default=0.0)
+
+    def render(self):
+        #Prometheus text exposition format 0.0.4
+        lines = []
+        with self._lock:
+            lines += ['# HELP http_requests_total HTTP 请求数', '# TYPE http_requests_total counter']
+            for (endpoint, method, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {value}')
+
+            lines += ['# HELP http_request_duration_seconds 请求耗时', '# TYPE http_request_duration_seconds histogram']
+            for endpoint in sorted(self.latency_count):
+                cumulative = 0
+                for bound, count in zip(self.buckets, self.latency[endpoint]):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {self.latency_count[endpoint]}')
+                lines.append(f'http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {self.latency_sum[endpoint]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{endpoint="{endpoint}"}} {self.latency_count[endpoint]}')
+
+            lines += ['# HELP db_statements_total 请求中执行的 SQL 条数', '# TYPE db_statements_total counter']
+            for endpoint, value in sorted(self.sql_count.items()):
+                lines.append(f'db_statements_total{{endpoint="{endpoint}"}} {value}')
+            lines += ['# HELP db_statement_seconds_total 请求中 SQL 的总耗时', '# TYPE db_statement_seconds_total counter']
+            for endpoint, value in sorted(self.sql_seconds.items()):
+                lines.append(f'db_statement_seconds_total{{endpoint="{endpoint}"}} {value:.6f}')
+
+            lines += ['# HELP http_slow_requests_total 超过 SLOW_REQUEST_MS 的请求数', '# TYPE http_slow_requests_total counter']
+            for endpoint, value in sorted(self.slow_requests.items()):
+                lines.append(f'http_slow_requests_total{{endpoint="{endpoint}"}} {value}')
+            lines += ['# HELP db_slow_queries_total 超过 SLOW_QUERY_MS 的 SQL 条数', '# TYPE db_slow_queries_total counter',
+                      f'db_slow_queries_total {self.slow_queries}']
+            lines += ['# HELP http_requests_in_flight 正在处理的请求数', '# TYPE http_requests_in_flight gauge',
+                      f'http_requests_in_flight {self.in_flight}']
+
+            lines += ['# HELP job_runs_total 后台任务执行次数', '# TYPE job_runs_total counter']
+            lines += [f'job_runs_total{{job="{job}"}} {value}' for job, value in sorted(self.job_runs.items())]
+            lines += ['# HELP job_rows_total 后台任务处理的行数', '# TYPE job_rows_total counter']
+            lines += [f'job_rows_total{{job="{job}"}} {value}' for job, value in sorted(self.job_rows.items())]
+            lines += ['# HELP job_lock_seconds_total 后台任务持有写锁（写事务）的总时间', '# TYPE job_lock_seconds_total counter']
+            lines += [f'job_lock_seconds_total{{job="{job}"}} {value:.6f}' for job, value in sorted(self.job_lock_seconds.items())]
+            lines += ['# HELP job_last_rows 最近一次执行处理的行数', '# TYPE job_last_rows gauge']
+            lines += [f'job_last_rows{{job="{job}"}} {value}' for job, value in sorted(self.job_last_rows.items())]
+            lines += ['# HELP job_last_lock_max_seconds 最近一次执行中单批事务持有写锁的最长时间',
+                      '# TYPE job_last_lock_max_seconds gauge']
+            lines += [f'job_last_lock_max_seconds{{job="{job}"}} {value:.6f}'
+                      for job, value in sorted(self.job_last_lock_max.items())]
+        return '\n'.join(lines) + '\n'
+
+
+class SamplingProfiler:
+    #后台线程定期抓取“正在处理请求的线程”的调用栈，只在请求期间采样，空闲时几乎没有开销
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active = {}   #线程 id -> Counter(折叠后的调用栈 -> 采样次数)
+        self._thread = None
+
+    def start_request(self):
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+
+    def finish_request(self):
+        with self._lock:
+            return self._active.pop(threading.get_ident(), Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, samples in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_fold(frame)] += 1
+
+
+def _fold(frame):
+    #调用栈折叠成 "外层;...;内层" 一行
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+registry = Registry()
+_profiler = None
+
+
+def _before_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_sql_count = 0
+    g._metrics_sql_seconds = 0.0
+    g._metrics_statements = []
+    with registry._lock:
+        registry.in_flight += 1
+    if _profiler is not None:
+        _profiler.start_request()
+
+
+def _teardown_request(exc):
+    #teardown 在请求结束（包括抛异常）时一定会执行，in_flight 在这里减回去
+    if not hasattr(g, '_metrics_start'):
+        return
+    with registry._lock:
+        registry.in_flight -= 1
+    if _profiler is not None:
+        samples = _profiler.finish_request()
+        elapsed_ms = (time.perf_counter() - g._metrics_start) * 1000
+        if samples and elapsed_ms >= current_app.config['PROFILE_THRESHOLD_MS']:
+            _dump_profile(samples, elapsed_ms)
+
+
+def _after_request(response):
+    if not hasattr(g, '_metrics_start'):
+        return response
+    config = current_app.config
+    seconds = time.perf_counter() - g._metrics_start
+    endpoint = request.endpoint or 'unmatched'
+    slow = seconds * 1000 >= config['SLOW_REQUEST_MS']
+    registry.observe(endpoint, request.method, response.status_code, seconds,
+                     g._metrics_sql_count, g._metrics_sql_seconds, slow)
+    if slow:
+        statements = sorted(g._metrics_statements, reverse=True)[:SLOW_LOG_MAX_STATEMENTS]
+        detail = ''.join(f'\n  {cost * 1000:.1f}ms  {sql}' for cost, sql in statements)
+        current_app.logger.warning(
+            f'慢请求 {request.method} {request.full_path} -> {endpoint} 耗时 {seconds * 1000:.1f}ms，'
+            f'SQL {g._metrics_sql_count} 条共 {g._metrics_sql_seconds * 1000:.1f}ms{detail}'
+        )
+    return response
+
+
+def _dump_profile(samples, elapsed_ms):
+    directory = current_app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{request.endpoint or "unmatched"}-{int(elapsed_ms)}ms.folded'
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in samples.most_common():
+            f.write(f'{stack} {count}\n')
+    current_app.logger.warning(f'慢请求采样已保存：{path}')
+
+
+def _register_sql_events(engine, app):
+    slow_query_seconds = app.config['SLOW_QUERY_MS'] / 1000
+    logger = app.logger
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        cost = time.perf_counter() - conn.info['_metrics_query_start'].pop()
+        if cost >= slow_query_seconds:
+            with registry._lock:
+                registry.slow_queries += 1
+            logger.warning(f'慢 SQL {cost * 1000:.1f}ms：{statement} 参数={parameters!r:.500}')
+        #后台线程（图片处理等）里执行的 SQL 不计入任何请求
+        if has_request_context() and hasattr(g, '_metrics_start'):
+            g._metrics_sql_count += 1
+            g._metrics_sql_seconds += cost
+            g._metrics_statements.append((cost, statement))
+
+
+def init_app(app, db):
+    global _profiler
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.config.setdefault('SLOW_REQUEST_MS', 500)
+    app.config.setdefault('SLOW_QUERY_MS', 100)
+    app.config.setdefault('PROFILE_SLOW_REQUESTS', False)
+    app.config.setdefault('PROFILE_THRESHOLD_MS', 1000)
+    app.config.setdefault('PROFILE_INTERVAL_MS', 5)
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+
+    with app.app_context():
+        _register_sql_events(db.engine, app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    if app.config['PROFILE_SLOW_REQUESTS'] and _profiler is None:
+        _profiler = SamplingProfiler(app.config['PROFILE_INTERVAL_MS'] / 1000)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
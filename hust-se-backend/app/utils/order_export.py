@@ -0,0 +1,82 @@
+#app/utils/order_export.py：订单导出（对账用）
+#不走 ORM 对象和 to_dict()：一条 SELECT 把订单和买家/卖家用户名、书名 JOIN 出来，只取导出需要的列，
+#用 yield_per 分批从游标取数（Postgres 上是服务端游标，SQLite 本身就是逐行读取），边取边写给客户端，
+#内存占用只和批大小有关，与订单总数无关。
+#CSV 会被直接用 Excel 打开，书名、用户名是用户填写的，以 = + - @ 等开头的单元格前面加单引号，防止被当成公式执行。
+import csv
+import io
+import json
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.book import Book
+from app.models.order import Order, STATUS_TEXT
+from app.models.user import User
+
+EXPORT_BATCH_SIZE = 1000
+#导出的列（CSV 表头 / NDJSON 字段名）
+EXPORT_COLUMNS = ('order_no', 'create_time', 'status', 'status_text', 'price',
+                  'book_id', 'book_title', 'buyer_id', 'buyer_name', 'seller_id', 'seller_name')
+#表格软件会当成公式开头的字符（OWASP CSV Injection）
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def export_query(user_id, role, status=None, start=None, end=None):
+    '''当前用户作为买家/卖家的订单，按 (create_time, id) 正序；end 为开区间'''
+    buyer, seller = aliased(User), aliased(User)
+    stmt = (
+        db.select(
+            Order.order_no, Order.create_time, Order.status, Order.price,
+            Order.book_id, Book.title, Order.buyer_id, buyer.username, Order.seller_id, seller.username
+        )
+        .join(Book, Book.id == Order.book_id)
+        .join(buyer, buyer.id == Order.buyer_id)
+        .join(seller, seller.id == Order.seller_id)
+        .where((Order.buyer_id if role == 'buyer' else Order.seller_id) == user_id)
+        .order_by(Order.create_time, Order.id)
+    )
+    if status is not None:
+        stmt = stmt.where(Order.status == status)
+    if start is not None:
+        stmt = stmt.where(Order.create_time >= start)
+    if end is not None:
+        stmt = stmt.where(Order.create_time < end)
+    return stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def _records(stmt):
+    for order_no, create_time, status, price, book_id, title, buyer_id, buyer_name, seller_id, seller_name \
+            in db.session.execute(stmt):
+        yield (order_no, create_time.strftime('%Y-%m-%d %H:%M:%S') if create_time else '', status,
+               STATUS_TEXT.get(status, '未知状态'), price, book_id, title, buyer_id, buyer_name, seller_id, seller_name)
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(stmt):
+    #带 BOM，Excel 直接打开中文不乱码；每 EXPORT_BATCH_SIZE 行输出一块
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_COLUMNS)
+    for count, record in enumerate(_records(stmt), start=1):
+        writer.writerow([_csv_cell(value) for value in record])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(stmt):
+    chunk = []
+    for record in _records(stmt):
+        chunk.append(json.dumps(dict(zip(EXPORT_COLUMNS, record)), ensure_ascii=False))
+        if len(chunk) == EXPORT_BATCH_SIZE:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
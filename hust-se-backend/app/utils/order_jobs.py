@@ -0,0 +1,207 @@
+#app/utils/order_jobs.py：订单定时任务
+#1. 自动完成：已收货（4）超过 ORDER_AUTO_COMPLETE_DAYS 天的订单改为已完成（5）；
+#2. 超时取消：待支付（1）超过 ORDER_PAYMENT_TIMEOUT_MINUTES 分钟的订单改为已取消（6），书籍重新上架
+#   （恢复在售、写回全文索引、分面计数 +1、一起购买计数 -1、成交价分布 -1、响应缓存失效）。
+#两个任务都按批处理：先用 (status, updated_at) 索引取出最多 ORDER_JOBS_BATCH_SIZE 个到期订单的 id，
+#再用一条带状态条件的 UPDATE 改掉这一批。每批一个短事务，写锁只持有一批的时间，一次最多处理 ORDER_JOBS_MAX_BATCHES 批，
+#积压的留到下一次。状态条件保证和用户操作（同时支付、手动确认完成）并发时不会覆盖对方，
+#只有真正被本任务改掉的订单才会释放书籍，多个进程同时执行也不会重复上架。
+#执行方式：
+#  - 进程内：ORDER_JOBS_INTERVAL > 0 时，每个进程处理第一个请求时启动后台线程，每 ORDER_JOBS_INTERVAL 秒执行一次；
+#    同一台机器上的多个 worker 通过文件锁选出一个执行，其余的跳过；
+#  - 命令行：flask orders-tick 执行一次（适合配 cron），flask orders-worker 常驻循环执行（此时可把 ORDER_JOBS_INTERVAL 设为 0）。
+#每次执行处理的行数和每批持有写锁的时间记录在 /metrics 的 job_* 指标里。
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from app import db
+from app.models.book import Book
+from app.models.order import Order
+from app.utils import search as book_search
+from app.utils import facets
+from app.utils import recommend
+from app.utils import price_stats
+from app.utils.cache import response_cache
+from app.utils.http_cache import bump_list_version
+from app.utils.metrics import registry
+
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
+def _due_ids(status, cutoff, batch_size):
+    #状态变更时间早于 cutoff 的订单；老数据没有 updated_at 时按下单时间算
+    due = db.or_(Order.updated_at < cutoff, db.and_(Order.updated_at.is_(None), Order.create_time < cutoff))
+    return db.session.execute(
+        db.select(Order.id).where(Order.status == status, due).order_by(Order.updated_at, Order.id).limit(batch_size)
+    ).scalars().all()
+
+
+def _transition(order_ids, from_status, to_status, now):
+    '''把一批订单从 from_status 改为 to_status，返回真正被改掉的订单（buyer_id, book_id, price, create_time）'''
+    stmt = (
+        db.update(Order)
+        .where(Order.id.in_(order_ids), Order.status == from_status)
+        .values(status=to_status, updated_at=now)
+    )
+    if db.engine.dialect.update_returning:
+        return db.session.execute(
+            stmt.returning(Order.buyer_id, Order.book_id, Order.price, Order.create_time)
+        ).all()
+    #不支持 RETURNING（MySQL）：先锁住仍处于 from_status 的行，再按这些 id 更新
+    rows = db.session.execute(
+        db.select(Order.id, Order.buyer_id, Order.book_id, Order.price, Order.create_time)
+        .where(Order.id.in_(order_ids), Order.status == from_status).with_for_update()
+    ).all()
+    if rows:
+        db.session.execute(stmt.where(Order.id.in_([row.id for row in rows])))
+    return rows
+
+
+def _flip_books(book_ids, now):
+    #把仍是已售（0）的书改回在售（1），返回真正被改掉的书籍 id；和 _transition 一样，不支持 RETURNING 时先锁行
+    stmt = db.update(Book).where(Book.id.in_(book_ids), Book.status == 0).values(status=1, updated_at=now)
+    if db.engine.dialect.update_returning:
+        return set(db.session.execute(stmt.returning(Book.id)).scalars())
+    flipped = set(db.session.execute(
+        db.select(Book.id).where(Book.id.in_(book_ids), Book.status == 0).with_for_update()
+    ).scalars())
+    if flipped:
+        db.session.execute(stmt.where(Book.id.in_(flipped)))
+    return flipped
+
+
+def _release_books(orders):
+    #取消订单后书籍重新上架，和发布书籍一样同步写索引、分面计数，并扣掉一起购买计数和成交价分布（在当前事务里）。
+    #索引和分面计数只处理这次真正从已售改回在售的书：已经在售的书（例如别的途径先上架了）再加一次会重复计数
+    book_ids = {order.book_id for order in orders}
+    flipped = _flip_books(book_ids, datetime.utcnow())
+    #只取索引、分面计数和成交统计用到的列，不加载 ORM 对象
+    books = {book.id: book for book in db.session.execute(
+        db.select(Book.id, Book.title, Book.author, Book.course_tag, Book.grade_tag, Book.price, Book.description)
+        .where(Book.id.in_(book_ids))
+    )}
+    released = [books[book_id] for book_id in sorted(flipped)]
+    book_search.index_books(released)
+    facets.add_books(released)
+    if released:
+        bump_list_version()
+    #订单已经取消，不管书有没有重新上架，这笔成交都要从一起购买计数和成交价分布里扣掉
+    recommend.remove_purchases([(order.buyer_id, books[order.book_id].course_tag) for order in orders
+                                if order.book_id in books])
+    price_stats.remove_sales([(books[order.book_id], order.price, order.create_time) for order in orders
+                              if order.book_id in books])
+    return sorted(flipped)
+
+
+def _run(job, status, to_status, cutoff, batch_size, max_batches, release):
+    rows, lock_seconds = 0, []
+    for _ in range(max_batches):
+        order_ids = _due_ids(status, cutoff, batch_size)
+        if not order_ids:
+            break
+        started = time.perf_counter()   #从第一条 UPDATE 开始持有写锁，到提交为止
+        try:
+            changed = _transition(order_ids, status, to_status, datetime.now())
+            released = _release_books(changed) if release and changed else []
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            lock_seconds.append(time.perf_counter() - started)
+            db.session.expunge_all()
+        if released:
+            response_cache.invalidate_books(released)
+        rows += len(changed)
+        if len(order_ids) < batch_size:
+            break
+    registry.observe_job(job, rows, lock_seconds)
+    return rows
+
+
+def complete_received_orders(config):
+    cutoff = datetime.now() - timedelta(days=config['ORDER_AUTO_COMPLETE_DAYS'])
+    return _run('order_auto_complete', 4, 5, cutoff,
+                config['ORDER_JOBS_BATCH_SIZE'], config['ORDER_JOBS_MAX_BATCHES'], release=False)
+
+
+def expire_unpaid_orders(config):
+    cutoff = datetime.now() - timedelta(minutes=config['ORDER_PAYMENT_TIMEOUT_MINUTES'])
+    return _run('order_expire_unpaid', 1, 6, cutoff,
+                config['ORDER_JOBS_BATCH_SIZE'], config['ORDER_JOBS_MAX_BATCHES'], release=True)
+
+
+def run_tick(app):
+    '''执行一次两个任务，返回 {'completed': 数量, 'expired': 数量}'''
+    with app.app_context():
+        result = {'completed': complete_received_orders(app.config), 'expired': expire_unpaid_orders(app.config)}
+    if any(result.values()):
+        app.logger.info(f"订单定时任务：自动完成 {result['completed']} 个，超时取消 {result['expired']} 个")
+    return result
+
+
+def _lock_path(app):
+    #按数据库区分锁文件，同一台机器上跑多套环境时互不影响
+    if app.config['ORDER_JOBS_LOCK_FILE']:
+        return app.config['ORDER_JOBS_LOCK_FILE']
+    digest = hashlib.md5(app.config['SQLALCHEMY_DATABASE_URI'].encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f'hustse-order-jobs-{digest}.lock')
+
+
+def _try_lock(path):
+    #拿到排它锁返回文件句柄（要一直持有，进程退出时自动释放）；被别的进程占着返回 None；不支持 fcntl 的系统直接执行
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    handle = open(path, 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def run_forever(app, interval):
+    '''常驻执行（后台线程或 flask orders-worker）；拿不到文件锁时只等待，不执行'''
+    lock = None
+    while True:
+        if lock is None:
+            lock = _try_lock(_lock_path(app))
+        if lock is not None:
+            try:
+                run_tick(app)
+            except Exception as e:
+                app.logger.error(f'订单定时任务执行失败: {str(e)}')
+        time.sleep(interval)
+
+
+def _ensure_scheduler():
+    #每个进程（包括 fork 出来的 worker）在处理第一个请求时启动自己的后台线程
+    global _scheduler_pid
+    if _scheduler_pid == os.getpid():
+        return
+    from flask import current_app
+    with _scheduler_lock:
+        if _scheduler_pid == os.getpid():
+            return
+        _scheduler_pid = os.getpid()
+        app = current_app._get_current_object()
+        threading.Thread(target=run_forever, args=(app, app.config['ORDER_JOBS_INTERVAL']),
+                         name='order-jobs', daemon=True).start()
+
+
+def init_app(app):
+    app.config.setdefault('ORDER_PAYMENT_TIMEOUT_MINUTES', 30)
+    app.config.setdefault('ORDER_AUTO_COMPLETE_DAYS', 7)
+    app.config.setdefault('ORDER_JOBS_INTERVAL', 60)
+    app.config.setdefault('ORDER_JOBS_BATCH_SIZE', 500)
+    app.config.setdefault('ORDER_JOBS_MAX_BATCHES', 20)
+    app.config.setdefault('ORDER_JOBS_LOCK_FILE', None)
+    if app.config['ORDER_JOBS_INTERVAL'] > 0:
+        app.before_request(_ensure_scheduler)
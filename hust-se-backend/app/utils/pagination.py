@@ -0,0 +1,69 @@
+#app/utils/pagination.py：游标（keyset）分页工具
+#按 (排序字段, id) 做 WHERE 条件定位下一页，不需要 OFFSET 扫描，也不需要 COUNT(*)。
+#游标对前端是不透明的字符串（base64 编码的 JSON），里面记录排序方式和上一页最后一条的取值。
+import base64
+import json
+from datetime import datetime
+from flask import request, current_app
+from app import db
+
+
+class InvalidCursor(ValueError):
+    #游标被篡改或与当前排序方式不匹配
+    pass
+
+
+def get_per_page(default=10):
+    #读取 per_page 参数，限制在 1 ~ MAX_PER_PAGE 之间
+    per_page = request.args.get('per_page', default, type=int)
+    return max(1, min(per_page, current_app.config.get('MAX_PER_PAGE', 50)))
+
+
+def encode_cursor(sort_name, value, row_id):
+    if isinstance(value, datetime):
+        value = {'dt': value.isoformat()}
+    payload = json.dumps([sort_name, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_name):
+    #返回 (排序字段取值, id)
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        name, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['dt'])
+        row_id = int(row_id)
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor('无效的分页游标')
+    if name != sort_name:
+        raise InvalidCursor('分页游标与排序方式不匹配')
+    return value, row_id
+
+
+def keyset_page(query, sort_name, key_column, id_column, descending, cursor, per_page):
+    '''按 (key_column, id_column) 取一页数据；cursor 为空表示第一页。
+    返回 (当前页对象列表, next_cursor)，没有下一页时 next_cursor 为 None'''
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort_name)
+        if descending:
+            query = query.filter(db.or_(key_column < value, db.and_(key_column == value, id_column < row_id)))
+        else:
+            query = query.filter(db.or_(key_column > value, db.and_(key_column == value, id_column > row_id)))
+
+    if descending:
+        query = query.order_by(key_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(key_column.asc(), id_column.asc())
+
+    #多取一条判断是否还有下一页；把排序字段一起查出来，用于生成游标
+    rows = query.add_columns(key_column).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    items = [row[0] for row in rows]
+
+    next_cursor = None
+    if has_more and rows:
+        last_item, last_value = rows[-1]
+        next_cursor = encode_cursor(sort_name, last_value, last_item.id)
+    return items, next_cursor
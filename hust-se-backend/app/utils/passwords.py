@@ -0,0 +1,60 @@
+#app/utils/passwords.py：密码哈希
+#哈希参数由 PASSWORD_HASH_METHOD 配置（Werkzeug 的写法，如 scrypt:32768:8:1、pbkdf2:sha256:600000），
+#调高/调低成本或者换算法后不需要迁移数据：老用户下次登录验证成功时，发现存的哈希参数和当前配置不同，
+#就用明文密码按新参数重新哈希写回（rehash-on-login）。
+#哈希是刻意设计得很慢的 CPU 密集操作，这里用信号量限制同时在算哈希的请求数（PASSWORD_HASH_CONCURRENCY），
+#多出来的请求排队，排队超过 PASSWORD_HASH_WAIT 秒直接返回“服务繁忙”，不会把所有 worker 线程都拖进哈希里。
+import threading
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(Exception):
+    #排队等待哈希的时间超过 PASSWORD_HASH_WAIT
+    pass
+
+
+_slots = None
+_slots_lock = threading.Lock()
+_method_prefixes = {}   #配置的 method -> 实际生成的哈希前缀（Werkzeug 会补全默认参数，如 pbkdf2 -> pbkdf2:sha256:1000000）
+
+
+def _acquire():
+    global _slots
+    config = current_app.config
+    if _slots is None:
+        with _slots_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(config['PASSWORD_HASH_CONCURRENCY'])
+    if not _slots.acquire(timeout=config['PASSWORD_HASH_WAIT']):
+        raise HashingBusy()
+
+
+def _method_prefix(method):
+    if method not in _method_prefixes:
+        _method_prefixes[method] = generate_password_hash('', method).split('$', 1)[0]
+    return _method_prefixes[method]
+
+
+def hash_password(password):
+    _acquire()
+    try:
+        return generate_password_hash(password, current_app.config['PASSWORD_HASH_METHOD'])
+    finally:
+        _slots.release()
+
+
+def verify_password(user, password):
+    '''校验密码；参数过期时顺便按当前配置重新哈希（只改 user 对象，调用方负责 commit），返回是否正确'''
+    if not password or not user.password_hash:
+        return False
+    _acquire()
+    try:
+        if not check_password_hash(user.password_hash, password):
+            return False
+        method = current_app.config['PASSWORD_HASH_METHOD']
+        if user.password_hash.split('$', 1)[0] != _method_prefix(method):
+            user.password_hash = generate_password_hash(password, method)
+        return True
+    finally:
+        _slots.release()
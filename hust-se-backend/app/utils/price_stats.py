@@ -0,0 +1,209 @@
+#app/utils/price_stats.py：卖家发布书籍时的定价参考（同书名/作者、同课程最近成交价的 p25 / 中位数 / p75）
+#不在请求时扫订单表，而是为每个键维护一个可增减的分位数草图（和 DDSketch 同样的对数分桶）：
+#  - 价格 p 落在桶 ceil(log_γ p)，γ = (1 + α) / (1 - α)，桶代表值与真实价格的相对误差不超过 α（SKETCH_ACCURACY）；
+#  - 每个 (维度, 键, 月份, 桶) 一行计数，下单 -> add_sales()，超时取消 -> remove_sales()，和订单在同一事务里提交；
+#  - 同一个键的桶数只和价格跨度有关（1 元到 500 元约 300 个桶，实际成交价集中时只有几十个），和成交量无关。
+#查询时按主键前缀读出这个键最近 PRICE_GUIDE_MONTHS 个月的桶，按桶下标累加就能得到任意分位数。
+#两个维度：title 为规范化后的“书名|作者”（全角半角、大小写、空格标点不同都算同一本），course 为课程标签。
+#计数出现偏差（例如直接改了数据库）时用 flask price-stats-rebuild 按订单表重新统计。
+import math
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import bindparam, inspect
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+#分位数的相对精度（改动后需要 flask price-stats-rebuild，已有的桶下标会失效）
+SKETCH_ACCURACY = 0.01
+GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+#低于 1 分钱（包括免费赠送）的成交价单独放一个桶，代表值为 0
+MIN_PRICE = 0.01
+ZERO_BUCKET = -1000000
+#已取消的订单不算成交
+CANCELLED_STATUS = 6
+
+
+def normalize(text):
+    '''书名/作者规范化：全角转半角、忽略大小写，只保留文字和数字'''
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    return ''.join(ch for ch in text if ch.isalnum())
+
+
+def title_key(title, author):
+    return f'{normalize(title)}|{normalize(author)}'[:255]
+
+
+def bucket_of(price):
+    if price is None or price < MIN_PRICE:
+        return ZERO_BUCKET
+    return math.ceil(math.log(price) / _LOG_GAMMA)
+
+
+def bucket_value(bucket):
+    if bucket == ZERO_BUCKET:
+        return 0.0
+    #桶 (γ^(i-1), γ^i] 的代表值，与桶内任意价格的相对误差不超过 α
+    return 2 * GAMMA ** bucket / (GAMMA + 1)
+
+
+def period_of(when):
+    return when.year * 100 + when.month
+
+
+def _first_period(months, now=None):
+    #最近 months 个月（含本月）的第一个月
+    now = now or datetime.now()
+    index = now.year * 12 + now.month - 1 - (months - 1)
+    return (index // 12) * 100 + index % 12 + 1
+
+
+def _keys(book):
+    keys = [('title', title_key(book.title, book.author))]
+    if book.course_tag:
+        keys.append(('course', book.course_tag))
+    return keys
+
+
+def _deltas(sales, sign):
+    #sales：[(书籍（或含 title/author/course_tag 的行）, 成交价, 下单时间)]
+    deltas = Counter()
+    for book, price, sold_at in sales:
+        for scope, key in _keys(book):
+            deltas[(scope, key, period_of(sold_at or datetime.now()), bucket_of(price))] += sign
+    return deltas
+
+
+def _apply(deltas):
+    #和分面计数一样：已经有的桶一条 executemany UPDATE，第一次出现的逐个插入；都按主键顺序，避免死锁
+    from app.models.price_stats import PriceSketchBucket
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    table = PriceSketchBucket.__table__
+    existing = set(map(tuple, db.session.execute(
+        db.select(table.c.scope, table.c.sketch_key, table.c.period, table.c.bucket)
+        .where(table.c.scope.in_({scope for scope, _, _, _ in deltas}),   #带上 scope 才能走主键
+               table.c.sketch_key.in_({key for _, key, _, _ in deltas}),
+               table.c.period.in_({period for _, _, period, _ in deltas}))
+    )))
+    params = [{'key_scope': scope, 'key_sketch': key, 'key_period': period, 'key_bucket': bucket,
+               'delta': deltas[(scope, key, period, bucket)]}
+              for scope, key, period, bucket in sorted(deltas) if (scope, key, period, bucket) in existing]
+    if params:
+        db.session.execute(
+            table.update()
+            .where(table.c.scope == bindparam('key_scope'), table.c.sketch_key == bindparam('key_sketch'),
+                   table.c.period == bindparam('key_period'), table.c.bucket == bindparam('key_bucket'))
+            .values(count=table.c.count + bindparam('delta')),
+            params
+        )
+    for key in sorted(deltas):
+        if key in existing or deltas[key] < 0:
+            continue
+        scope, sketch_key, period, bucket = key
+        try:
+            with db.session.begin_nested():
+                db.session.add(PriceSketchBucket(scope=scope, sketch_key=sketch_key, period=period,
+                                                 bucket=bucket, count=deltas[key]))
+        except IntegrityError:
+            #另一个请求刚好先插入了这一行
+            db.session.execute(
+                table.update()
+                .where(table.c.scope == scope, table.c.sketch_key == sketch_key,
+                       table.c.period == period, table.c.bucket == bucket)
+                .values(count=table.c.count + deltas[key])
+            )
+
+
+def add_sales(sales):
+    '''下单成交，sales 为 [(书籍, 成交价, 下单时间)]；在当前事务里执行，调用方负责 commit'''
+    _apply(_deltas(sales, 1))
+
+
+def remove_sales(sales):
+    '''订单取消，参数同 add_sales（下单时间决定计在哪个月）；在当前事务里执行，调用方负责 commit'''
+    _apply(_deltas(sales, -1))
+
+
+def rebuild_price_stats():
+    '''修复用：按订单表重新统计全部成交价分桶，返回计入的订单数'''
+    from app.models.book import Book
+    from app.models.order import Order
+    from app.models.price_stats import PriceSketchBucket
+    rows = db.session.execute(
+        db.select(Book.title, Book.author, Book.course_tag, Order.price, Order.create_time)
+        .join(Book, Book.id == Order.book_id).where(Order.status != CANCELLED_STATUS)
+        .execution_options(yield_per=5000)
+    )
+    deltas, orders = Counter(), 0
+    for row in rows:
+        deltas.update(_deltas([(row, row.price, row.create_time)], 1))
+        orders += 1
+    db.session.execute(db.delete(PriceSketchBucket))
+    if deltas:
+        db.session.execute(PriceSketchBucket.__table__.insert(), [
+            {'scope': scope, 'sketch_key': key, 'period': period, 'bucket': bucket, 'count': count}
+            for (scope, key, period, bucket), count in deltas.items()
+        ])
+    db.session.commit()
+    return orders
+
+
+def init_price_stats():
+    #分桶表是空的但已经有订单（刚上线这个功能）时，先统计一遍
+    from app.models.order import Order
+    from app.models.price_stats import PriceSketchBucket
+    inspector = inspect(db.engine)
+    if not inspector.has_table('price_sketch_buckets') or not inspector.has_table('orders'):
+        return
+    if PriceSketchBucket.query.first() is None and Order.query.first() is not None:
+        rebuild_price_stats()
+
+
+def quantiles(buckets, qs=(0.25, 0.5, 0.75)):
+    '''buckets 为按桶下标升序的 [(桶下标, 笔数)]，返回 (总笔数, [各分位数的价格])'''
+    total = sum(count for _, count in buckets)
+    if total <= 0:
+        return 0, []
+    values = []
+    for q in qs:
+        rank, seen = q * (total - 1), 0
+        for bucket, count in buckets:
+            seen += count
+            if seen > rank:
+                values.append(round(bucket_value(bucket), 2))
+                break
+    return total, values
+
+
+def price_guide(title=None, author=None, course_tag=None, months=12, min_samples=3):
+    '''最近 months 个月的成交价参考：{'title': 同书名作者, 'course': 同课程}，成交不足 min_samples 笔的维度为 None'''
+    from app.models.price_stats import PriceSketchBucket
+    keys = {}
+    if title:
+        keys['title'] = title_key(title, author)
+    if course_tag:
+        keys['course'] = course_tag
+    guide = {'title': None, 'course': None}
+    if not keys:
+        return guide
+    #两个维度一条查询：按主键前缀 (scope, sketch_key) 读出最近几个月的桶，按桶下标合并各月计数
+    buckets = {scope: [] for scope in keys}
+    rows = db.session.execute(
+        db.select(PriceSketchBucket.scope, PriceSketchBucket.bucket, db.func.sum(PriceSketchBucket.count))
+        .where(db.or_(*[db.and_(PriceSketchBucket.scope == scope, PriceSketchBucket.sketch_key == key)
+                        for scope, key in keys.items()]),
+               PriceSketchBucket.period >= _first_period(months))
+        .group_by(PriceSketchBucket.scope, PriceSketchBucket.bucket)
+        .having(db.func.sum(PriceSketchBucket.count) > 0)
+        .order_by(PriceSketchBucket.scope, PriceSketchBucket.bucket)
+    )
+    for scope, bucket, count in rows:
+        buckets[scope].append((bucket, count))
+    for scope, scope_buckets in buckets.items():
+        samples, values = quantiles(scope_buckets)
+        if samples >= max(min_samples, 1):
+            guide[scope] = dict(zip(('p25', 'median', 'p75'), values), samples=samples)
+    return guide
@@ -0,0 +1,71 @@
+#app/utils/ratelimit.py：进程内令牌桶限流（登录 / 注册）
+#每个 key（客户端 IP、手机号）一个桶：容量 capacity，每秒补充 rate 个令牌，每次请求消耗 1 个，没有令牌就直接 429。
+#检查发生在查库和密码哈希之前，被拒绝的请求几乎不消耗 CPU，撞库脚本打满登录接口时不会拖垮浏览书籍等其他接口。
+#桶只在本进程内，多 worker 部署时实际上限约为 配置值 × worker 数；桶数量超过 RATELIMIT_MAX_KEYS 时淘汰最久未用的。
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, jsonify, request
+
+
+class TokenBucketLimiter:
+    def __init__(self, capacity, rate, max_keys=100000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()   #key -> [剩余令牌, 上次更新时间]
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        '''消耗一个令牌；成功返回 0，否则返回还需要等待的秒数'''
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.capacity, now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / self.rate
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _limiter(name):
+    #每个配置项（如 RATELIMIT_LOGIN_IP）一个限流器，第一次用到时按配置创建
+    with _limiters_lock:
+        if name not in _limiters:
+            capacity, rate = current_app.config[name]
+            _limiters[name] = TokenBucketLimiter(capacity, rate, current_app.config['RATELIMIT_MAX_KEYS'])
+        return _limiters[name]
+
+
+def rate_limited(ip_limit, phone_limit=None):
+    '''按客户端 IP（以及请求体里的 phone）限流的装饰器，参数是配置项名称'''
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if current_app.config.get('RATELIMIT_ENABLED', True):
+                checks = [(ip_limit, request.remote_addr or '')]
+                if phone_limit:
+                    data = request.get_json(silent=True) or {}
+                    checks.append((phone_limit, str(data.get('phone') or '')))
+                for name, key in checks:
+                    wait = _limiter(name).acquire(key)
+                    if wait:
+                        response = jsonify({'code': 429, 'msg': '操作太频繁，请稍后再试'})
+                        response.headers['Retry-After'] = str(math.ceil(wait))
+                        return response, 429
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
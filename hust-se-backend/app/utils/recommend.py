@@ -0,0 +1,173 @@
+#app/utils/recommend.py：书籍详情页的推荐（同课程在售书籍 + “买过这门课的同学还买了”）
+#二手书每本只能卖一次，按“书”统计一起购买没有意义（推荐出来的书早就卖掉了），所以一起购买按课程统计：
+#course_co_purchases 表记录每两门课程有多少买家都买过（不算已取消的订单），下单 / 订单取消时在同一事务里增量调整：
+#  - 买家第一次买某门课程的书 -> 这门课和他买过的其他每门课的人数 +1（两个方向）；
+#  - 订单取消后买家不再有这门课的订单 -> 对应的人数 -1。
+#推荐时不做临时 JOIN / GROUP BY：
+#  - 同课程：走 ix_books_onsale_course_grade_create_time / ix_books_onsale_course_create_time 部分索引，
+#    先取同课程同年级、不够再补同课程的最新在售书籍（索引本身就是随发布/售出自动维护的“邻居表”）；
+#  - 一起购买：按课程取人数最多的 RELATED_COURSES 门课，每门课再按索引取最新的几本在售书籍。
+#每次查询都是主键 / 索引上的范围扫描加 LIMIT，代价只和返回条数 k 有关，与书籍、订单总数无关。
+#同一买家并发下两门“新课程”的订单时，两边都看不到对方，这一对课程会少计 1；用 flask recommend-rebuild 可按订单表重新统计。
+from collections import Counter, defaultdict
+from sqlalchemy import bindparam, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from app import db
+
+#“一起购买”最多展示几门课程
+RELATED_COURSES = 3
+#计入一起购买的订单（已取消的不算）
+CANCELLED_STATUS = 6
+
+
+def _buyer_courses(buyer_ids):
+    '''买家 -> 买过的课程集合（不含已取消订单）'''
+    from app.models.book import Book
+    from app.models.order import Order
+    courses = defaultdict(set)
+    rows = db.session.execute(
+        db.select(Order.buyer_id, Book.course_tag).join(Book, Book.id == Order.book_id)
+        .where(Order.buyer_id.in_(buyer_ids), Order.status != CANCELLED_STATUS)
+        .group_by(Order.buyer_id, Book.course_tag)
+    )
+    for buyer_id, course_tag in rows:
+        courses[buyer_id].add(course_tag)
+    return courses
+
+
+def _pair_deltas(changed, others, sign, deltas):
+    #changed：这次新增（或失去）的课程；others：买家仍然买过的其他课程
+    for course in changed:
+        for other in others:
+            deltas[(course, other)] += sign
+            deltas[(other, course)] += sign
+        for other in changed:
+            if other != course:
+                deltas[(course, other)] += sign
+
+
+def _apply(deltas):
+    #和分面计数一样：已经有的组合一条 executemany UPDATE，第一次出现的逐个插入；都按主键顺序，避免死锁
+    from app.models.recommend import CoursePurchasePair
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    table = CoursePurchasePair.__table__
+    existing = set(map(tuple, db.session.execute(
+        db.select(table.c.course_tag, table.c.other_course_tag)
+        .where(table.c.course_tag.in_({course for course, _ in deltas}))
+    )))
+    params = [{'key_course_tag': course, 'key_other': other, 'delta': deltas[(course, other)]}
+              for course, other in sorted(deltas) if (course, other) in existing]
+    if params:
+        db.session.execute(
+            table.update()
+            .where(table.c.course_tag == bindparam('key_course_tag'), table.c.other_course_tag == bindparam('key_other'))
+            .values(buyers=table.c.buyers + bindparam('delta')),
+            params
+        )
+    for (course, other) in sorted(deltas):
+        if (course, other) in existing or deltas[(course, other)] < 0:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(CoursePurchasePair(course_tag=course, other_course_tag=other,
+                                                  buyers=deltas[(course, other)]))
+        except IntegrityError:
+            #另一个请求刚好先插入了这一行
+            db.session.execute(
+                table.update()
+                .where(table.c.course_tag == course, table.c.other_course_tag == other)
+                .values(buyers=table.c.buyers + deltas[(course, other)])
+            )
+
+
+def add_purchases(buyer_id, course_tags):
+    '''买家下单买了这些课程的书。要在新订单写入之前调用（同一事务），调用方负责 commit'''
+    before = _buyer_courses([buyer_id])[buyer_id]
+    deltas = Counter()
+    _pair_deltas(set(course_tags) - before, before, 1, deltas)
+    _apply(deltas)
+
+
+def remove_purchases(orders):
+    '''一批订单被取消后调用（订单状态已经改为已取消，同一事务）；orders 为 [(buyer_id, course_tag)]'''
+    lost = defaultdict(set)
+    for buyer_id, course_tag in orders:
+        lost[buyer_id].add(course_tag)
+    after = _buyer_courses(list(lost))
+    deltas = Counter()
+    for buyer_id, courses in lost.items():
+        _pair_deltas(courses - after[buyer_id], after[buyer_id], -1, deltas)
+    _apply(deltas)
+
+
+def rebuild_co_purchases():
+    '''修复用：按订单表重新统计全部一起购买人数，返回课程组合数'''
+    from app.models.book import Book
+    from app.models.order import Order
+    from app.models.recommend import CoursePurchasePair
+    bought = (
+        db.select(Order.buyer_id, Book.course_tag).join(Book, Book.id == Order.book_id)
+        .where(Order.status != CANCELLED_STATUS).distinct().cte('bought')
+    )
+    left, right = bought.alias('l'), bought.alias('r')
+    rows = db.session.execute(
+        db.select(left.c.course_tag, right.c.course_tag, db.func.count())
+        .join(right, db.and_(left.c.buyer_id == right.c.buyer_id, left.c.course_tag != right.c.course_tag))
+        .group_by(left.c.course_tag, right.c.course_tag)
+    ).all()
+    db.session.execute(db.delete(CoursePurchasePair))
+    if rows:
+        db.session.execute(CoursePurchasePair.__table__.insert(), [
+            {'course_tag': course, 'other_course_tag': other, 'buyers': buyers} for course, other, buyers in rows
+        ])
+    db.session.commit()
+    return len(rows)
+
+
+def init_recommendations():
+    #计数表是空的但已经有订单（刚上线这个功能）时，先统计一遍
+    from app.models.order import Order
+    from app.models.recommend import CoursePurchasePair
+    inspector = inspect(db.engine)
+    if not inspector.has_table('course_co_purchases') or not inspector.has_table('orders'):
+        return
+    if CoursePurchasePair.query.first() is None and Order.query.first() is not None:
+        rebuild_co_purchases()
+
+
+def _latest_on_sale(limit, exclude, **filters):
+    from app.models.book import Book
+    if limit <= 0:
+        return []
+    return (
+        Book.query.options(joinedload(Book.seller))
+        .filter_by(status=1, **filters).filter(Book.id.notin_(exclude))
+        .order_by(Book.create_time.desc(), Book.id.desc()).limit(limit).all()
+    )
+
+
+def recommend(book, limit):
+    '''返回 {'same_course': [书籍], 'also_bought': [{'course_tag', 'buyers', 'books'}]}'''
+    from app.models.recommend import CoursePurchasePair
+    exclude = [book.id]
+    same_course = []
+    if book.grade_tag:
+        same_course = _latest_on_sale(limit, exclude, course_tag=book.course_tag, grade_tag=book.grade_tag)
+    same_course += _latest_on_sale(limit - len(same_course), exclude + [b.id for b in same_course],
+                                   course_tag=book.course_tag)
+
+    related = db.session.execute(
+        db.select(CoursePurchasePair.other_course_tag, CoursePurchasePair.buyers)
+        .where(CoursePurchasePair.course_tag == book.course_tag, CoursePurchasePair.buyers > 0)
+        .order_by(CoursePurchasePair.buyers.desc(), CoursePurchasePair.other_course_tag).limit(RELATED_COURSES)
+    ).all()
+    also_bought = []
+    per_course = -(-limit // len(related)) if related else 0   #向上取整
+    for course_tag, buyers in related:
+        books = _latest_on_sale(per_course, exclude, course_tag=course_tag)
+        if books:
+            also_bought.append({'course_tag': course_tag, 'buyers': buyers, 'books': books})
+    return {'same_course': same_course, 'also_bought': also_bought}
@@ -0,0 +1,78 @@
+#app/utils/schema.py：已有数据库升级到当前模型，以及派生表（全文索引、各类计数表）的初始化
+#create_app 里不访问数据库（gunicorn preload、flask routes 等命令都会执行 create_app），这些都在部署时执行：
+#  flask db upgrade（有迁移脚本的环境）之后执行 flask schema-upgrade，或者直接只执行 flask schema-upgrade：
+#  1. upgrade_schema()：按模型补齐缺少的表、列、索引（只增加，不删除已有的列），
+#     新加的 updated_at 列用 create_time 回填，WIDEN_COLUMNS 里的列从定长字符串改成 Text；重复执行没有副作用；
+#  2. bootstrap_derived()：建全文索引表并回填，分面计数 / 一起购买计数 / 成交价分桶为空时按现有数据统计一遍。
+from sqlalchemy import inspect, text
+from app import db
+
+#新增列的回填来源：(表名, 列名) -> 同一行的另一列
+BACKFILL_COLUMNS = {
+    ('books', 'updated_at'): 'create_time',
+    ('orders', 'updated_at'): 'create_time',
+}
+#从 VARCHAR 放宽成 Text 的列（SQLite 不检查 VARCHAR 长度，只有其他数据库需要改）
+WIDEN_COLUMNS = {('books', 'images')}
+
+
+def _widen_column(conn, table, column, preparer):
+    dialect = conn.dialect.name
+    target = preparer.format_table(table)
+    if dialect == 'postgresql':
+        conn.execute(text(f'ALTER TABLE {target} ALTER COLUMN {preparer.format_column(column)} TYPE TEXT'))
+    elif dialect in ('mysql', 'mariadb'):
+        conn.execute(text(f'ALTER TABLE {target} MODIFY {preparer.format_column(column)} TEXT'))
+
+
+def upgrade_schema():
+    '''补齐缺少的表、列、索引，返回 {'tables': [...], 'columns': [...], 'indexes': [...], 'widened': [...]}（本次改动的）'''
+    engine = db.engine
+    preparer = engine.dialect.identifier_preparer
+    inspector = inspect(engine)
+    created = {'tables': [], 'columns': [], 'indexes': [], 'widened': []}
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                table.create(conn)
+                created['tables'].append(table.name)
+                continue
+            existing_columns = {column['name']: column for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    length = getattr(existing_columns[column.name]['type'], 'length', None)
+                    if (table.name, column.name) in WIDEN_COLUMNS and length and engine.dialect.name != 'sqlite':
+                        _widen_column(conn, table, column, preparer)
+                        created['widened'].append(f'{table.name}.{column.name}')
+                    continue
+                #老数据没有值，新加的列一律允许为空（NOT NULL 约束留给正式的迁移脚本）
+                conn.execute(text(
+                    f'ALTER TABLE {preparer.format_table(table)} '
+                    f'ADD COLUMN {preparer.format_column(column)} {column.type.compile(engine.dialect)}'
+                ))
+                source = BACKFILL_COLUMNS.get((table.name, column.name))
+                if source:
+                    target = preparer.format_column(column)
+                    conn.execute(text(
+                        f'UPDATE {preparer.format_table(table)} SET {target} = {preparer.quote(source)} '
+                        f'WHERE {target} IS NULL'
+                    ))
+                created['columns'].append(f'{table.name}.{column.name}')
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    created['indexes'].append(index.name)
+    return created
+
+
+def bootstrap_derived():
+    '''初始化派生表：全文索引表不存在时创建并回填，各计数表为空但已有数据时统计一遍'''
+    from app.utils.search import init_search_index
+    from app.utils.facets import init_facets
+    from app.utils.recommend import init_recommendations
+    from app.utils.price_stats import init_price_stats
+    init_search_index()
+    init_facets()
+    init_recommendations()
+    init_price_stats()
@@ -0,0 +1,189 @@
+#app/utils/search.py：书籍全文检索索引
+#SQLite 下使用 FTS5 影子表 books_fts（rowid = books.id），Postgres 下使用 tsvector + GIN 索引，
+#其他数据库（如 MySQL）退回到多字段 LIKE 模糊查询。
+#中文没有空格分词，这里在 Python 侧把连续汉字切成重叠的二元组（“高等数学” -> 高等 等数 数学），
+#英文/数字按单词切分并转小写，查询词用同样的规则切分后做 AND 匹配，因此两个字以上的中文词都能命中。
+import re
+from sqlalchemy import text, inspect
+from app import db
+
+#参与检索的字段及其权重（bm25 / ts_rank 使用），书名最重要
+SEARCH_FIELDS = ('title', 'author', 'course_tag', 'description')
+FIELD_WEIGHTS = (10.0, 4.0, 3.0, 1.0)
+PG_WEIGHT_LABELS = ('A', 'B', 'B', 'D')
+
+#汉字（含扩展A区、兼容区）连续片段 或 英文数字单词
+_CJK = '㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(f'[{_CJK}]+|[0-9a-zA-Z]+')
+_CJK_RE = re.compile(f'^[{_CJK}]+$')
+
+
+def tokenize(value):
+    #把一段文本切成检索用的词元列表
+    tokens = []
+    for piece in _TOKEN_RE.findall(value or ''):
+        if _CJK_RE.match(piece):
+            if len(piece) == 1:
+                tokens.append(piece)
+            else:
+                #连续汉字切成重叠二元组
+                tokens.extend(piece[i:i + 2] for i in range(len(piece) - 1))
+        else:
+            tokens.append(piece.lower())
+    return tokens
+
+
+def _document(value):
+    #写入索引的文本：词元之间用空格隔开，交给 FTS5 unicode61 / to_tsvector('simple') 再切一次
+    return ' '.join(tokenize(value))
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    '''给 Flask-Migrate（alembic autogenerate）用：索引表不是模型建的，
+    flask db migrate 时跳过 books_fts 及 FTS5 的影子表（books_fts_data 等），不生成删除它们的迁移'''
+    if type_ == 'table' and name.startswith('books_fts'):
+        return False
+    if type_ == 'index' and name.startswith('ix_books_fts'):
+        return False
+    return True
+
+
+def init_search_index():
+    #创建索引表（已存在则跳过）；首次创建时用 books 表现有数据回填
+    dialect = _dialect()
+    if dialect not in ('sqlite', 'postgresql'):
+        return
+    if inspect(db.engine).has_table('books_fts'):
+        return
+    with db.engine.begin() as conn:
+        if dialect == 'sqlite':
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+                "title, author, course_tag, description, tokenize='unicode61')"
+            ))
+        else:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS books_fts ("
+                "book_id INTEGER PRIMARY KEY, document TSVECTOR NOT NULL)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_books_fts_document ON books_fts USING GIN (document)"
+            ))
+    if inspect(db.engine).has_table('books'):
+        rebuild_search_index()
+
+
+def rebuild_search_index():
+    #全量重建：只索引在售书籍（status=1），返回写入的条数
+    from app.models.book import Book
+    db.session.execute(text('DELETE FROM books_fts'))
+    count, last_id = 0, 0
+    while True:
+        #按主键分批读取，避免一次把整张表读进内存
+        batch = Book.query.filter(Book.status == 1, Book.id > last_id).order_by(Book.id).limit(1000).all()
+        if not batch:
+            break
+        _insert_documents(batch)
+        count += len(batch)
+        last_id = batch[-1].id
+    db.session.commit()
+    return count
+
+
+def _insert_documents(books):
+    #批量写入索引（executemany），调用方保证这些书还不在索引里
+    params = [
+        {'id': book.id, **{field: _document(getattr(book, field)) for field in SEARCH_FIELDS}}
+        for book in books
+    ]
+    if not params:
+        return
+    if _dialect() == 'sqlite':
+        db.session.execute(text(
+            'INSERT INTO books_fts (rowid, title, author, course_tag, description) '
+            'VALUES (:id, :title, :author, :course_tag, :description)'
+        ), params)
+    else:
+        vector = ' || '.join(
+            f"setweight(to_tsvector('simple', :{field}), '{label}')"
+            for field, label in zip(SEARCH_FIELDS, PG_WEIGHT_LABELS)
+        )
+        db.session.execute(text(
+            f'INSERT INTO books_fts (book_id, document) VALUES (:id, {vector})'
+        ), params)
+
+
+def index_book(book):
+    #把一本书写入（或覆盖）索引，和业务数据在同一个事务里提交
+    if _dialect() not in ('sqlite', 'postgresql'):
+        return
+    remove_book(book.id)
+    _insert_documents([book])
+
+
+def index_books(books):
+    #批量写入新书的索引（批量导入用，一批书一条 executemany），调用方保证这些书还不在索引里
+    if _dialect() not in ('sqlite', 'postgresql'):
+        return
+    _insert_documents(books)
+
+
+def remove_book(book_id):
+    #书籍下架/售出时从索引中删除
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        db.session.execute(text('DELETE FROM books_fts WHERE rowid = :id'), {'id': book_id})
+    elif dialect == 'postgresql':
+        db.session.execute(text('DELETE FROM books_fts WHERE book_id = :id'), {'id': book_id})
+
+
+def remove_books(book_ids):
+    #批量从索引中删除（一条 executemany）
+    params = [{'id': book_id} for book_id in book_ids]
+    dialect = _dialect()
+    if not params:
+        return
+    if dialect == 'sqlite':
+        db.session.execute(text('DELETE FROM books_fts WHERE rowid = :id'), params)
+    elif dialect == 'postgresql':
+        db.session.execute(text('DELETE FROM books_fts WHERE book_id = :id'), params)
+
+
+def search_subquery(keyword):
+    '''根据搜索词返回 (book_id, rank) 子查询，rank 越小越相关；
+    返回 None 表示当前数据库不支持全文索引或搜索词切不出词元，由调用方退回 LIKE 查询'''
+    tokens = tokenize(keyword)
+    dialect = _dialect()
+    if not tokens or dialect not in ('sqlite', 'postgresql'):
+        return None
+
+    if dialect == 'sqlite':
+        #每个词元加引号避免被当成 FTS5 语法；最后一个英文词或单个汉字做前缀匹配，边输边搜也能命中
+        terms = [f'"{token}"' for token in tokens]
+        if len(tokens[-1]) == 1 or not _CJK_RE.match(tokens[-1]):
+            terms[-1] += '*'
+        weights = ', '.join(str(w) for w in FIELD_WEIGHTS)
+        stmt = text(
+            f'SELECT rowid AS book_id, bm25(books_fts, {weights}) AS rank '
+            'FROM books_fts WHERE books_fts MATCH :match'
+        ).bindparams(match=' '.join(terms))
+    else:
+        stmt = text(
+            "SELECT book_id, -ts_rank(document, plainto_tsquery('simple', :match)) AS rank "
+            "FROM books_fts WHERE document @@ plainto_tsquery('simple', :match)"
+        ).bindparams(match=' '.join(tokens))
+
+    return stmt.columns(
+        db.column('book_id', db.Integer), db.column('rank', db.Float)
+    ).subquery('book_search')
+
+
+def like_filter(keyword):
+    #不支持全文索引时的兜底：在书名/作者/课程/描述中做模糊匹配
+    from app.models.book import Book
+    pattern = f'%{keyword}%'
+    return db.or_(*(getattr(Book, field).like(pattern) for field in SEARCH_FIELDS))
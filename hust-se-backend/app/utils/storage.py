@@ -0,0 +1,148 @@
+#app/utils/storage.py：上传文件存储（按内容哈希寻址 + 去重 + 引用计数）
+#1. 上传时 Werkzeug 解析 multipart 的过程中，文件内容按块直接写进 UPLOAD_FOLDER/.tmp 下的临时文件，
+#   同时计算 sha256、累计大小，超过 MAX_IMAGE_SIZE 立刻中断（413），不会整份读进内存。
+#2. 保存时按哈希放到分片目录 ab/cd/<sha256>.<ext>；同样内容的文件已存在就直接删掉临时文件复用旧文件，
+#   第一次保存时去掉图片里的 EXIF 等元数据（见 images.strip_metadata）。
+#3. upload_files 表记录每个文件被多少本书引用（目前没有删除/修改书籍的接口，引用只增不减；
+#   以后加上这类接口时按引用数归零再删除文件及其缩略图）。
+#4. 文件在事务提交前就写到了最终位置：调用方把 created 列表传给 save_upload，事务回滚后交给 discard_uploads()，
+#   删掉这次新写入、但没有任何已提交记录引用的文件，失败的请求不会留下孤儿文件。
+import hashlib
+import os
+import tempfile
+from flask import Request, current_app
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import RequestEntityTooLarge
+from app import db
+from app.utils.images import UPLOAD_URL_PREFIX, strip_metadata
+
+
+class HashingFile:
+    '''边写边算哈希的临时文件，作为 Werkzeug 解析上传文件时的写入目标'''
+
+    def __init__(self, directory, max_size):
+        os.makedirs(directory, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=directory, delete=False, suffix='.part')
+        self.path = self._file.name
+        self.max_size = max_size
+        self.size = 0
+        self.moved = False
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size and self.size > self.max_size:
+            #解析中途抛异常时这个临时文件还没交给 request.files，请求结束不会被关闭，这里自己清理
+            self.close()
+            limit = f'{self.max_size // (1024 * 1024)}MB' if self.max_size >= 1024 * 1024 else f'{self.max_size // 1024}KB'
+            raise RequestEntityTooLarge(f'单个文件不能超过 {limit}')
+        self._sha256.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+    def close(self):
+        #请求结束时 Werkzeug 会关闭上传文件；没有被 save_upload 收走的临时文件在这里删掉
+        if not self._file.closed:
+            self._file.close()
+        if not self.moved and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        #read / seek / tell / flush 等直接转给底层文件
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    #替换 Flask 默认的 Request：上传文件直接流式写到磁盘临时文件
+    #个别接口（批量导入）允许更大的上传，在读取 request.files / request.stream 之前设置这两个属性即可
+    file_size_limit = None        #单个文件上限，默认 MAX_IMAGE_SIZE
+    content_length_limit = None   #整个请求体上限，默认 MAX_CONTENT_LENGTH
+
+    @property
+    def max_content_length(self):
+        return self.content_length_limit or current_app.config['MAX_CONTENT_LENGTH']
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        config = current_app.config
+        return HashingFile(os.path.join(config['UPLOAD_FOLDER'], '.tmp'),
+                           self.file_size_limit or config.get('MAX_IMAGE_SIZE'))
+
+
+def save_upload(file_storage, created=None):
+    '''保存一个上传文件，返回访问 URL（/static/uploads/ab/cd/<sha256>.<ext>）。
+    同时在当前数据库事务里把引用计数 +1，调用方负责 commit；
+    传入 created 列表时，文件是这次新写入的就把它的相对路径追加进去（回滚后交给 discard_uploads）'''
+    from app.models.upload import UploadFile
+
+    stream = file_storage.stream
+    _, extension = os.path.splitext(file_storage.filename or '')
+    extension = extension.lower()
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+
+    if isinstance(stream, HashingFile):
+        stream.flush()
+        digest, size, temp_path = stream.hexdigest(), stream.size, stream.path
+    else:
+        #不是经过 UploadRequest 上传的（例如测试里直接构造 FileStorage），先落盘再算哈希
+        directory = os.path.join(upload_folder, '.tmp')
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        sha256, size = hashlib.sha256(), 0
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(64 * 1024), b''):
+                sha256.update(chunk)
+                size += len(chunk)
+                out.write(chunk)
+        digest = sha256.hexdigest()
+
+    record = UploadFile.query.get(digest)
+    relative_path = record.path if record else f'{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+    final_path = os.path.join(upload_folder, relative_path)
+
+    if os.path.exists(final_path):
+        os.remove(temp_path)  #内容相同的文件已经存在，直接复用
+    else:
+        #原图会公开访问，先去掉 EXIF 等元数据（哈希仍按上传的原始内容算，同一张照片再次上传照样去重）
+        strip_metadata(temp_path)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(temp_path, final_path)
+        if created is not None:
+            created.append(relative_path)
+    if isinstance(stream, HashingFile):
+        stream.moved = True
+
+    #引用计数 +1：用 SQL 自增而不是读出来再写回，并发上传同一文件时不会丢计数
+    increment = db.update(UploadFile).where(UploadFile.sha256 == digest) \
+        .values(ref_count=UploadFile.ref_count + 1)
+    if not db.session.execute(increment).rowcount:
+        try:
+            with db.session.begin_nested():
+                db.session.add(UploadFile(sha256=digest, path=relative_path, size=size, ref_count=1))
+        except IntegrityError:
+            #另一个请求刚好先插入了同一个文件的记录
+            db.session.execute(increment)
+    return UPLOAD_URL_PREFIX + relative_path
+
+
+def discard_uploads(relative_paths):
+    '''事务回滚之后调用：删掉 save_upload 新写入、但 upload_files 里没有记录的文件'''
+    from app.models.upload import UploadFile
+    if not relative_paths:
+        return
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    #回滚后还有记录，说明别的请求同时上传了同一个文件并已提交，文件要保留
+    referenced = set(db.session.execute(
+        db.select(UploadFile.path).where(UploadFile.path.in_(relative_paths))
+    ).scalars())
+    for relative_path in set(relative_paths) - referenced:
+        try:
+            os.remove(os.path.join(upload_folder, relative_path))
+        except FileNotFoundError:
+            pass
+
+
+def split_images(images):
+    #Book.images 是逗号分隔的 URL 列表
+    return [url for url in (images or '').split(',') if url]
@@ -0,0 +1,51 @@
+#benchmarks/bench_auth.py：登录态接口吞吐量对比（每次查 users 表 vs login_required 用户缓存）
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_auth --requests 5000
+import argparse
+import os
+import tempfile
+import time
+
+ENDPOINTS = ['/user/info', '/order/list']
+
+
+def run(app, total):
+    client = app.test_client()
+    client.post('/user/register', json={'phone': '13800000001', 'password': '123456', 'username': 'bench'})
+    client.post('/user/login', json={'phone': '13800000001', 'password': '123456'})
+    results = {}
+    for path in ENDPOINTS:
+        client.get(path)  #预热
+        t0 = time.perf_counter()
+        for _ in range(total):
+            client.get(path)
+        results[path] = total / (time.perf_counter() - t0)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    from app import create_app, db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+    from app.config import Config
+
+    print(f'{"接口":<14}{"无缓存(req/s)":>16}{"用户缓存(req/s)":>18}')
+    rows = {}
+    for ttl in (0, Config.USER_CACHE_TTL):
+        app = create_app()
+        app.config['USER_CACHE_TTL'] = ttl
+        with app.app_context():
+            db.drop_all()
+            upgrade_schema()
+            bootstrap_derived()
+        rows[ttl] = run(app, args.requests)
+    for path in ENDPOINTS:
+        print(f'{path:<14}{rows[0][path]:>16.0f}{rows[Config.USER_CACHE_TTL][path]:>18.0f}')
+
+
+if __name__ == '__main__':
+    main()
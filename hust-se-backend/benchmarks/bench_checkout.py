@@ -0,0 +1,59 @@
+#benchmarks/bench_checkout.py：逐本 /order/create 和一次 /order/checkout 的耗时与 SQL 条数对比
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_checkout --carts 200 --size 5
+#买家依次结算 --carts 个购物车，每个购物车 --size 本书：一种方式是对每本书各调一次 /order/create，
+#另一种是整车调一次 /order/checkout，分别统计每个购物车的平均耗时和平均执行的 SQL 条数。
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import event
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--carts', type=int, default=200, help='购物车数量')
+    parser.add_argument('--size', type=int, default=5, help='每个购物车的书籍数')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'checkout.db')
+    from app import create_app, db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+    from app.models.book import Book
+
+    app = create_app()
+    app.config['RATELIMIT_ENABLED'] = False
+    app.config['METRICS_ENABLED'] = False
+    seller, buyer = app.test_client(), app.test_client()
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+        seller.post('/user/register', json={'phone': '13800000000', 'password': '123456', 'username': 'seller'})
+        buyer.post('/user/register', json={'phone': '13800000001', 'password': '123456', 'username': 'buyer'})
+        total = args.carts * args.size * 2
+        db.session.add_all(Book(title=f'高等数学 {i}', author='同济大学', course_tag='高等数学', condition='九成新',
+                                price=20, seller_id=1, status=1) for i in range(total))
+        db.session.commit()
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(1))
+    buyer.post('/user/login', json={'phone': '13800000001', 'password': '123456'})
+
+    book_id = iter(range(1, total + 1))
+    for name in ('create', 'checkout'):
+        statements.clear()
+        t0 = time.perf_counter()
+        for _ in range(args.carts):
+            cart = [next(book_id) for _ in range(args.size)]
+            if name == 'create':
+                for one in cart:
+                    assert buyer.post('/order/create', json={'book_id': one}).status_code == 200
+            else:
+                assert buyer.post('/order/checkout', json={'book_ids': cart}).status_code == 200
+        cost = time.perf_counter() - t0
+        print(f'/order/{name}：每个购物车 {cost / args.carts * 1000:.1f}ms，'
+              f'{len(statements) / args.carts:.1f} 条 SQL')
+
+
+if __name__ == '__main__':
+    main()
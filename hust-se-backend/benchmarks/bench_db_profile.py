@@ -0,0 +1,110 @@
+#benchmarks/bench_db_profile.py：读写混合并发下，默认 SQLite 设置 vs 生产配置（WAL 等 PRAGMA）的对比
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_db_profile --seconds 10 --readers 8 --writers 2
+#读线程不停请求 /book/list（关闭响应缓存，直接打数据库），写线程不停发布书籍，
+#统计两种配置下的读/写吞吐、读请求 p50/p95 延迟和失败数（database is locked 等）。
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(config_class, args):
+    from app import create_app, db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+
+    workdir = tempfile.mkdtemp()
+    db_uri = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+
+    class BenchConfig(config_class):
+        SQLALCHEMY_DATABASE_URI = db_uri
+        UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+        RESPONSE_CACHE_ENABLED = False
+        RATELIMIT_ENABLED = False   #所有虚拟用户都从同一个地址注册/登录
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+
+    def login(phone):
+        client = app.test_client()
+        client.post('/user/register', json={'phone': phone, 'password': '123456', 'username': phone})
+        client.post('/user/login', json={'phone': phone, 'password': '123456'})
+        return client
+
+    seller = login('13800000000')
+    for i in range(200):
+        seller.post('/book/create', data={'title': f'高等数学 {i}', 'course_tag': '数学', 'condition': '9', 'price': '20'})
+
+    stop = threading.Event()
+    read_latency, write_count, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def reader():
+        client = app.test_client()
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            resp = client.get('/book/list', query_string={'course_tag': '数学', 'per_page': 20})
+            cost = (time.perf_counter() - t0) * 1000
+            with lock:
+                if resp.status_code == 200:
+                    read_latency.append(cost)
+                else:
+                    errors[0] += 1
+
+    def writer(index):
+        client = login(f'1390000{index:04d}')
+        n = 0
+        while not stop.is_set():
+            resp = client.post('/book/create', data={'title': f'线性代数 {index}-{n}', 'course_tag': '数学',
+                                                     'condition': '9', 'price': '15'})
+            n += 1
+            with lock:
+                if resp.status_code == 200:
+                    write_count[0] += 1
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return {
+        'reads/s': len(read_latency) / args.seconds,
+        'writes/s': write_count[0] / args.seconds,
+        'read p50(ms)': percentile(read_latency, 0.5),
+        'read p95(ms)': percentile(read_latency, 0.95),
+        'errors': errors[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    args = parser.parse_args()
+
+    from app.config import Config, ProductionConfig
+    results = {'默认配置': run(Config, args), '生产配置(WAL)': run(ProductionConfig, args)}
+    metrics = list(next(iter(results.values())).keys())
+    print(f'{"":<16}' + ''.join(f'{m:>14}' for m in metrics))
+    for name, row in results.items():
+        print(f'{name:<16}' + ''.join(f'{row[m]:>14.1f}' for m in metrics))
+
+
+if __name__ == '__main__':
+    main()
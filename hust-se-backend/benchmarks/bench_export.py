@@ -0,0 +1,74 @@
+#benchmarks/bench_export.py：订单导出的吞吐量和内存占用
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_export --orders 20000 200000
+#给同一个卖家批量写入订单，依次导出 --orders 指定的数量（CSV 和 NDJSON 各一次），
+#记录每秒导出行数和进程峰值内存；订单数增加 10 倍时峰值内存应基本不变。
+import argparse
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def peak_rss_mb():
+    #Linux 上 ru_maxrss 单位是 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, nargs='+', default=[20000, 200000], help='导出的订单数，可以给多个（递增）')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'export.db')
+    from app import create_app, db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+    from app.models.book import Book
+    from app.models.order import Order
+    from app.utils.idgen import IdGenerator
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+    seller = app.test_client()
+    seller.post('/user/register', json={'phone': '13800000000', 'password': '123456', 'username': 'seller'})
+    seller.post('/user/login', json={'phone': '13800000000', 'password': '123456'})
+    buyer = app.test_client()
+    buyer.post('/user/register', json={'phone': '13800000001', 'password': '123456', 'username': 'buyer'})
+
+    generator = IdGenerator()
+    written = 0
+    start = datetime(2025, 1, 1)
+    for total in sorted(args.orders):
+        #补齐到 total 条订单（每条订单对应一本已售出的书）
+        with app.app_context():
+            for offset in range(written, total, 10000):
+                size = min(10000, total - offset)
+                db.session.execute(Book.__table__.insert(), [
+                    {'id': offset + i + 1, 'title': f'高等数学 {offset + i}', 'author': '同济', 'course_tag': '高等数学',
+                     'condition': '九成新', 'price': 20.0, 'images': '', 'seller_id': 1, 'status': 0,
+                     'create_time': start, 'updated_at': start} for i in range(size)])
+                db.session.execute(Order.__table__.insert(), [
+                    {'order_no': generator.next_order_no(), 'buyer_id': 2, 'seller_id': 1, 'book_id': offset + i + 1,
+                     'price': 20.0, 'status': 4, 'create_time': start + timedelta(minutes=offset + i)} for i in range(size)])
+            db.session.commit()
+        written = total
+
+        for fmt in ('csv', 'ndjson'):
+            before = peak_rss_mb()
+            t0 = time.perf_counter()
+            resp = seller.get(f'/order/export?role=seller&format={fmt}', buffered=False)
+            size = 0
+            for chunk in resp.response:
+                size += len(chunk)
+            resp.close()
+            cost = time.perf_counter() - t0
+            print(f'导出 {total} 条订单（{fmt}）：{cost:.2f}s，{total / cost:.0f} 行/s，{size / 1024 / 1024:.1f}MB，'
+                  f'峰值内存 {before:.0f}MB -> {peak_rss_mb():.0f}MB')
+
+
+if __name__ == '__main__':
+    main()
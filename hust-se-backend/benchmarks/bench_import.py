@@ -0,0 +1,76 @@
+#benchmarks/bench_import.py：批量导入 vs 逐本发布的吞吐量，以及大文件导入时的内存占用
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_import --single 500 --rows 10000 100000
+#1. 用 /book/create 逐本发布 --single 本书，记录每秒发布数；
+#2. 依次用 /book/import 导入 --rows 指定行数的 CSV（请求体直接从磁盘文件流式读取），记录每秒导入行数和进程峰值内存，
+#   行数增加 10 倍时峰值内存应基本不变。
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+
+from benchmarks.seed import COURSES, COURSE_WEIGHTS, GRADES, skewed_price
+
+
+def write_csv(path, rows, rng):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('title,author,course_tag,grade_tag,condition,price,description\n')
+        for i in range(rows):
+            course = rng.choices(COURSES, COURSE_WEIGHTS)[0]
+            f.write(f'{course} 第{i}本,教材编写组,{course},{rng.choice(GRADES)},九成新,{skewed_price(rng)},期末清仓\n')
+
+
+def peak_rss_mb():
+    #Linux 上 ru_maxrss 单位是 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--single', type=int, default=500, help='逐本发布的数量')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='导入文件的行数，可以给多个')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'import.db')
+    from app import create_app, db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+    client = app.test_client()
+    client.post('/user/register', json={'phone': '13800000000', 'password': '123456', 'username': 'seller'})
+    client.post('/user/login', json={'phone': '13800000000', 'password': '123456'})
+    rng = random.Random(2025)
+
+    t0 = time.perf_counter()
+    for i in range(args.single):
+        client.post('/book/create', data={'title': f'高等数学 {i}', 'course_tag': '高等数学', 'condition': '九成新',
+                                          'price': str(skewed_price(rng))})
+    cost = time.perf_counter() - t0
+    print(f'/book/create 逐本发布 {args.single} 本：{cost:.2f}s，{args.single / cost:.0f} 本/s')
+
+    for rows in args.rows:
+        path = os.path.join(workdir, f'books-{rows}.csv')
+        write_csv(path, rows, rng)
+        before = peak_rss_mb()
+        t0 = time.perf_counter()
+        with open(path, 'rb') as f:
+            resp = client.post('/book/import', input_stream=f, content_type='text/csv',
+                               headers={'Content-Length': str(os.path.getsize(path))}, buffered=False)
+            #逐行消费结果，和真实客户端一样不把整个响应攒在内存里
+            last = None
+            for line in resp.response:
+                last = line
+            resp.close()
+        cost = time.perf_counter() - t0
+        print(f'/book/import {rows} 行：{cost:.2f}s，{rows / cost:.0f} 行/s，'
+              f'峰值内存 {before:.0f}MB -> {peak_rss_mb():.0f}MB，汇总 {last.decode().strip()}')
+
+
+if __name__ == '__main__':
+    main()
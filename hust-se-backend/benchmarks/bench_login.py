@@ -0,0 +1,99 @@
+#benchmarks/bench_login.py：撞库攻击下的登录吞吐量和书籍浏览吞吐量
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_login --attackers 8 --seconds 10
+#--attackers 个线程从少数几个地址用已注册的手机号+错误密码不停请求 /user/login（模拟撞库脚本），
+#同时一个线程持续浏览 /book/list、一个正常用户每秒登录一次。分别在关闭/打开限流时统计：
+#攻击请求中真正走到密码哈希的数量、被 429 拒绝的数量、浏览接口 req/s、正常登录的平均耗时。
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+VICTIMS = 500   #撞库名单里真实存在的账号数（手机号不存在时不会走到哈希，撞库脚本用的是泄露的真实账号）
+
+
+def run(app, attackers, seconds, limited, interval):
+    app.config['RATELIMIT_ENABLED'] = limited
+    stop = threading.Event()
+    stats = {'attack_hashed': 0, 'attack_rejected': 0, 'browse': 0, 'login_ms': []}
+    lock = threading.Lock()
+
+    def attacker(index):
+        client = app.test_client()
+        client.environ_base['REMOTE_ADDR'] = f'203.0.113.{index % 2}'   #撞库脚本通常只有少数几个出口 IP
+        rng = random.Random(index)
+        while not stop.is_set():
+            resp = client.post('/user/login', json={'phone': f'139{rng.randrange(VICTIMS):08d}', 'password': 'guess'})
+            with lock:
+                stats['attack_rejected' if resp.status_code == 429 else 'attack_hashed'] += 1
+            time.sleep(interval)   #攻击方在另一台机器上，每个连接收到响应后才发下一个请求
+
+    def browser():
+        client = app.test_client()
+        while not stop.is_set():
+            client.get('/book/list', query_string={'page': random.randint(1, 5)})
+            with lock:
+                stats['browse'] += 1
+
+    def legit_user():
+        client = app.test_client()
+        client.environ_base['REMOTE_ADDR'] = '10.0.0.1'
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            client.post('/user/login', json={'phone': '13800000000', 'password': '123456'})
+            stats['login_ms'].append((time.perf_counter() - t0) * 1000)
+            time.sleep(1)
+
+    threads = [threading.Thread(target=attacker, args=(i,)) for i in range(attackers)]
+    threads += [threading.Thread(target=browser), threading.Thread(target=legit_user)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    login_ms = sorted(stats['login_ms']) or [0]
+    print(f"限流{'开启' if limited else '关闭'}：攻击请求 {stats['attack_hashed'] + stats['attack_rejected']} 次"
+          f"（走到哈希 {stats['attack_hashed']}，429 拒绝 {stats['attack_rejected']}），"
+          f"浏览 {stats['browse'] / seconds:.0f} req/s，正常登录 p50 {login_ms[len(login_ms) // 2]:.0f}ms / 最慢 {login_ms[-1]:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--attackers', type=int, default=8)
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--interval', type=float, default=0.005, help='每个攻击线程两次请求之间的间隔（秒）')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'login.db')
+    from werkzeug.security import generate_password_hash
+    from app import create_app, db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+    from app.models.user import User
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    app.config['RESPONSE_CACHE_ENABLED'] = False
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+        password_hash = generate_password_hash('123456', app.config['PASSWORD_HASH_METHOD'])
+        db.session.execute(User.__table__.insert(), [
+            {'phone': f'139{i:08d}', 'username': f'victim{i}', 'password_hash': password_hash} for i in range(VICTIMS)])
+        db.session.commit()
+    client = app.test_client()
+    client.post('/user/register', json={'phone': '13800000000', 'password': '123456', 'username': 'seller'})
+    client.post('/user/login', json={'phone': '13800000000', 'password': '123456'})
+    for i in range(50):
+        client.post('/book/create', data={'title': f'高等数学 {i}', 'course_tag': '高等数学', 'condition': '九成新', 'price': '20'})
+
+    print(f"密码哈希参数 {app.config['PASSWORD_HASH_METHOD']}，同时哈希上限 {app.config['PASSWORD_HASH_CONCURRENCY']}")
+    run(app, args.attackers, args.seconds, False, args.interval)
+    run(app, args.attackers, args.seconds, True, args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#benchmarks/bench_order_jobs.py：订单定时任务消化积压订单的速度，以及对同时下单的用户的影响
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_order_jobs --backlog 2000 --batch-sizes 100 500 2000
+#每个场景新建一个库（生产配置，WAL），积压 --backlog 个超时未支付订单和 --backlog 个早已收货的订单，
+#一个买家线程在任务执行期间不停 /order/create 下单。对比：
+#  per-row：逐个加载订单 ORM 对象、改状态、书籍上架、每个订单一个事务（没有批处理时的写法）
+#  batch=N ：app/utils/order_jobs.py，每批 N 个订单一条 UPDATE、一个事务
+#输出处理速度、单个事务持有写锁的最长时间，以及同期下单请求的 p95 / 最长耗时。
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.seed import SEED_PASSWORD, seed
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def setup(backlog, batch_size):
+    from app import create_app, db
+    from app.config import ProductionConfig
+    from app.models.book import Book
+    from app.models.order import Order
+    from app.utils.facets import rebuild_facets
+    from app.utils.idgen import next_order_no
+    from app.utils.search import rebuild_search_index
+
+    workdir = tempfile.mkdtemp()
+
+    class BenchConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'jobs.db')
+        UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+        RATELIMIT_ENABLED = False
+        ORDER_JOBS_INTERVAL = 0
+        ORDER_JOBS_BATCH_SIZE = batch_size or 500
+
+    app = create_app(BenchConfig)
+    seed(app, {'users': 500, 'books': backlog * 2 + 5000, 'orders': 0}, random.Random(2025), log=lambda msg: None)
+    with app.app_context():
+        #前 2 * backlog 本书已售出：一半对应超时未支付的订单，一半对应早就确认收货的订单
+        db.session.execute(db.update(Book).where(Book.id <= backlog * 2).values(status=0))
+        books = db.session.execute(db.select(Book.id, Book.seller_id, Book.price).where(Book.id <= backlog * 2)).all()
+        now = datetime.now()
+        rows = []
+        for i, (book_id, seller_id, price) in enumerate(books):
+            unpaid = i % 2 == 0
+            stale = now - (timedelta(hours=2) if unpaid else timedelta(days=30))
+            rows.append({'order_no': next_order_no(), 'buyer_id': 500 if seller_id != 500 else 499,
+                         'seller_id': seller_id, 'book_id': book_id, 'price': price, 'status': 1 if unpaid else 4,
+                         'create_time': stale, 'updated_at': stale})
+        db.session.execute(Order.__table__.insert(), rows)
+        db.session.commit()
+        rebuild_search_index()
+        rebuild_facets()
+    return app
+
+
+def per_row(app):
+    '''对照组：逐个订单加载 ORM 对象处理，每个订单一个事务；返回每个事务的耗时'''
+    from app import db
+    from app.models.order import Order
+    from app.utils import search as book_search
+    from app.utils import facets
+    from app.utils.cache import response_cache
+
+    lock_seconds = []
+    with app.app_context():
+        now = datetime.now()
+        received = Order.query.filter(Order.status == 4, Order.updated_at < now - timedelta(days=7)).all()
+        unpaid = Order.query.filter(Order.status == 1, Order.updated_at < now - timedelta(minutes=30)).all()
+        for order in received:
+            t0 = time.perf_counter()
+            order.status = 5
+            db.session.commit()
+            lock_seconds.append(time.perf_counter() - t0)
+        for order in unpaid:
+            t0 = time.perf_counter()
+            order.status = 6
+            book = order.book
+            book.status = 1
+            book_search.index_book(book)
+            facets.add_books([book])
+            db.session.commit()
+            lock_seconds.append(time.perf_counter() - t0)
+            response_cache.invalidate_books([book.id])
+    return lock_seconds
+
+
+def batched(app):
+    from app.utils import order_jobs
+    from app.utils.metrics import registry
+
+    lock_max = []
+    while sum(order_jobs.run_tick(app).values()):
+        lock_max.append(max(registry.job_last_lock_max.values()))
+    return lock_max
+
+
+def run(backlog, batch_size):
+    app = setup(backlog, batch_size)
+    buyer = app.test_client()
+    buyer.post('/user/login', json={'phone': f'1{500:010d}', 'password': SEED_PASSWORD})
+    stop = threading.Event()
+    latencies = []
+
+    def shopper():
+        book_id = backlog * 2
+        while not stop.is_set():
+            book_id += 1
+            t0 = time.perf_counter()
+            buyer.post('/order/create', json={'book_id': book_id})
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    thread = threading.Thread(target=shopper)
+    thread.start()
+    t0 = time.perf_counter()
+    lock_seconds = per_row(app) if batch_size is None else batched(app)
+    cost = time.perf_counter() - t0
+    stop.set()
+    thread.join()
+    name = 'per-row' if batch_size is None else f'batch={batch_size}'
+    print(f'{name:<12}{cost:>8.2f}s{backlog * 2 / cost:>10.0f} 行/s{max(lock_seconds) * 1000:>12.1f}ms'
+          f'{percentile(latencies, 0.95):>12.1f}ms{max(latencies, default=0):>10.1f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--backlog', type=int, default=2000, help='超时未支付 / 待自动完成的订单各多少个')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 500, 2000])
+    args = parser.parse_args()
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'unused.db'))
+
+    print(f'{"方式":<12}{"耗时":>9}{"速度":>12}{"最长写事务":>12}{"下单 p95":>12}{"下单最长":>10}')
+    run(args.backlog, None)
+    for batch_size in args.batch_sizes:
+        run(args.backlog, batch_size)
+
+
+if __name__ == '__main__':
+    main()
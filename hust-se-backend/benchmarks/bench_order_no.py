@@ -0,0 +1,53 @@
+#benchmarks/bench_order_no.py：订单号生成器吞吐量 + 多进程碰撞测试
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_order_no --processes 8 --count 200000
+#1. 单进程连续生成，测每秒生成数量；
+#2. fork 出多个进程（模拟多个 gunicorn worker）同时生成，检查全部订单号没有重复、每个进程内严格递增。
+import argparse
+import multiprocessing
+import sys
+import time
+
+from app.utils.idgen import IdGenerator, parse_id
+
+
+def generate(args):
+    count, = args
+    generator = IdGenerator()
+    values = [generator.next_order_no() for _ in range(count)]
+    return generator.worker_id, values
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--count', type=int, default=200000)
+    args = parser.parse_args()
+
+    generator = IdGenerator()
+    t0 = time.perf_counter()
+    for _ in range(args.count):
+        generator.next_order_no()
+    cost = time.perf_counter() - t0
+    print(f'单进程：{args.count} 个订单号耗时 {cost:.2f}s，{args.count / cost:,.0f} 个/秒')
+
+    with multiprocessing.get_context('fork').Pool(args.processes) as pool:
+        results = pool.map(generate, [(args.count,)] * args.processes)
+
+    all_values = []
+    failed = False
+    for worker_id, values in results:
+        increasing = all(a < b for a, b in zip(values, values[1:]))
+        failed = failed or not increasing
+        print(f'worker {worker_id}: {len(values)} 个，进程内递增={increasing}，最后一个 {values[-1]} -> {parse_id(values[-1])}')
+        all_values.extend(values)
+
+    duplicates = len(all_values) - len(set(all_values))
+    worker_ids = [worker_id for worker_id, _ in results]
+    print(f'{args.processes} 个进程共生成 {len(all_values)} 个订单号，重复 {duplicates} 个，'
+          f'worker id 各不相同={len(set(worker_ids)) == len(worker_ids)}')
+    if duplicates or failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
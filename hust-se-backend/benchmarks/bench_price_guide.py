@@ -0,0 +1,117 @@
+#benchmarks/bench_price_guide.py：定价参考（分桶草图）vs 每次扫订单表现算分位数的耗时和误差
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_price_guide --scale 100k --lookups 300
+#1. 用 benchmarks.seed 生成数据集（seed 结束时按订单表统计一遍分桶）；
+#2. 随机挑 --lookups 本书，用它的书名/作者、课程查询定价参考：
+#   sketch：app/utils/price_stats.price_guide，只读分桶表；
+#   scan  ：JOIN orders 和 books 取出最近 12 个月同书名作者 / 同课程的全部成交价，排序后取分位数（不建分桶表时的写法）；
+#   统计两者的平均 / p95 耗时，以及草图分位数相对精确值的最大误差；
+#3. 同一批查询请求两遍 /book/price-guide，第二遍命中响应缓存，统计接口耗时；
+#4. 再下 --orders 个单，统计维护分桶给 /order/create 带来的耗时和 SQL 条数。
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+
+from benchmarks.seed import SEED_PASSWORD, seed
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def exact_quantiles(prices, qs=(0.25, 0.5, 0.75)):
+    #和草图同样的取法：排名 q * (n - 1) 处的成交价
+    prices = sorted(prices)
+    return [prices[int(q * (len(prices) - 1))] for q in qs]
+
+
+def scan_guide(db, Book, Order, title, author, course_tag, since):
+    def prices(*conditions):
+        return db.session.execute(
+            db.select(Order.price).join(Book, Book.id == Order.book_id)
+            .where(Order.status != 6, Order.create_time >= since, *conditions)
+        ).scalars().all()
+    return (exact_quantiles(prices(Book.title == title, Book.author == author)),
+            exact_quantiles(prices(Book.course_tag == course_tag)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='100k')
+    parser.add_argument('--lookups', type=int, default=300)
+    parser.add_argument('--orders', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'price_guide.db')
+    from app import create_app, db
+    from app.config import Config
+    from app.models.book import Book
+    from app.models.order import Order
+    from app.utils.price_stats import price_guide, _first_period
+
+    class BenchConfig(Config):
+        ORDER_JOBS_INTERVAL = 0
+
+    app = create_app(BenchConfig)
+    seed(app, args.scale, random.Random(2025))
+    months = app.config['PRICE_GUIDE_MONTHS']
+    first = _first_period(months)
+    since = datetime(first // 100, first % 100, 1)
+
+    with app.app_context():
+        sold = db.session.execute(
+            db.select(Book.title, Book.author, Book.course_tag).join(Order, Order.book_id == Book.id)
+        ).all()
+        samples = random.Random(7).choices(sold, k=args.lookups)
+
+        sketch_ms, scan_ms, errors = [], [], []
+        for title, author, course_tag in samples:
+            t0 = time.perf_counter()
+            guide = price_guide(title, author, course_tag, months, min_samples=1)
+            sketch_ms.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            exact = scan_guide(db, Book, Order, title, author, course_tag, since)
+            scan_ms.append((time.perf_counter() - t0) * 1000)
+            for summary, values in zip((guide['title'], guide['course']), exact):
+                if summary:
+                    for key, value in zip(('p25', 'median', 'p75'), values):
+                        if value:
+                            errors.append(abs(summary[key] - value) / value)
+    print(f'sketch：平均 {sum(sketch_ms) / len(sketch_ms):.3f}ms，p95 {percentile(sketch_ms, 0.95):.3f}ms（两个维度合计）')
+    print(f'scan  ：平均 {sum(scan_ms) / len(scan_ms):.3f}ms，p95 {percentile(scan_ms, 0.95):.3f}ms')
+    print(f'分位数相对误差：最大 {max(errors) * 100:.2f}%，平均 {sum(errors) / len(errors) * 100:.2f}%')
+
+    client = app.test_client()
+    for label in ('未命中缓存', '命中缓存'):
+        latencies = []
+        for title, author, course_tag in samples:
+            t0 = time.perf_counter()
+            client.get('/book/price-guide', query_string={'title': title, 'author': author, 'course_tag': course_tag})
+            latencies.append((time.perf_counter() - t0) * 1000)
+        print(f'/book/price-guide（{label}）：平均 {sum(latencies) / len(latencies):.3f}ms，'
+              f'p95 {percentile(latencies, 0.95):.3f}ms')
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(1))
+        on_sale = db.session.execute(
+            db.select(Book.id).where(Book.status == 1, Book.seller_id != 1).limit(args.orders)
+        ).scalars().all()
+    client.post('/user/login', json={'phone': f'1{1:010d}', 'password': SEED_PASSWORD})
+    statements.clear()
+    t0 = time.perf_counter()
+    for book_id in on_sale:
+        client.post('/order/create', json={'book_id': book_id})
+    cost = time.perf_counter() - t0
+    print(f'/order/create（含成交价分桶维护）：平均 {cost / len(on_sale) * 1000:.2f}ms，'
+          f'每单 {len(statements) / len(on_sale):.1f} 条 SQL')
+
+
+if __name__ == '__main__':
+    main()
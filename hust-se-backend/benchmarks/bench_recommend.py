@@ -0,0 +1,99 @@
+#benchmarks/bench_recommend.py：详情页推荐接口 vs 每次临时 JOIN 订单表计算“一起购买”的耗时
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_recommend --scale 100k --requests 300
+#1. 用 benchmarks.seed 生成数据集（关闭响应缓存，每次都真正查库）；
+#2. 随机挑 --requests 本书请求 /book/<id>/recommendations，统计平均 / p95 耗时和 SQL 条数；
+#3. 对同一批书执行临时查询：JOIN orders 找出买过这门课的买家，再 JOIN 他们的其他订单按课程 GROUP BY，
+#   即不建计数表时的写法，统计平均 / p95 耗时；
+#4. 再下 --orders 个单，统计维护计数表给 /order/create 带来的额外 SQL 条数。
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from benchmarks.seed import SEED_PASSWORD, seed
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def adhoc_related(db, Book, Order, course_tag):
+    #不建计数表：买过这门课的买家 -> 他们买过的其他课程 -> 按人数排序
+    buyers = (
+        db.select(Order.buyer_id).join(Book, Book.id == Order.book_id)
+        .where(Book.course_tag == course_tag, Order.status != 6).distinct().subquery()
+    )
+    return db.session.execute(
+        db.select(Book.course_tag, db.func.count(db.distinct(Order.buyer_id)).label('buyers'))
+        .join(Order, Order.book_id == Book.id).join(buyers, buyers.c.buyer_id == Order.buyer_id)
+        .where(Book.course_tag != course_tag, Order.status != 6)
+        .group_by(Book.course_tag).order_by(db.desc('buyers')).limit(3)
+    ).all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='100k')
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--orders', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'recommend.db')
+    from app import create_app, db
+    from app.config import Config
+    from app.models.book import Book
+    from app.models.order import Order
+
+    class BenchConfig(Config):
+        RESPONSE_CACHE_ENABLED = False
+        ORDER_JOBS_INTERVAL = 0
+
+    app = create_app(BenchConfig)
+    sizes = seed(app, args.scale, random.Random(2025))
+    rng = random.Random(7)
+    book_ids = [rng.randint(1, sizes['books']) for _ in range(args.requests)]
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(1))
+    client = app.test_client()
+    latencies = []
+    statements.clear()
+    for book_id in book_ids:
+        t0 = time.perf_counter()
+        client.get(f'/book/{book_id}/recommendations')
+        latencies.append((time.perf_counter() - t0) * 1000)
+    print(f'/book/<id>/recommendations：平均 {sum(latencies) / len(latencies):.2f}ms，'
+          f'p95 {percentile(latencies, 0.95):.2f}ms，每次 {len(statements) / len(book_ids):.1f} 条 SQL')
+
+    latencies = []
+    with app.app_context():
+        courses = dict(db.session.execute(db.select(Book.id, Book.course_tag).where(Book.id.in_(book_ids))).all())
+        for book_id in book_ids:
+            t0 = time.perf_counter()
+            adhoc_related(db, Book, Order, courses[book_id])
+            latencies.append((time.perf_counter() - t0) * 1000)
+    print(f'临时 JOIN 计算一起购买（只算课程排名，不含取书）：平均 {sum(latencies) / len(latencies):.2f}ms，'
+          f'p95 {percentile(latencies, 0.95):.2f}ms')
+
+    client.post('/user/login', json={'phone': f'1{1:010d}', 'password': SEED_PASSWORD})
+    with app.app_context():
+        on_sale = db.session.execute(
+            db.select(Book.id).where(Book.status == 1, Book.seller_id != 1).limit(args.orders)
+        ).scalars().all()
+    statements.clear()
+    t0 = time.perf_counter()
+    for book_id in on_sale:
+        client.post('/order/create', json={'book_id': book_id})
+    cost = time.perf_counter() - t0
+    print(f'/order/create（含一起购买计数维护）：平均 {cost / len(on_sale) * 1000:.2f}ms，'
+          f'每单 {len(statements) / len(on_sale):.1f} 条 SQL')
+
+
+if __name__ == '__main__':
+    main()
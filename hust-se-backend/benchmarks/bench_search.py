@@ -0,0 +1,89 @@
+#benchmarks/bench_search.py：书籍搜索性能对比（原 title LIKE '%q%' vs FTS5 全文索引）
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_search --rows 500000
+#会在临时目录生成一个 SQLite 数据库，不会动 app/app.db
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+WORDS = ['高等数学', '线性代数', '概率论', '大学物理', '数据结构', '操作系统', '计算机网络', '编译原理',
+         '电路分析', '信号与系统', '大学英语', '马克思主义', '有机化学', 'Python', 'Java', 'C++']
+COURSES = ['数学', '物理', '计算机', '电气', '英语', '化学', '思政']
+AUTHORS = ['同济大学', '严蔚敏', '谭浩强', '高等教育出版社', 'Eric Matthes', '清华大学出版社']
+QUERIES = ['高等数学', '数据结构', '操作系统 第三版', 'python', '严蔚敏', '信号']
+
+
+def seed(conn, rows):
+    #直接用 executemany 批量插入，生成数据本身不计入测试时间
+    conn.exec_driver_sql("INSERT INTO users (id, phone, password_hash, username, credit) VALUES (1, '1', 'x', 'seller', 100)")
+    start = datetime(2025, 1, 1)
+    batch = []
+    for i in range(1, rows + 1):
+        title = f'{random.choice(WORDS)} 第{random.randint(1, 9)}版'
+        batch.append((i, title, random.choice(AUTHORS), random.choice(COURSES), '9成新',
+                      round(random.uniform(5, 80), 1), f'{title} 笔记很少，{random.choice(WORDS)}配套',
+                      1, start + timedelta(seconds=i), 1 if random.random() < 0.8 else 0))
+        if len(batch) == 10000:
+            conn.exec_driver_sql(
+                'INSERT INTO books (id, title, author, course_tag, condition, price, description, seller_id, create_time, status) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+            batch = []
+    if batch:
+        conn.exec_driver_sql(
+            'INSERT INTO books (id, title, author, course_tag, condition, price, description, seller_id, create_time, status) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+
+
+def timed(fn, repeat):
+    costs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        costs.append((time.perf_counter() - t0) * 1000)
+    costs.sort()
+    return costs[len(costs) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    from app import create_app, db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+    from app.models.book import Book
+    from app.utils import search as book_search
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+        with db.engine.begin() as conn:
+            seed(conn, args.rows)
+        t0 = time.perf_counter()
+        indexed = book_search.rebuild_search_index()
+        print(f'生成 {args.rows} 本书，索引 {indexed} 本在售书籍，建索引耗时 {time.perf_counter() - t0:.1f}s')
+
+        def like_path(keyword):
+            query = Book.query.filter_by(status=1).filter(Book.title.like(f'%{keyword}%'))
+            return query.order_by(Book.create_time.desc()).paginate(page=1, per_page=10, error_out=False).items
+
+        def fts_path(keyword):
+            matched = book_search.search_subquery(keyword)
+            query = Book.query.filter_by(status=1).join(matched, Book.id == matched.c.book_id)
+            return query.order_by(matched.c.rank).paginate(page=1, per_page=10, error_out=False).items
+
+        print(f'{"搜索词":<12}{"LIKE(ms)":>12}{"FTS5(ms)":>12}')
+        for keyword in QUERIES:
+            like_ms = timed(lambda: like_path(keyword), args.repeat)
+            fts_ms = timed(lambda: fts_path(keyword), args.repeat)
+            print(f'{keyword:<12}{like_ms:>12.1f}{fts_ms:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#benchmarks/bench_serialize.py：列表接口序列化的微基准，每 1000 行的耗时（毫秒）
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_serialize --rows 1000 --repeat 20
+#在内存里构造 --rows 本书（带卖家）和 --rows 个订单（带买家、卖家、书籍），不访问数据库，对比：
+#  before     ：原来的 to_dict()（每次新建状态映射表、strftime 格式化时间、总是输出全部字段）
+#  after      ：app/utils/serializers.py 预编译的 book_serializer / order_serializer，输出全部字段
+#  after+fields：只输出列表卡片用到的字段（/book/list?fields=...、/order/list?fields=...）
+#以及把序列化结果编码成 JSON 的耗时：Flask 默认的标准库 json 和 orjson（FAST_JSON，需要安装 orjson）。
+#每项重复 --repeat 次取最快的一次。
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BOOK_CARD_FIELDS = 'id,title,price,course_tag,thumbnail_url,status_text,seller_name'
+ORDER_CARD_FIELDS = 'id,order_no,book_title,price,status,status_text,create_time'
+
+
+def legacy_book_dict(book):
+    from app.utils.images import rendition_urls
+    from app.utils.storage import split_images
+    status_map = {1: '在售', 0: '已售'}
+    image_list = split_images(book.images)
+    renditions = rendition_urls(image_list[0] if image_list else '')
+    return {
+        'id': book.id, 'title': book.title, 'author': book.author, 'course_tag': book.course_tag,
+        'condition': book.condition, 'price': book.price, 'seller_id': book.seller_id,
+        'description': book.description, 'images': book.images, 'image_list': image_list,
+        'thumbnail_url': renditions['thumb'], 'medium_url': renditions['medium'], 'status': book.status,
+        'status_text': status_map.get(book.status, '未知'),
+        'create_time': book.create_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'seller_name': book.seller.username if book.seller else '未知卖家',
+        'seller_credit': book.seller.credit if book.seller else 'N/A'
+    }
+
+
+def legacy_order_dict(order):
+    return {
+        'id': order.id, 'order_no': order.order_no, 'buyer_id': order.buyer_id, 'buyer_name': order.buyer.username,
+        'seller_id': order.seller_id, 'seller_name': order.seller.username, 'book_id': order.book_id,
+        'book_title': order.book.title, 'price': order.price, 'status': order.status,
+        'status_text': order.get_status_text(), 'create_time': order.create_time.strftime('%Y-%m-%d %H:%M')
+    }
+
+
+def best(func, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def make_rows(rows):
+    from app.models.book import Book
+    from app.models.order import Order
+    from app.models.user import User
+    users = [User(id=i + 1, phone=f'1{i + 1:010d}', username=f'user{i + 1}', credit=100) for i in range(50)]
+    now = datetime(2025, 5, 20, 15, 30)
+    books, orders = [], []
+    for i in range(rows):
+        seller = users[i % len(users)]
+        book = Book(id=i + 1, title=f'高等数学（第七版）{i}', author='同济大学数学系', course_tag='高等数学',
+                    grade_tag='大一', condition='9成新', price=20.0 + i % 30, seller_id=seller.id,
+                    description='轻微笔记，不影响阅读。' * 20, images='https://img.example.com/a.jpg,https://img.example.com/b.jpg',
+                    status=1, create_time=now - timedelta(minutes=i))
+        book.seller = seller
+        books.append(book)
+        buyer = users[(i + 1) % len(users)]
+        order = Order(id=i + 1, order_no=f'{i + 1:019d}', buyer_id=buyer.id, seller_id=seller.id, book_id=book.id,
+                      price=book.price, status=1 + i % 6, create_time=now - timedelta(minutes=i))
+        order.buyer, order.seller, order.book = buyer, seller, book
+        orders.append(order)
+    return books, orders
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'serialize.db')
+    from flask.json.provider import DefaultJSONProvider
+    from app import create_app
+    from app.config import Config
+    from app.models.book import book_serializer
+    from app.models.order import order_serializer
+    from app.utils.serializers import FastJSONProvider, orjson
+
+    class BenchConfig(Config):
+        ORDER_JOBS_INTERVAL = 0
+        UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+
+    app = create_app(BenchConfig)
+    per_1000 = 1000 / args.rows * 1000   #秒 -> 每 1000 行的毫秒数
+    with app.test_request_context():
+        books, orders = make_rows(args.rows)
+        book_fields = book_serializer.parse_fields(BOOK_CARD_FIELDS)
+        order_fields = order_serializer.parse_fields(ORDER_CARD_FIELDS)
+        cases = {
+            'book  before': lambda: [legacy_book_dict(book) for book in books],
+            'book  after': lambda: book_serializer.dump_many(books),
+            'book  after+fields': lambda: book_serializer.dump_many(books, book_fields),
+            'order before': lambda: [legacy_order_dict(order) for order in orders],
+            'order after': lambda: order_serializer.dump_many(orders),
+            'order after+fields': lambda: order_serializer.dump_many(orders, order_fields),
+        }
+        print(f'{"序列化":<22}{"ms/1000行":>12}')
+        payloads = {}
+        for name, func in cases.items():
+            seconds, payloads[name] = best(func, args.repeat)
+            print(f'{name:<22}{seconds * per_1000:>12.3f}')
+        assert payloads['book  before'] == payloads['book  after']
+        assert payloads['order before'] == payloads['order after']
+
+        providers = {'json': DefaultJSONProvider(app)}
+        if orjson is not None:
+            providers['orjson'] = FastJSONProvider(app)
+        print(f'\n{"JSON 编码":<22}' + ''.join(f'{name:>12}' for name in providers))
+        for name in ('book  before', 'book  after+fields', 'order before', 'order after+fields'):
+            body = {'code': 200, 'data': {'items': payloads[name]}}
+            cells = []
+            for provider in providers.values():
+                seconds, _ = best(lambda: provider.response(body), args.repeat)
+                cells.append(f'{seconds * per_1000:>12.3f}')
+            print(f'{name:<22}' + ''.join(cells))
+        if orjson is None:
+            print('未安装 orjson，跳过 orjson 编码对比')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#benchmarks/bench_serve.py：开发服务器（python run.py）与 gunicorn prefork 部署的启动时间、吞吐量对比，以及优雅退出检查
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.bench_serve --scale 10k --clients 16 --seconds 15
+#先用 benchmarks.seed 在临时 SQLite 库里生成数据集，然后依次启动：
+#  dev       ：flask --debug run，和 python run.py 一样（单进程 + 自动重载）
+#  gunicorn  ：gunicorn -c gunicorn.conf.py wsgi:app，preload_app 打开
+#  no-preload：同上，但每个 worker 自己导入和初始化应用
+#1. 启动时间：从启动命令到第一个请求成功返回，以及（gunicorn）到所有 worker 都就绪；
+#2. 吞吐量：--clients 个客户端进程各用一条 keep-alive 连接，按比例请求列表页 / 筛选 / 详情，统计 req/s 和 p95；
+#3. 优雅退出（gunicorn）：几个用户不停地 /order/checkout 下单，中途给 master 发 SIGTERM，
+#   检查已经返回成功的订单都在库里、没有“书已售出但没有订单”的半截事务。
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+from benchmarks.seed import COURSES, SEED_PASSWORD, seed
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(kind, port, workers, env):
+    env = dict(env)
+    if kind == 'dev':
+        cmd = [sys.executable, '-m', 'flask', '--app', 'run:app', '--debug', 'run', '--port', str(port)]
+    else:
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+        env.update(GUNICORN_BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY=str(workers),
+                   GUNICORN_PRELOAD='0' if kind == 'no-preload' else '1')
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            text=True, start_new_session=True)
+    ready = []   #每个 worker 就绪的时刻
+
+    def watch():
+        for line in proc.stderr:
+            if '就绪' in line:
+                ready.append(time.perf_counter())
+
+    threading.Thread(target=watch, daemon=True).start()
+    while True:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                break
+        except OSError:
+            time.sleep(0.02)
+        if proc.poll() is not None:
+            raise RuntimeError(f'{kind} 启动失败')
+    first = time.perf_counter() - started
+    deadline = time.time() + 60
+    while kind != 'dev' and len(ready) < workers and time.time() < deadline:
+        time.sleep(0.02)
+    all_ready = max(ready) - started if kind != 'dev' and ready else first
+    return proc, first, all_ready
+
+
+def stop_server(proc):
+    os.killpg(proc.pid, signal.SIGTERM)
+    proc.wait(timeout=60)
+
+
+def client(args):
+    port, seconds, max_book_id, index = args
+    rng = random.Random(index)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    stop_at = time.perf_counter() + seconds
+    while time.perf_counter() < stop_at:
+        roll = rng.random()
+        if roll < 0.4:
+            path = f'/book/list?page={rng.randint(1, 5)}'
+        elif roll < 0.7:
+            path = f'/book/list?course_tag={quote(rng.choice(COURSES))}&page={rng.randint(1, 3)}'
+        else:
+            path = f'/book/{rng.randint(1, max_book_id)}'
+        t0 = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status >= 500:
+                errors += 1
+        except OSError:
+            errors += 1
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        latencies.append(time.perf_counter() - t0)
+    return latencies, errors
+
+
+def throughput(port, clients, seconds, max_book_id):
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(client, [(port, seconds, max_book_id, i) for i in range(clients)])
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+    return len(latencies) / seconds, latencies[int(len(latencies) * 0.95)] * 1000, errors
+
+
+def login(port, user_id):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request('POST', '/user/login', body=f'{{"phone": "1{user_id:010d}", "password": "{SEED_PASSWORD}"}}',
+                 headers={'Content-Type': 'application/json'})
+    resp = conn.getresponse()
+    resp.read()
+    return conn, resp.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def drain_check(proc, port, app, users=8):
+    '''不停下单的同时发 SIGTERM，返回 (成功下单的书籍数, 连接被拒的请求数, 不一致的书籍数)'''
+    from app import db
+    from app.models.book import Book
+    from app.models.order import Order
+    with app.app_context():
+        available = db.session.execute(
+            db.select(Book.id, Book.seller_id).where(Book.status == 1).order_by(Book.id).limit(5000)
+        ).all()
+    bought, refused, lock = [], [0], threading.Lock()
+
+    def buyer(user_id, books, conn, cookie):
+        books = [book_id for book_id, seller_id in books if seller_id != user_id]
+        for start in range(0, len(books), 5):
+            cart = books[start:start + 5]
+            try:
+                conn.request('POST', '/order/checkout', body=f'{{"book_ids": {cart}}}',
+                             headers={'Content-Type': 'application/json', 'Cookie': cookie})
+                resp = conn.getresponse()
+                body = json.loads(resp.read())
+            except OSError:
+                with lock:
+                    refused[0] += 1
+                return
+            if resp.status == 200:
+                with lock:
+                    bought.extend(result['book_id'] for result in body['data']['results'] if result['success'])
+
+    #先全部登录好（登录要算密码哈希，比较慢），再同时开始下单
+    sessions = [login(port, i + 1) for i in range(users)]
+    threads = [threading.Thread(target=buyer, args=(i + 1, available[i::users], *sessions[i])) for i in range(users)]
+    for t in threads:
+        t.start()
+    time.sleep(1)
+    proc.send_signal(signal.SIGTERM)   #只发给 master，由 master 通知各个 worker 优雅退出
+    for t in threads:
+        t.join()
+    proc.wait(timeout=60)
+    with app.app_context():
+        ordered = set(db.session.execute(db.select(Order.book_id).where(Order.book_id.in_(bought))).scalars())
+        sold_without_order = db.session.execute(
+            db.select(db.func.count(Book.id)).where(Book.status == 0, ~Book.id.in_(db.select(Order.book_id)))
+        ).scalar()
+    return len(bought), refused[0], len(set(bought) - ordered) + sold_without_order
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='10k')
+    parser.add_argument('--clients', type=int, default=16, help='压测客户端进程数')
+    parser.add_argument('--seconds', type=int, default=15)
+    parser.add_argument('--workers', type=int, help='gunicorn worker 数，默认按 gunicorn.conf.py 的规则（2 * 核数 + 1）')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(workdir, 'serve.db'))
+    os.environ.update(env)
+    from app import create_app
+    app = create_app()
+    sizes = seed(app, args.scale, random.Random(2025))
+    workers = args.workers or 2 * len(os.sched_getaffinity(0)) + 1
+
+    print(f'\n{"服务器":<12}{"首个请求(s)":>12}{"全部就绪(s)":>12}{"req/s":>10}{"p95(ms)":>10}{"错误":>6}')
+    for kind in ('dev', 'gunicorn', 'no-preload'):
+        proc, first, all_ready = start_server(kind, args.port, workers, env)
+        try:
+            rps, p95, errors = throughput(args.port, args.clients, args.seconds, sizes['books'])
+        finally:
+            stop_server(proc)
+        print(f'{kind:<12}{first:>12.2f}{all_ready:>12.2f}{rps:>10.0f}{p95:>10.1f}{errors:>6}')
+
+    proc, _, _ = start_server('gunicorn', args.port, workers, env)
+    bought, refused, broken = drain_check(proc, args.port, app)
+    print(f'\n优雅退出：SIGTERM 前后成功下单 {bought} 本，退出后被拒绝的请求 {refused} 个，不一致的书籍 {broken} 本')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#benchmarks/check_checkout.py：检查批量下单（/order/checkout）对 all_or_nothing 参数的处理
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.check_checkout
+#在临时 SQLite 库里准备一本在售书和一本已售书，买家带着不同的 all_or_nothing 取值同时结算这两本：
+#字符串 "false"/"true"、数字等非布尔值必须返回 400 且不买任何书；true 整单取消（409）；false 买下能买的那本（200）。
+#返回码或订单数不符合预期就以非 0 状态退出。
+import os
+import sys
+import tempfile
+
+#(all_or_nothing 的取值（None 表示不传）, 预期返回码, 预期新增订单数)
+CASES = [
+    ('false', 400, 0),
+    ('true', 400, 0),
+    (0, 400, 0),
+    (True, 409, 0),
+    (None, 200, 1),
+    (False, 200, 1),
+]
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'checkout.db')
+    from app import create_app, db
+    from app.config import Config
+    from app.models.book import Book
+    from app.models.order import Order
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+
+    class CheckConfig(Config):
+        ORDER_JOBS_INTERVAL = 0
+        RATELIMIT_ENABLED = False
+        UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+
+    app = create_app(CheckConfig)
+    seller, buyer = app.test_client(), app.test_client()
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+    seller.post('/user/register', json={'phone': '13800000000', 'password': '123456', 'username': 'seller'})
+    buyer.post('/user/register', json={'phone': '13800000001', 'password': '123456', 'username': 'buyer'})
+    buyer.post('/user/login', json={'phone': '13800000001', 'password': '123456'})
+
+    failed = False
+    for value, expected_status, expected_orders in CASES:
+        with app.app_context():
+            books = [Book(title='高等数学', author='同济大学', course_tag='高等数学', condition='九成新', price=20,
+                          seller_id=1, status=status) for status in (1, 0)]
+            db.session.add_all(books)
+            db.session.commit()
+            book_ids = [book.id for book in books]
+            before = Order.query.count()
+        payload = {'book_ids': book_ids}
+        if value is not None:
+            payload['all_or_nothing'] = value
+        response = buyer.post('/order/checkout', json=payload)
+        with app.app_context():
+            created = Order.query.count() - before
+        ok = response.status_code == expected_status and created == expected_orders
+        failed = failed or not ok
+        print(f"[{'OK' if ok else '结果不符!'}] all_or_nothing={value!r}：{response.status_code}，新增订单 {created}"
+              f"（预期 {expected_status}，{expected_orders}）")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
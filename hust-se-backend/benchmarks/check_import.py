@@ -0,0 +1,96 @@
+#benchmarks/check_import.py：检查批量导入（/book/import）对字段值的处理
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.check_import
+#在临时 SQLite 库里登录一个卖家，用 NDJSON 导入几行边界数据（价格为数字 0、字段为 null 等），
+#逐行对比导入结果是否符合预期（成功 / 失败）；
+#再带着图片压缩包导入一批、让这一批写入失败，检查这一批新写入的图片文件被删掉、之前已提交的图片仍然保留。
+#任何一项不符合就以非 0 状态退出。
+import io
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from unittest import mock
+
+#(NDJSON 行, 是否应该导入成功)
+ROWS = [
+    ({'title': '免费送', 'course_tag': '高等数学', 'condition': '9', 'price': 0}, True),
+    ({'title': '数字价格', 'course_tag': '高等数学', 'condition': '9', 'price': 12.5}, True),
+    ({'title': '年级为空', 'course_tag': '高等数学', 'grade_tag': None, 'condition': '9', 'price': '8'}, True),
+    ({'title': '缺价格', 'course_tag': '高等数学', 'condition': '9'}, False),
+    ({'title': '价格为空', 'course_tag': '高等数学', 'condition': '9', 'price': None}, False),
+    ({'title': '价格为空白', 'course_tag': '高等数学', 'condition': '9', 'price': '  '}, False),
+    ({'title': '负价格', 'course_tag': '高等数学', 'condition': '9', 'price': -1}, False),
+]
+
+
+def upload_files(upload_folder):
+    #已保存的上传文件（不含 .tmp 下的临时文件），相对路径
+    return {os.path.relpath(os.path.join(root, name), upload_folder)
+            for root, _, names in os.walk(upload_folder) if '.tmp' not in root for name in names}
+
+
+def import_with_images(client, rows, images):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for name, content in images.items():
+            zf.writestr(name, content)
+    archive.seek(0)
+    body = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows).encode()
+    response = client.post('/book/import', content_type='multipart/form-data', data={
+        'file': (io.BytesIO(body), 'books.ndjson'), 'images_zip': (archive, 'images.zip')})
+    return [result for result in map(json.loads, response.get_data(as_text=True).splitlines()) if 'row' in result]
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'import.db')
+    from app import create_app
+    from app.config import Config
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+
+    class CheckConfig(Config):
+        ORDER_JOBS_INTERVAL = 0
+        RATELIMIT_ENABLED = False
+        UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+
+    app = create_app(CheckConfig)
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+
+    client = app.test_client()
+    client.post('/user/register', json={'phone': '13800000001', 'password': '123456', 'username': 'seller'})
+    client.post('/user/login', json={'phone': '13800000001', 'password': '123456'})
+
+    body = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row, _ in ROWS)
+    response = client.post('/book/import', data=body.encode(), content_type='application/x-ndjson')
+    results = {result['row']: result for result in map(json.loads, response.get_data(as_text=True).splitlines())
+               if 'row' in result}
+
+    failed = False
+    for number, (row, expected) in enumerate(ROWS, start=1):
+        result = results.get(number, {})
+        ok = ('id' in result) == expected
+        failed = failed or not ok
+        print(f"[{'OK' if ok else '结果不符!'}] {json.dumps(row, ensure_ascii=False)}：{result.get('error', '导入成功')}")
+
+    #先成功导入一本带图片的书，再在一批里引用这张旧图片和一张新图片，让这一批写入失败
+    upload_folder = app.config['UPLOAD_FOLDER']
+    book = {'title': '带图', 'course_tag': '高等数学', 'condition': '9', 'price': 5}
+    import_with_images(client, [{**book, 'images': 'old.jpg'}], {'old.jpg': b'old image'})
+    committed = upload_files(upload_folder)
+    with mock.patch('app.utils.book_import.facets.add_books', side_effect=RuntimeError('模拟写入失败')):
+        results = import_with_images(client, [{**book, 'images': 'old.jpg;new.jpg'}],
+                                     {'old.jpg': b'old image', 'new.jpg': b'new image'})
+    left = upload_files(upload_folder)
+    ok = len(committed) == 1 and left == committed and all('error' in result for result in results)
+    failed = failed or not ok
+    print(f"[{'OK' if ok else '失败的批次留下了孤儿文件!'}] 写入失败的批次：已提交的图片 {len(committed)} 个，失败后剩余 {len(left)} 个")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
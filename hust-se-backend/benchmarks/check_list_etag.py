@@ -0,0 +1,90 @@
+#benchmarks/check_list_etag.py：检查书籍列表的 ETag 在“时间戳更早的写入后提交”时也会变化
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.check_list_etag
+#两个下单请求重叠：请求 A 先取了时间戳 T1，请求 B 取了更晚的 T2 并先提交，A 最后才提交（写入的 updated_at 是更早的 T1）。
+#在临时 SQLite 库里准备一个卖家的两本书，按上面的顺序先卖出第一本（时间 T2），客户端拿到列表和 ETag，
+#再把下单接口的时钟拨回 T1 卖出第二本；客户端带着旧 ETag 再请求列表，必须拿到 200 且列表里没有第二本，
+#否则以非 0 状态退出。同时打印 max(updated_at) 前后是否变化，说明只用时间戳做版本会返回 304。
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+
+def seed(db, password_hash):
+    from app.models.user import User
+    from app.models.book import Book
+    from app.utils import search as book_search
+    from app.utils import facets
+    seller = User(phone='13800000001', username='seller', password_hash=password_hash)
+    buyer = User(phone='13800000002', username='buyer', password_hash=password_hash)
+    db.session.add_all([seller, buyer])
+    db.session.flush()
+    books = [Book(title=f'书{i}', author='作者', course_tag='高等数学', condition='9', price=10 + i,
+                  seller_id=seller.id, status=1) for i in range(2)]
+    db.session.add_all(books)
+    db.session.flush()
+    book_search.index_books(books)
+    facets.add_books(books)
+    db.session.commit()
+    return [book.id for book in books]
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'etag.db')
+    from werkzeug.security import generate_password_hash
+    from app import create_app, db
+    from app.config import Config
+    from app.models.book import Book
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+
+    class CheckConfig(Config):
+        ORDER_JOBS_INTERVAL = 0
+        RATELIMIT_ENABLED = False   #响应缓存保持开启：缓存 key 也要跟着版本变
+        UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+
+    app = create_app(CheckConfig)
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+        first_id, second_id = seed(db, generate_password_hash('123456', app.config['PASSWORD_HASH_METHOD']))
+
+    def max_updated_at():
+        with app.app_context():
+            return db.session.query(db.func.max(Book.updated_at)).scalar()
+
+    buyer = app.test_client()
+    buyer.post('/user/login', json={'phone': '13800000002', 'password': '123456'})
+    reader = app.test_client()
+
+    #请求 B：时间戳 T2，先提交
+    response = buyer.post('/order/create', json={'book_id': first_id})
+    assert response.status_code == 200, response.get_json()
+    later = max_updated_at()
+    response = reader.get('/book/list')
+    etag = response.headers['ETag']
+    listed = {book['id'] for book in response.get_json()['data']['books']}
+    assert listed == {second_id}, listed
+
+    #请求 A：时间戳 T1 比 T2 早，后提交
+    class EarlierClock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return later - timedelta(minutes=1)
+
+    with mock.patch('app.routes.order_routes.datetime', EarlierClock):
+        response = buyer.post('/order/create', json={'book_id': second_id})
+    assert response.status_code == 200, response.get_json()
+    print(f"max(updated_at)：{'不变（只用时间戳做版本会返回 304）' if max_updated_at() == later else '变化'}")
+
+    response = reader.get('/book/list', headers={'If-None-Match': etag})
+    listed = {book['id'] for book in response.get_json()['data']['books']} if response.status_code == 200 else None
+    ok = response.status_code == 200 and listed == set()
+    print(f"[{'OK' if ok else '列表 ETag 没有变化!'}] 后提交的更早写入之后：{response.status_code}，列表书籍 {listed}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#benchmarks/check_query_counts.py：检查列表接口每个请求执行的 SQL 条数是固定的，不随返回行数增长（没有 N+1 懒加载）
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.check_query_counts --small 3 --large 40
+#在临时 SQLite 库里准备两组数据：一门课有 --small 本书、另一门课有 --large 本书（每本书的卖家都不同），
+#一个买家有 --small 个订单、另一个买家有 --large 个订单（每个订单的卖家、书籍都不同）；
+#对同一个接口分别请求两组数据（每页条数等于行数），统计请求里执行的 SQL 条数，两组不一致就以非 0 状态退出。
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+#(接口, 查询参数，{n} 替换成行数对应的组, 以哪个买家身份登录（None 为不登录）)
+ROUTES = [
+    ('/book/list', {'course_tag': 'c{n}'}, None),
+    ('/book/list', {'course_tag': 'c{n}', 'sort_by': 'price'}, None),
+    ('/book/list', {'course_tag': 'c{n}', 'fields': 'id,title,price,seller_name'}, None),
+    ('/book/list', {'course_tag': 'c{n}', 'facets': '1'}, None),
+    ('/order/list', {'role': 'buyer'}, 'buyer{n}'),
+    ('/order/list', {'role': 'buyer', 'fields': 'id,order_no,book_title,seller_name'}, 'buyer{n}'),
+]
+
+
+def seed(db, sizes, password_hash):
+    from app.models.user import User
+    from app.models.book import Book
+    from app.models.order import Order
+    from app.utils import search as book_search
+    from app.utils import facets
+    now = datetime.utcnow()
+    for n in sizes:
+        buyer = User(phone=f'137{n:08d}', username=f'buyer{n}', password_hash=password_hash)
+        sellers = [User(phone=f'138{n:04d}{i:04d}', username=f'seller{n}-{i}', password_hash=password_hash)
+                   for i in range(2 * n)]
+        db.session.add_all([buyer, *sellers])
+        db.session.flush()
+        #前 n 本在售（列表用），后 n 本已售给买家（订单列表用）
+        books = [Book(title=f'书{n}-{i}', author='作者', course_tag=f'c{n}', condition='9', price=10 + i,
+                      seller_id=seller.id, status=1 if i < n else 0, create_time=now - timedelta(minutes=i))
+                 for i, seller in enumerate(sellers)]
+        db.session.add_all(books)
+        db.session.flush()
+        db.session.add_all([
+            Order(order_no=f'{n:08d}{i:08d}', buyer_id=buyer.id, seller_id=book.seller_id, book_id=book.id,
+                  price=book.price, status=1, create_time=now - timedelta(minutes=i))
+            for i, book in enumerate(books[n:])
+        ])
+        book_search.index_books(books[:n])
+        facets.add_books(books[:n])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--small', type=int, default=3)
+    parser.add_argument('--large', type=int, default=40)
+    args = parser.parse_args()
+    sizes = (args.small, args.large)
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'counts.db')
+    from werkzeug.security import generate_password_hash
+    from app import create_app, db
+    from app.config import Config
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+
+    class CheckConfig(Config):
+        ORDER_JOBS_INTERVAL = 0
+        RESPONSE_CACHE_ENABLED = False   #每次都要真正执行查询
+        RATELIMIT_ENABLED = False
+        MAX_PER_PAGE = max(sizes)
+        UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+
+    app = create_app(CheckConfig)
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+        seed(db, sizes, generate_password_hash('123456', app.config['PASSWORD_HASH_METHOD']))
+        engine = db.engine
+
+    clients = {}
+    for n in sizes:
+        clients[f'buyer{n}'] = app.test_client()
+        clients[f'buyer{n}'].post('/user/login', json={'phone': f'137{n:08d}', 'password': '123456'})
+    anonymous = app.test_client()
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+    failed = False
+    for path, params, login in ROUTES:
+        counts = []
+        for n in sizes:
+            client = clients[login.format(n=n)] if login else anonymous
+            query = {key: value.format(n=n) for key, value in params.items()}
+            query['per_page'] = n
+            client.get(path, query_string=query)   #预热：登录缓存等只在第一次请求时查询
+            statements.clear()
+            response = client.get(path, query_string=query)
+            rows = response.get_json()['data']
+            rows = len(rows.get('books', rows.get('orders', [])))
+            counts.append((rows, len(statements)))
+        ok = len({count for _, count in counts}) == 1
+        failed = failed or not ok
+        detail = '，'.join(f'{rows} 行 {count} 条 SQL' for rows, count in counts)
+        print(f"[{'OK' if ok else 'SQL 条数随行数增长!'}] {path} {params}：{detail}")
+
+    if failed:
+        print('存在 N+1 查询，请检查 joinedload / 序列化用到的关联关系')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
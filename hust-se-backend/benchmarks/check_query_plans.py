@@ -0,0 +1,85 @@
+#benchmarks/check_query_plans.py：检查列表接口的 SQL 是否都走了索引
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.check_query_plans
+#在临时 SQLite 库里调用一遍各个列表接口，抓取实际执行的 SELECT，逐条 EXPLAIN QUERY PLAN，
+#出现对 books/orders/users 的全表扫描（SCAN 表名，且没有 USING INDEX）就以非 0 状态退出。
+import os
+import re
+import sys
+import tempfile
+from sqlalchemy import event
+
+#(接口, 查询参数, 是否需要以卖家身份登录)
+ROUTES = [
+    ('/book/list', {}, False),
+    ('/book/list', {'sort_by': 'price'}, False),
+    ('/book/list', {'sort_by': 'price', 'order': 'asc'}, False),
+    ('/book/list', {'course_tag': '数学'}, False),
+    ('/book/list', {'course_tag': '数学', 'sort_by': 'price'}, False),
+    ('/book/list', {'grade_tag': '大一'}, False),
+    ('/book/list', {'min_price': 10, 'max_price': 30}, False),
+    ('/book/list', {'min_price': 15, 'max_price': 25, 'facets': '1'}, False),
+    ('/book/list', {'search': '高等数学', 'facets': '1'}, False),
+    ('/book/list', {'cursor': ''}, False),
+    ('/book/list', {'search': '高等数学'}, False),
+    ('/book/1', {}, False),
+    ('/order/list', {'role': 'buyer'}, True),
+    ('/order/list', {'role': 'seller'}, True),
+    ('/order/list', {'role': 'seller', 'status': 1}, True),
+]
+
+#SQLite 的全表扫描形如 “SCAN books” 或 “SCAN users_1”（别名），虚拟表（FTS5）和索引扫描不算
+TABLE_SCAN = re.compile(r'^SCAN (books|orders|users)(_\d+)?$')
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'plan.db')
+    from app import create_app, db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+        engine = db.engine
+
+    seller, buyer = app.test_client(), app.test_client()
+    for client, phone in ((seller, '13800000001'), (buyer, '13800000002')):
+        client.post('/user/register', json={'phone': phone, 'password': '123456', 'username': phone})
+        client.post('/user/login', json={'phone': phone, 'password': '123456'})
+    for i in range(20):
+        seller.post('/book/create', data={'title': f'高等数学 第{i}版', 'author': '同济大学', 'course_tag': '数学',
+                                          'condition': '9', 'price': str(10 + i)})
+    for book_id in range(10, 15):
+        buyer.post('/order/create', json={'book_id': book_id})
+
+    failed = False
+    with engine.connect() as conn:
+        for path, params, as_seller in ROUTES:
+            captured = []
+
+            def capture(conn_, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith('SELECT'):
+                    captured.append((statement, parameters))
+
+            event.listen(engine, 'before_cursor_execute', capture)
+            (seller if as_seller else buyer).get(path, query_string=params)
+            event.remove(engine, 'before_cursor_execute', capture)
+
+            for statement, parameters in captured:
+                plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+                scans = [step for step in plan if TABLE_SCAN.match(step)]
+                status = '全表扫描!' if scans else 'OK'
+                failed = failed or bool(scans)
+                print(f'[{status}] {path} {params}')
+                for step in plan:
+                    print(f'        {step}')
+
+    if failed:
+        print('存在全表扫描的查询，请检查索引')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#benchmarks/loadtest.py：全流程压测
+#用法（在 hust-se-backend 目录下）：
+#    python -m benchmarks.loadtest --scale 10k --users 16 --seconds 30 --save-baseline benchmarks/baseline.json
+#    python -m benchmarks.loadtest --scale 10k --users 16 --seconds 30 --compare benchmarks/baseline.json
+#先用 benchmarks.seed 生成数据集（临时 SQLite 库，或 --database-url 指定），然后启动 --users 个虚拟用户线程，
+#每个虚拟用户注册、登录后按比例循环执行：浏览/筛选列表、翻页、看详情、发布书籍、下单、推进订单状态。
+#请求直接打进同一进程内的 Flask 应用（test_client），同时用 SQLAlchemy 事件统计每个接口执行的 SQL 条数。
+#输出每个接口的 p50/p95/p99 延迟、吞吐量、平均 SQL 条数，可以保存为基线文件，之后对比是否有性能回退。
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+
+from benchmarks.seed import SCALES, COURSES, COURSE_WEIGHTS, GRADES, skewed_price, seed
+
+#虚拟用户每一轮的动作及权重
+ACTIONS = {
+    'browse': 35,
+    'filter': 20,
+    'next_page': 10,
+    'search': 8,
+    'detail': 15,
+    'create_book': 4,
+    'create_order': 4,
+    'advance_orders': 4,
+}
+
+
+class Recorder:
+    #按接口名记录延迟、状态码和 SQL 条数
+    def __init__(self):
+        self.latency = defaultdict(list)
+        self.sql = defaultdict(int)
+        self.errors = defaultdict(int)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def on_sql(self, *args):
+        label = getattr(self._local, 'label', None)
+        if label:
+            self._local.sql += 1
+
+    def call(self, label, fn, *args, **kwargs):
+        self._local.label, self._local.sql = label, 0
+        t0 = time.perf_counter()
+        resp = fn(*args, **kwargs)
+        cost = (time.perf_counter() - t0) * 1000
+        self._local.label = None
+        with self._lock:
+            self.latency[label].append(cost)
+            self.sql[label] += self._local.sql
+            if resp.status_code >= 500 or (resp.is_json and resp.get_json().get('code', 200) >= 500):
+                self.errors[label] += 1
+        return resp
+
+    def report(self, seconds):
+        result = {}
+        for label, values in sorted(self.latency.items()):
+            values = sorted(values)
+            pick = lambda p: values[min(len(values) - 1, int(len(values) * p))]
+            result[label] = {
+                'requests': len(values),
+                'rps': round(len(values) / seconds, 1),
+                'p50_ms': round(pick(0.50), 2),
+                'p95_ms': round(pick(0.95), 2),
+                'p99_ms': round(pick(0.99), 2),
+                'sql_per_request': round(self.sql[label] / len(values), 2),
+                'errors': self.errors[label],
+            }
+        return result
+
+
+def virtual_user(app, recorder, index, stop, rng):
+    client = app.test_client()
+    client.environ_base['REMOTE_ADDR'] = f'10.0.{index // 256}.{index % 256}'   #每个虚拟用户一个地址，登录限流按 IP 计
+    phone = f'177{index:08d}'
+    recorder.call('register', client.post, '/user/register',
+                  json={'phone': phone, 'password': '123456', 'username': f'vu{index}'})
+    recorder.call('login', client.post, '/user/login', json={'phone': phone, 'password': '123456'})
+
+    seen_ids, cursor = [], None
+    names, weights = list(ACTIONS), list(ACTIONS.values())
+    while not stop.is_set():
+        action = rng.choices(names, weights)[0]
+        if action == 'browse':
+            resp = recorder.call('list', client.get, '/book/list', query_string={'cursor': ''})
+            data = resp.get_json()['data']
+            seen_ids = [b['id'] for b in data['books']] or seen_ids
+            cursor = data.get('next_cursor')
+        elif action == 'filter':
+            params = {'course_tag': rng.choices(COURSES, COURSE_WEIGHTS)[0]}
+            if rng.random() < 0.5:
+                params.update(sort_by='price', order=rng.choice(['asc', 'desc']))
+            if rng.random() < 0.3:
+                params.update(min_price=10, max_price=40)
+            if rng.random() < 0.5:
+                params['facets'] = 1
+            resp = recorder.call('list_filter', client.get, '/book/list', query_string=params)
+            seen_ids = [b['id'] for b in resp.get_json()['data']['books']] or seen_ids
+        elif action == 'next_page' and cursor:
+            resp = recorder.call('list_next_page', client.get, '/book/list', query_string={'cursor': cursor})
+            cursor = resp.get_json()['data'].get('next_cursor')
+        elif action == 'search':
+            keyword = rng.choices(COURSES, COURSE_WEIGHTS)[0][:2]
+            recorder.call('search', client.get, '/book/list', query_string={'search': keyword})
+        elif action == 'detail' and seen_ids:
+            recorder.call('detail', client.get, f'/book/{rng.choice(seen_ids)}')
+        elif action == 'create_book':
+            recorder.call('create_book', client.post, '/book/create', data={
+                'title': f'{rng.choices(COURSES, COURSE_WEIGHTS)[0]} 二手', 'author': '压测', 'condition': '九成新',
+                'course_tag': rng.choices(COURSES, COURSE_WEIGHTS)[0], 'grade_tag': rng.choice(GRADES),
+                'price': str(skewed_price(rng))})
+        elif action == 'create_order' and seen_ids:
+            book_id = seen_ids.pop(rng.randrange(len(seen_ids)))
+            recorder.call('create_order', client.post, '/order/create', json={'book_id': book_id})
+        elif action == 'advance_orders':
+            #买家：待支付->已支付、已发货->已收货；卖家：已支付->已发货
+            for role, status, new_status, label in (('buyer', 1, 2, 'pay'), ('seller', 2, 3, 'ship'),
+                                                    ('buyer', 3, 4, 'confirm')):
+                resp = recorder.call('order_list', client.get, '/order/list',
+                                     query_string={'role': role, 'status': status, 'per_page': 5})
+                for order in resp.get_json()['data']['orders'][:2]:
+                    recorder.call(label, client.post, f'/order/{order["id"]}/update', json={'status': new_status})
+
+
+def compare(current, baseline_path, threshold):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['endpoints']
+    regressions = []
+    print(f'\n与基线 {baseline_path} 对比（p95 / SQL 条数）：')
+    for label, row in current.items():
+        old = baseline.get(label)
+        if not old:
+            print(f'  {label:<16} 基线中没有该接口')
+            continue
+        p95_change = (row['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0
+        sql_change = row['sql_per_request'] - old['sql_per_request']
+        flag = ''
+        if p95_change > threshold or sql_change > 0.5:
+            flag = '  <-- 回退'
+            regressions.append(label)
+        print(f'  {label:<16} p95 {old["p95_ms"]:>8.2f} -> {row["p95_ms"]:>8.2f} ms ({p95_change:+.0f}%)  '
+              f'SQL {old["sql_per_request"]:>5.2f} -> {row["sql_per_request"]:>5.2f}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=sorted(SCALES), default='10k')
+    parser.add_argument('--database-url', help='默认在临时目录新建 SQLite 库；指定时需要是已经 seed 过的库')
+    parser.add_argument('--users', type=int, default=16, help='并发虚拟用户数')
+    parser.add_argument('--seconds', type=int, default=30)
+    parser.add_argument('--random-seed', type=int, default=2025)
+    parser.add_argument('--save-baseline', help='把本次结果保存为基线 JSON')
+    parser.add_argument('--compare', help='与之前保存的基线 JSON 对比')
+    parser.add_argument('--threshold', type=float, default=20.0, help='p95 变慢超过该百分比视为回退')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(workdir, 'loadtest.db')
+    from app import create_app, db
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    if not args.database_url:
+        seed(app, args.scale, random.Random(args.random_seed))
+
+    recorder = Recorder()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', recorder.on_sql)
+
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=virtual_user, args=(app, recorder, i, stop, random.Random(args.random_seed + i)))
+        for i in range(args.users)
+    ]
+    print(f'{args.users} 个虚拟用户，持续 {args.seconds}s ...')
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    result = recorder.report(args.seconds)
+    print(f'\n{"接口":<16}{"请求数":>8}{"req/s":>9}{"p50(ms)":>10}{"p95(ms)":>10}{"p99(ms)":>10}{"SQL/请求":>10}{"错误":>6}')
+    for label, row in result.items():
+        print(f'{label:<16}{row["requests"]:>8}{row["rps"]:>9}{row["p50_ms"]:>10}{row["p95_ms"]:>10}'
+              f'{row["p99_ms"]:>10}{row["sql_per_request"]:>10}{row["errors"]:>6}')
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'scale': args.scale, 'users': args.users, 'seconds': args.seconds, 'endpoints': result},
+                      f, ensure_ascii=False, indent=2)
+        print(f'\n已保存基线：{args.save_baseline}')
+    if args.compare and compare(result, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
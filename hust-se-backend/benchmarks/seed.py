@@ -0,0 +1,150 @@
+#benchmarks/seed.py：生成压测用的校园二手书数据集
+#用法（在 hust-se-backend 目录下）：
+#    python -m benchmarks.seed --scale 100k --database-url sqlite:////tmp/bench.db
+#规模：10k / 100k / 1m（书籍数量），用户数为书籍的 1/10，订单数为书籍的 1/5。
+#分布尽量贴近真实：课程标签按 Zipf 分布（高数、英语这类公共课远多于专业课），价格为对数正态分布，
+#发布时间分散在最近一年。所有生成的用户密码都是 SEED_PASSWORD，压测脚本可以直接登录。
+#数据用批量 INSERT 写入，不走接口；写完后重建全文索引和分面计数。
+import argparse
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+SCALES = {
+    '10k': {'books': 10000, 'users': 1000, 'orders': 2000},
+    '100k': {'books': 100000, 'users': 10000, 'orders': 20000},
+    '1m': {'books': 1000000, 'users': 100000, 'orders': 200000},
+}
+SEED_PASSWORD = '123456'
+BATCH_SIZE = 10000
+
+COURSES = ['高等数学', '大学英语', '线性代数', '大学物理', '概率论与数理统计', '马克思主义基本原理', 'C语言程序设计',
+           '数据结构', '电路理论', '计算机组成原理', '操作系统', '有机化学', '工程制图', '信号与系统', '材料力学',
+           '微观经济学', '会计学原理', '机械原理', '自动控制原理', '编译原理']
+GRADES = ['大一', '大二', '大三', '大四']
+GRADE_WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+MAJORS = ['计算机', '电气', '机械', '光电', '经济', '管理', '化学', '数学']
+AUTHORS = ['同济大学数学系', '高等教育出版社', '严蔚敏', '谭浩强', '清华大学出版社', '邱关源', '汤小丹', '唐朔飞']
+EDITIONS = ['第七版', '第二版', '第三版', '第四版', '习题全解', '学习指导', '']
+CONDITIONS = ['全新', '九成新', '八成新', '七成新', '有笔记']
+DESCRIPTIONS = ['几乎全新，没有笔记', '有少量笔记，不影响阅读', '考研用过，重点都画出来了', '封面有折痕', '附赠课后习题答案']
+
+#Zipf 权重：第 i 门课出现概率 ∝ 1/(i+1)
+COURSE_WEIGHTS = [1 / (i + 1) for i in range(len(COURSES))]
+
+
+def skewed_price(rng):
+    #对数正态：大多数 10~40 元，少量上百元的大部头
+    return round(min(300.0, max(1.0, rng.lognormvariate(math.log(22), 0.55))) * 2) / 2
+
+
+def _insert(db, table, rows):
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+
+def seed(app, scale, rng=None, log=print):
+    '''往 app 当前配置的数据库里写入一套数据集，返回各表写入数量'''
+    from werkzeug.security import generate_password_hash
+    from app import db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+    from app.models.user import User
+    from app.models.book import Book
+    from app.models.order import Order
+    from app.utils import search as book_search
+    from app.utils.facets import rebuild_facets
+    from app.utils.recommend import rebuild_co_purchases
+    from app.utils.price_stats import rebuild_price_stats
+    from app.utils.idgen import IdGenerator
+
+    sizes = SCALES[scale] if isinstance(scale, str) else scale
+    rng = rng or random.Random(2025)
+    now = datetime.utcnow()
+    #哈希很慢，所有用户共用一个密码哈希
+    password_hash = generate_password_hash(SEED_PASSWORD, app.config['PASSWORD_HASH_METHOD'])
+
+    with app.app_context():
+        upgrade_schema()   #和部署时的 flask schema-upgrade 一样：建表、建全文索引表
+        bootstrap_derived()
+        t0 = time.perf_counter()
+
+        first_user_id = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+        rows = []
+        for i in range(sizes['users']):
+            user_id = first_user_id + i
+            rows.append({
+                'id': user_id, 'phone': f'1{user_id:010d}', 'password_hash': password_hash,
+                'username': f'seed{user_id}', 'identity': 'buyer', 'major': rng.choice(MAJORS),
+                'grade': rng.choice(GRADES), 'credit': 100, 'create_time': now - timedelta(days=rng.randint(0, 720))
+            })
+            if len(rows) == BATCH_SIZE:
+                _insert(db, User.__table__, rows)
+                rows = []
+        _insert(db, User.__table__, rows)
+        user_ids = range(first_user_id, first_user_id + sizes['users'])
+
+        first_book_id = (db.session.query(db.func.max(Book.id)).scalar() or 0) + 1
+        sold = set(rng.sample(range(sizes['books']), min(sizes['orders'], sizes['books'])))
+        books, rows = [], []
+        for i in range(sizes['books']):
+            course = rng.choices(COURSES, COURSE_WEIGHTS)[0]
+            title = f'{course} {rng.choice(EDITIONS)}'.strip()
+            created = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            book = {
+                'id': first_book_id + i, 'title': title, 'author': rng.choice(AUTHORS), 'course_tag': course,
+                'grade_tag': rng.choices(GRADES, GRADE_WEIGHTS)[0], 'condition': rng.choice(CONDITIONS),
+                'price': skewed_price(rng), 'description': rng.choice(DESCRIPTIONS), 'images': '',
+                'seller_id': rng.choice(user_ids), 'create_time': created, 'updated_at': created,
+                'status': 0 if i in sold else 1
+            }
+            rows.append(book)
+            if i in sold:
+                books.append(book)
+            if len(rows) == BATCH_SIZE:
+                _insert(db, Book.__table__, rows)
+                rows = []
+        _insert(db, Book.__table__, rows)
+
+        generator = IdGenerator()
+        rows = []
+        for book in books:
+            buyer_id = rng.choice(user_ids)
+            while buyer_id == book['seller_id'] and len(user_ids) > 1:
+                buyer_id = rng.choice(user_ids)
+            rows.append({
+                'order_no': generator.next_order_no(), 'buyer_id': buyer_id, 'seller_id': book['seller_id'],
+                'book_id': book['id'], 'price': book['price'], 'status': rng.choices([1, 2, 3, 4, 5], [1, 1, 1, 2, 5])[0],
+                'create_time': book['create_time'] + timedelta(hours=rng.randint(1, 240))
+            })
+            if len(rows) == BATCH_SIZE:
+                _insert(db, Order.__table__, rows)
+                rows = []
+        _insert(db, Order.__table__, rows)
+        db.session.commit()
+        log(f'写入 {sizes["users"]} 个用户、{sizes["books"]} 本书、{len(books)} 个订单，耗时 {time.perf_counter() - t0:.1f}s')
+
+        t0 = time.perf_counter()
+        indexed = book_search.rebuild_search_index()
+        log(f'重建全文索引 {indexed} 本在售书籍，耗时 {time.perf_counter() - t0:.1f}s')
+        rebuild_facets()
+        rebuild_co_purchases()
+        rebuild_price_stats()
+    return {'users': sizes['users'], 'books': sizes['books'], 'orders': len(books)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=sorted(SCALES), default='10k')
+    parser.add_argument('--database-url', required=True, help='例如 sqlite:////tmp/bench.db，不要指向正式库')
+    parser.add_argument('--random-seed', type=int, default=2025)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url
+    from app import create_app
+    seed(create_app(), args.scale, random.Random(args.random_seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#benchmarks/stress_create_order.py：并发抢购同一本书，验证每本书只会有一个买家下单成功
+#用法（在 hust-se-backend 目录下）：python -m benchmarks.stress_create_order --buyers 16 --books 20
+#每本书由 --buyers 个线程（各自登录一个买家账号）同时调用 /order/create，
+#检查成功数是否恰好为 1、订单表里每本书是否只有一条订单；不满足时以非 0 状态退出。
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--buyers', type=int, default=16)
+    parser.add_argument('--books', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'stress.db')
+    from app import create_app, db
+    from app.utils.schema import upgrade_schema, bootstrap_derived
+    from app.models.order import Order
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    app.config['RATELIMIT_ENABLED'] = False   #所有买家都从同一个地址注册/登录
+    with app.app_context():
+        upgrade_schema()
+        bootstrap_derived()
+
+    def login(phone):
+        client = app.test_client()
+        client.post('/user/register', json={'phone': phone, 'password': '123456', 'username': phone})
+        client.post('/user/login', json={'phone': phone, 'password': '123456'})
+        return client
+
+    seller = login('13800000000')
+    buyers = [login(f'139{i:08d}') for i in range(args.buyers)]
+    book_ids = []
+    for i in range(args.books):
+        resp = seller.post('/book/create', data={'title': f'高等数学 {i}', 'course_tag': '数学', 'condition': '9', 'price': '20'})
+        book_ids.append(resp.get_json()['data']['id'])
+
+    failed = False
+    for book_id in book_ids:
+        results = []
+        barrier = threading.Barrier(len(buyers))
+
+        def buy(client):
+            barrier.wait()  #所有线程同时发起请求
+            results.append(client.post('/order/create', json={'book_id': book_id}).get_json()['code'])
+
+        threads = [threading.Thread(target=buy, args=(client,)) for client in buyers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        codes = Counter(results)
+        with app.app_context():
+            orders = Order.query.filter_by(book_id=book_id).count()
+        ok = codes[200] == 1 and orders == 1
+        failed = failed or not ok
+        print(f'[{"OK" if ok else "FAIL"}] book {book_id}: 返回码 {dict(codes)}，订单数 {orders}')
+
+    if failed:
+        sys.exit(1)
+    print('每本书都恰好只有一个买家成功下单')
+
+
+if __name__ == '__main__':
+    main()
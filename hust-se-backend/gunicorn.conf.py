@@ -0,0 +1,73 @@
+#gunicorn.conf.py：生产环境 prefork 部署配置（gunicorn -c gunicorn.conf.py wsgi:app）
+#1. preload_app：主进程先导入并初始化应用（模型、蓝图、扩展），再 fork 出 worker，
+#   worker 启动不用重复这些工作，内存里的代码页也和主进程共享；
+#   create_app 不访问数据库，表结构升级和全文索引、计数表的初始化在部署时用 flask schema-upgrade 执行；
+#2. worker 数按可用 CPU 核数计算（2 * 核数 + 1），可以用环境变量 WEB_CONCURRENCY 覆盖；
+#   worker 类型为 gthread：请求在线程里处理，主循环一直给 master 发心跳，
+#   批量导入 / 订单导出这类长时间流式请求不会因为 timeout 被当成卡死的 worker 杀掉；
+#3. fork 之后每个 worker 丢弃从主进程继承来的数据库连接，各自重新建立；
+#4. 优雅退出：收到 SIGTERM（或 HUP 重载、max_requests 轮换）后 worker 不再接受新连接，
+#   等正在处理的请求（包括进行中的下单事务）完成后再退出，最多等 graceful_timeout 秒；
+#   超时仍未完成的请求会被强制结束，数据库事务没有提交，自动回滚，不会留下半个订单。
+#注意：限流、/metrics 都是进程内的，多 worker 时按 worker 各自计算；
+#响应缓存在 ProductionConfig 下只有配置了 CACHE_REDIS_URL 才开启（进程内缓存收不到别的 worker 的失效）。
+#密码哈希的并发上限（PASSWORD_HASH_CONCURRENCY）也是按进程计算的，worker 数多于核数时无法再按 worker 平摊核数，
+#这里不做调整：每个 worker 同时在算哈希的请求数本来就不超过 threads，排队超时的保护仍然有效。
+import os
+
+
+def _cpu_count():
+    #容器里用 CPU 亲和性得到实际可用的核数，比 os.cpu_count() 准确
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+cores = _cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * cores + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+timeout = 60                 #worker 超过这么久没有心跳才会被重启
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+#处理一定数量的请求后轮换 worker（带随机抖动，避免同时重启），防止内存缓慢增长
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')   #默认不写访问日志，设为 - 输出到标准输出
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def _app(server):
+    from app import db
+    return server.app.wsgi(), db
+
+
+def when_ready(server):
+    #应用已经在主进程里加载完，主进程之后不再访问数据库，把预加载时用过的连接关掉
+    if preload_app:
+        from app.utils.db_engine import dispose_engine
+        dispose_engine(*_app(server))
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app.utils.db_engine import dispose_engine
+        dispose_engine(*_app(server), close=False)
+
+
+def post_worker_init(worker):
+    worker.log.info(f'worker {worker.pid} 就绪')
+
+
+def worker_exit(server, worker):
+    #走到这里时 gthread worker 已经等过正在处理的请求（最多 graceful_timeout 秒），
+    #还没结束的请求会随进程退出而中断，它们的数据库事务会被回滚
+    from app.utils.metrics import registry
+    if registry.in_flight:
+        worker.log.warning(f'worker {worker.pid} 退出时仍有 {registry.in_flight} 个请求未完成，未提交的事务将回滚')
+    from app.utils.db_engine import dispose_engine
+    dispose_engine(*_app(server))
@@ -0,0 +1,7 @@
+#wsgi.py：生产环境入口，用 gunicorn 启动（配置见 gunicorn.conf.py）：
+#    gunicorn -c gunicorn.conf.py wsgi:app
+#开发调试仍然用 python run.py
+from app import create_app
+from app.config import ProductionConfig
+
+app = create_app(ProductionConfig)